@@ -0,0 +1,175 @@
+"""
+Build the benchmark fixtures in benchmarks/fixtures/ from the dataset.
+
+The fixtures stand in for pages recorded during a run: what Selenium reads
+off the Atlist map (DOM text lines and per-card text), dispensary homepages,
+and DuckDuckGo result pages. They come from nj_dispensaries_complete.csv
+with a fixed seed, so rebuilding produces identical files. They are checked
+in so a parser change is timed against the same input as its baseline.
+
+    python benchmarks/fixtures.py            # rewrite benchmarks/fixtures/
+"""
+import csv, json, os, random
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+FIXTURES = os.path.join(HERE, "fixtures")
+DATASET = os.path.join(ROOT, "nj_dispensaries_complete.csv")
+SEED = 20240601
+HOMEPAGES = 12
+DDG_PAGES = 24
+
+from njbuds.utils import clean, norm_zip
+
+ATLIST = "https://my.atlist.com/map/8bed33fa-9b8c-4c51-bb33-74cd0d98628a?share=true"
+DIRECTORIES = ("https://weedmaps.com/dispensaries/{slug}", "https://www.leafly.com/dispensary-info/{slug}",
+               "https://www.yelp.com/biz/{slug}-{city}", "https://www.facebook.com/{slug}/",
+               "https://www.instagram.com/{slug}/", "https://dutchie.com/dispensary/{slug}",
+               "https://www.iheartjane.com/stores/1234/{slug}", "https://www.mapquest.com/us/new-jersey/{slug}")
+PHONE_STYLES = ("({a}) {b}-{c}", "{a}-{b}-{c}", "{a}.{b}.{c}", "+1 {a} {b} {c}", "1-{a}-{b}-{c}")
+FILLER = ("Shop our full menu of flower, pre-rolls, vapes, edibles and concentrates.",
+          "Must be 21+ with a valid government-issued ID. Medical patients welcome.",
+          "Order online for express pickup and skip the line.",
+          "Daily deals, first-time customer discounts and a loyalty program.",
+          "License #RE000123 issued by the NJ Cannabis Regulatory Commission on 08/22/2022.")
+
+def load_rows(path=DATASET):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [{k: clean(v) for k, v in r.items()} for r in csv.DictReader(f)]
+    for r in rows:
+        r["zip"] = norm_zip(r["zip"])
+    return rows
+
+def slug(s):
+    return "-".join("".join(c if c.isalnum() else " " for c in s.lower()).split())
+
+def fmt_phone(phone, rnd):
+    d = "".join(c for c in phone if c.isdigit())[-10:]
+    if len(d) != 10:
+        return ""
+    return rnd.choice(PHONE_STYLES).format(a=d[:3], b=d[3:6], c=d[6:])
+
+def address(r):
+    return f"{r['street']}, {r['city']}, {r['state'] or 'NJ'} {r['zip']}".strip()
+
+def card_lines(r, rnd):
+    lines = [r["name"], address(r)]
+    if rnd.random() < 0.5:
+        lines.append(rnd.choice(("Adult-Use Cannabis", "Medicinal Cannabis", "Adult-Use & Medicinal")))
+    if rnd.random() < 0.4:
+        lines.append("Open today 9:00 AM - 9:00 PM")
+    lines += ["Get Directions"] + (["Website"] if r["website"] else [])
+    return lines
+
+def atlist_dom(rows, rnd):
+    """innerText of every element under <body>, as scrape_crc_iframe collects it: containers repeat their children."""
+    lines = ["Dispensaries", "Search this map", "Filter", "Adult-Use Cannabis", "Medicinal Cannabis"]
+    for r in rows:
+        cl = card_lines(r, rnd)
+        lines.append("\n".join(cl))           # the card container
+        lines += cl                           # and each child element
+    links = [r["website"] for r in rows if r["website"]]
+    links += [f"https://www.google.com/maps/dir/?api=1&destination={slug(address(r))}" for r in rows[:40]]
+    return lines, links
+
+def cards(rows, rnd):
+    out = []
+    for r in rows:
+        hrefs = [f"https://www.google.com/maps/dir/?api=1&destination={slug(address(r))}"]
+        if rnd.random() < 0.3:
+            hrefs.append(f"https://www.facebook.com/{slug(r['name'])}")
+        if r["website"]:
+            hrefs.append(r["website"])
+        out.append({"lines": card_lines(r, rnd), "hrefs": hrefs})
+    return out
+
+def homepage(r, siblings, rnd):
+    """A dispensary homepage: nav, a menu embed, product tiles, and a footer with address and phone."""
+    name, site = r["name"], (r["website"] or f"https://{slug(r['name'])}.com/").rstrip("/")
+    phone = fmt_phone(r["phone"], rnd)
+    parts = ["<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
+             f"<title>{name} | Cannabis Dispensary in {r['city']}, NJ</title>",
+             "<link rel='stylesheet' href='/wp-content/themes/dispo/style.css?ver=6.4.2'>",
+             "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}"
+             "gtag('js',new Date());gtag('config','G-" + "".join(rnd.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(10)) + "');</script>",
+             "<style>" + "".join(f".c{i}{{margin:{i}px;padding:{i % 7}px}}" for i in range(300)) + "</style>"]
+    if rnd.random() < 0.5:
+        parts.append('<script type="application/ld+json">' + json.dumps({
+            "@context": "https://schema.org", "@type": "LocalBusiness", "name": name,
+            "telephone": phone, "url": site,
+            "address": {"@type": "PostalAddress", "streetAddress": r["street"], "addressLocality": r["city"],
+                        "addressRegion": "NJ", "postalCode": r["zip"]},
+            "openingHours": "Mo-Su 09:00-21:00"}) + "</script>")
+    parts.append("</head><body><header><nav>")
+    for label, path in (("Shop", "/menu"), ("Deals", "/deals"), ("About", "/about-us"),
+                        ("Contact", "/contact"), ("Locations", "/locations"), ("FAQ", "/faq")):
+        parts.append(f"<a href='{site}{path}'>{label}</a>")
+    for s in siblings:   # a chain's other stores
+        parts.append(f"<a href='{site}/locations/{slug(s['city'])}'>{s['city']}</a>")
+    parts.append("</nav></header><main>")
+    parts.append(f"<iframe src='https://dutchie.com/embedded-menu/{slug(name)}' title='menu'></iframe>")
+    for i in range(rnd.randint(40, 90)):
+        sku = rnd.randint(100000, 999999)
+        parts.append(f"<div class='product c{i % 300}' data-sku='{sku}'><h3>Strain {i} - {rnd.choice(('Indica', 'Sativa', 'Hybrid'))}</h3>"
+                     f"<p>THC {rnd.randint(15, 32)}.{rnd.randint(0, 9)}% | 3.5g | ${rnd.randint(25, 65)}.00</p>"
+                     f"<p>{rnd.choice(FILLER)}</p></div>")
+    parts.append("</main><footer>")
+    parts.append(f"<p>{name}</p><p>{r['street']}<br>{r['city']}, NJ {r['zip']}</p>")
+    if phone:
+        parts.append(rnd.choice((f"<a href='tel:{phone}'>{phone}</a>", f"<p>Call us: {phone}</p>")))
+    parts.append(f"<a href='mailto:info@{slug(name)}.com'>Email us</a>")
+    for h in ("facebook.com", "instagram.com", "twitter.com"):
+        parts.append(f"<a href='https://www.{h}/{slug(name)}'>{h.split('.')[0]}</a>")
+    parts.append("<p>&copy; 2024. All rights reserved. Cannabis Control: 1-800-222-1222</p>")
+    parts.append("</footer></body></html>")
+    return "\n".join(parts)
+
+def ddg_page(r, rnd):
+    """DuckDuckGo result page: ten results, the official site somewhere among directories and socials."""
+    s, c = slug(r["name"]), slug(r["city"])
+    results = [u.format(slug=s, city=c) for u in rnd.sample(DIRECTORIES, 7)]
+    if r["website"]:
+        results.insert(rnd.randint(0, 5), r["website"] + rnd.choice(("", "?utm_source=ddg", "#menu")))
+    results.append(f"https://www.nj.gov/cannabis/dispensaries/find/?q={s}")
+    results += [f"https://news.example.com/2024/{s}-opens-in-{c}/", f"https://www.mapquest.com/search/{s}"][:10 - len(results)]
+    parts = ["<!DOCTYPE html><html><head><title>" + r["name"] + " at DuckDuckGo</title></head><body>",
+             "<div id='react-layout'><section data-testid='mainline'><ol class='react-results--main'>"]
+    for i, u in enumerate(results):
+        parts.append(f"<li data-layout='organic'><article id='r1-{i}' data-testid='result'>"
+                     f"<div><a href='{u}' rel='noopener' data-testid='result-extras-url-link'>{u}</a></div>"
+                     f"<h2><a href='{u}' rel='noopener' data-testid='result-title-a'><span>{r['name']} - result {i}</span></a></h2>"
+                     f"<div data-result='snippet'><span>{rnd.choice(FILLER)} {r['street']}, {r['city']}, NJ</span></div>"
+                     "</article></li>")
+    parts.append("</ol></section></div></body></html>")
+    return "\n".join(parts)
+
+def build(out_dir=FIXTURES, dataset=DATASET, seed=SEED):
+    rnd = random.Random(seed)
+    rows = load_rows(dataset)
+    os.makedirs(os.path.join(out_dir, "homepages"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "ddg"), exist_ok=True)
+
+    lines, links = atlist_dom(rows, rnd)
+    with open(os.path.join(out_dir, "atlist_dom.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": ATLIST, "lines": lines, "links": links}, f, indent=0)
+    with open(os.path.join(out_dir, "atlist_cards.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": ATLIST, "cards": cards(rows, rnd)}, f, indent=0)
+
+    by_site = {}
+    for r in rows:
+        by_site.setdefault(r["website"], []).append(r)
+    picks = rnd.sample([r for r in rows if r["website"]], HOMEPAGES)
+    for i, r in enumerate(picks):
+        siblings = [s for s in by_site[r["website"]] if s is not r]
+        with open(os.path.join(out_dir, "homepages", f"{i:02d}.html"), "w", encoding="utf-8") as f:
+            f.write(homepage(r, siblings, rnd))
+    for i, r in enumerate(rnd.sample(rows, DDG_PAGES)):
+        with open(os.path.join(out_dir, "ddg", f"{i:02d}.html"), "w", encoding="utf-8") as f:
+            f.write(ddg_page(r, rnd))
+    return out_dir
+
+if __name__ == "__main__":
+    out = build()
+    n = sum(len(fs) for _, _, fs in os.walk(out))
+    size = sum(os.path.getsize(os.path.join(d, x)) for d, _, fs in os.walk(out) for x in fs)
+    print(f"Wrote {n} fixtures ({size / 1024:.0f} KB) to {out}")
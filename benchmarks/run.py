@@ -0,0 +1,245 @@
+"""
+Microbenchmarks for the parsing and extraction hot paths.
+
+Each benchmark runs a real pipeline function over the checked-in fixtures in
+benchmarks/fixtures/ (build them with benchmarks/fixtures.py). Timing is
+timeit-style: the loop count is calibrated until one repeat takes about
+MIN_REPEAT_SECONDS, and the best and median of REPEATS repeats are kept.
+Every run is appended to benchmarks/history.jsonl. A benchmark is flagged
+when its best time is more than --threshold slower than the baseline. The
+baseline is benchmarks/baseline.json if present, otherwise the previous
+history entry from the same machine.
+
+    python benchmarks/run.py                     # all benchmarks
+    python benchmarks/run.py -k phone -k card    # names containing either
+    python benchmarks/run.py --save-baseline     # record this run as the baseline
+    python benchmarks/run.py --fail-on-regression
+"""
+import argparse, glob, json, os, platform, re, statistics, subprocess, sys, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+FIXTURES = os.path.join(HERE, "fixtures")
+HISTORY = os.path.join(HERE, "history.jsonl")
+BASELINE = os.path.join(HERE, "baseline.json")
+REPEATS = 5
+MIN_REPEAT_SECONDS = 0.2
+THRESHOLD = 0.15     # flag a benchmark whose best time is >15% slower than the baseline
+
+sys.path.insert(0, ROOT)   # the top-level scripts benchmarked below are not part of the package
+
+BENCHMARKS = {}   # name -> setup() returning (fn, items per call)
+
+def bench(name):
+    def deco(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return deco
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f) if name.endswith(".json") else f.read()
+
+def pages(kind):
+    paths = sorted(glob.glob(os.path.join(FIXTURES, kind, "*.html")))
+    if not paths:
+        raise SystemExit(f"No fixtures in {FIXTURES}/{kind}; run benchmarks/fixtures.py")
+    return [open(p, encoding="utf-8").read() for p in paths]
+
+def source_pattern(path, name):
+    """A module-level re.compile(r\"\"\"...\"\"\", re.VERBOSE) lifted from a script that cannot be imported."""
+    src = open(os.path.join(ROOT, path), encoding="utf-8").read()
+    m = re.search(name + r' = re\.compile\(r"""(.*?)""", re\.VERBOSE\)', src, re.S)
+    return re.compile(m.group(1), re.VERBOSE)
+
+def address_lines():
+    lines = fixture("atlist_dom.json")["lines"]
+    return [ln for ln in lines if "\n" not in ln and ", NJ" in ln]
+
+def ddg_results():
+    """The result-title hrefs of every DDG fixture page, as ddg_top_links reads them."""
+    href = re.compile(r"<a href='([^']+)'[^>]*data-testid='result-title-a'")
+    return [href.findall(html) for html in pages("ddg")]
+
+# ---------- benchmarks ----------
+
+@bench("atlist.extract_records_from_text_lines")
+def _():
+    from scrape_crc_iframe import extract_records_from_text_lines
+    dom = fixture("atlist_dom.json")
+    return (lambda: extract_records_from_text_lines(dom["lines"], dom["links"])), len(dom["lines"])
+
+@bench("atlist.parse_card")
+def _():
+    from njbuds.cards import parse_card
+    data = fixture("atlist_cards.json")
+    cards, src = data["cards"], data["source"]
+    return (lambda: [parse_card(c["lines"], c["hrefs"], src) for c in cards]), len(cards)
+
+@bench("regex.ADDR_RE")
+def _():
+    from scrape_crc_iframe import ADDR_RE
+    lines = address_lines()
+    return (lambda: [ADDR_RE.search(ln) for ln in lines]), len(lines)
+
+@bench("regex.address_re_3_states")
+def _():
+    from njbuds.utils import address_re
+    rx, lines = address_re(("NJ", "NY", "PA")), address_lines()
+    return (lambda: [rx.search(ln) for ln in lines]), len(lines)
+
+@bench("regex.ADDRESS_RE")
+def _():
+    rx, lines = source_pattern("scrape_csc_finder.py", "ADDRESS_RE"), address_lines()
+    return (lambda: [rx.match(ln) for ln in lines]), len(lines)
+
+@bench("regex.PHONE_RE")
+def _():
+    from njbuds.extractors import PHONE_RE, Page
+    texts = [Page("", html).text for html in pages("homepages")]
+    return (lambda: [PHONE_RE.findall(t) for t in texts]), len(texts)
+
+@bench("extract.phone")
+def _():
+    # html_phones() in enrich_from_websites is now extractors.phone; Page parsing included
+    from njbuds import extractors
+    htmls = pages("homepages")
+    return (lambda: [extractors.phone(extractors.Page("https://example.com/", h)) for h in htmls]), len(htmls)
+
+@bench("extract.all_extractors")
+def _():
+    from njbuds import extractors
+    htmls = pages("homepages")
+    return (lambda: [extractors.run(extractors.Page("https://example.com/", h)) for h in htmls]), len(htmls)
+
+@bench("enrich.extract_phones_and_links")
+def _():
+    from enrich_phones_from_sites import extract_phones_and_links
+    htmls = pages("homepages")
+    return (lambda: [extract_phones_and_links(h, "https://example.com/") for h in htmls]), len(htmls)
+
+@bench("search.canonical")
+def _():
+    from find_websites_via_search import canonical
+    urls = [u for res in ddg_results() for u in res]
+    return (lambda: [canonical(u) for u in urls]), len(urls)
+
+@bench("search.pick_best")
+def _():
+    from find_websites_via_search import canonical, pick_best
+    results = [[canonical(u) for u in res] for res in ddg_results()]
+    return (lambda: [pick_best(res) for res in results]), len(results)
+
+@bench("verify.score")
+def _():
+    # every homepage scored against one card row; pages parsed up front, so this is scoring only
+    from njbuds.cards import parse_card
+    from njbuds.extractors import Page
+    from njbuds.verify import score
+    data = fixture("atlist_cards.json")
+    row = next(r for r in (parse_card(c["lines"], c["hrefs"], data["source"]) for c in data["cards"]) if r)
+    row["phone"] = "(973) 555-0100"
+    pgs = [Page("https://example.com/", h) for h in pages("homepages")]
+    for p in pgs:
+        p.text
+    return (lambda: [score(row, p) for p in pgs]), len(pgs)
+
+# ---------- timing ----------
+
+def measure(fn, repeats=REPEATS, min_seconds=MIN_REPEAT_SECONDS):
+    """(best, median) seconds per call, timeit-style."""
+    fn()   # warm caches and lazy imports
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        secs = time.perf_counter() - t0
+        if secs >= min_seconds:
+            break
+        loops *= 2 if secs < min_seconds / 4 else max(2, int(min_seconds / max(secs, 1e-9)))
+    times = [secs / loops]
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - t0) / loops)
+    return min(times), statistics.median(times), loops
+
+def git_rev():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("+dirty" if dirty else "")
+    except OSError:
+        return ""
+
+def machine():
+    return f"{platform.node()}/{platform.machine()}/py{platform.python_version()}"
+
+def load_baseline(path=BASELINE, history=HISTORY):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f), os.path.basename(path)
+    if os.path.exists(history):
+        with open(history, encoding="utf-8") as f:
+            runs = [json.loads(l) for l in f if l.strip()]
+        runs = [r for r in runs if r.get("machine") == machine()]
+        if runs:
+            return runs[-1], f"history {runs[-1].get('rev') or runs[-1]['time']}"
+    return None, ""
+
+def fmt_time(s):
+    return f"{s * 1e6:9.1f} us" if s < 1e-3 else f"{s * 1e3:9.2f} ms"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time parsing and extraction hot paths on recorded fixtures")
+    ap.add_argument("-k", action="append", default=[], help="only benchmarks whose name contains this")
+    ap.add_argument("--list", action="store_true")
+    ap.add_argument("--repeats", type=int, default=REPEATS)
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--no-history", action="store_true")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if not args.k or any(k in n for k in args.k)]
+    if args.list:
+        print("\n".join(names))
+        return
+    baseline, base_name = load_baseline(args.baseline)
+    base = (baseline or {}).get("results", {})
+
+    results, regressions = {}, []
+    print(f"{'benchmark':40s} {'best':>12s} {'median':>12s} {'items/s':>11s}  vs baseline")
+    for name in names:
+        fn, items = BENCHMARKS[name]()
+        best, med, loops = measure(fn, args.repeats)
+        results[name] = {"best": best, "median": med, "loops": loops, "items": items}
+        note = ""
+        if name in base:
+            ratio = best / base[name]["best"]
+            note = f"{ratio:5.2f}x"
+            if ratio > 1 + args.threshold:
+                note += "  REGRESSION"
+                regressions.append(name)
+        print(f"{name:40s} {fmt_time(best):>12s} {fmt_time(med):>12s} {items / best:11,.0f}  {note}")
+
+    run = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "rev": git_rev(), "machine": machine(),
+           "repeats": args.repeats, "results": results}
+    if not args.no_history:
+        with open(HISTORY, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=1)
+        print(f"Saved baseline {args.baseline}")
+    if base_name:
+        print(f"Baseline: {base_name}; {len(regressions)} regression(s) over {args.threshold:.0%}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#This script tags each dispensary with its menu platform (Dutchie, Jane, Weedmaps, ...)
+#using the pages the enrichment crawl already cached -- it never fetches anything itself.
+#To pin a platform by hand, set platform_evidence to "manual" on that row.
+
+import os, sys, time
+import concurrent.futures as cf
+import pandas as pd
+from urllib.parse import urlparse
+
+from njbuds import metrics, pagecache
+from njbuds.platforms import SignatureMatcher
+
+INPUT  = "nj_dispensaries_enriched.csv"
+OUTPUT = "nj_dispensaries_with_platforms.csv"
+WORKERS = os.cpu_count() or 4
+MANUAL = "manual"     # platform_evidence marker for a platform set by hand; never overwritten
+MIN_PARALLEL = 32     # below this many sites a process pool costs more than it saves
+
+def site_host(u):
+    u = str(u or "").strip()
+    if not u or u.lower() in ("nan","none"):
+        return ""
+    if not u.startswith(("http://","https://")):
+        u = "https://" + u
+    h = urlparse(u).netloc.lower()
+    return h[4:] if h.startswith("www.") else h
+
+def apply_platforms(df, found, evid):
+    """Overwrite platform wherever the matcher has evidence, except rows marked MANUAL.
+    Rows it found nothing for keep what they had (e.g. the enrichment extractor's guess)."""
+    manual = df["platform_evidence"].str.strip().str.lower() == MANUAL
+    take = ~manual & (found != "")
+    df.loc[take, "platform"] = found[take]
+    df.loc[take, "platform_evidence"] = evid[take]
+    return df
+
+_matcher = None
+
+def classify_host(host):
+    """(platform, evidence, n_pages) for one site from its cached pages."""
+    global _matcher
+    if _matcher is None:
+        _matcher = SignatureMatcher()   # built once per worker process
+    pages = [body.decode(h.get("encoding") or "utf-8", errors="replace")
+             for h, body in pagecache.pages_for_host(host)]
+    platform, _, evidence = _matcher.classify(pages, url=host)
+    return platform, ";".join(evidence), len(pages)
+
+def main():
+    if not os.path.exists(INPUT):
+        print(f"ERROR: {INPUT} not found"); sys.exit(1)
+    df = pd.read_csv(INPUT, dtype=str, keep_default_na=False)
+    for col in ("platform","platform_evidence"):
+        if col not in df.columns:
+            df[col] = ""
+
+    started = time.perf_counter()
+    by_host = {}          # chain rows share a host: classify each host once
+    no_pages = scanned = 0
+
+    hosts = df["website"].map(site_host)
+    todo = [h for h in hosts.unique() if h]
+    with metrics.stage("platforms", rows=len(df)):
+        if WORKERS > 1 and len(todo) > MIN_PARALLEL:
+            with cf.ProcessPoolExecutor(max_workers=WORKERS) as ex:
+                results = list(ex.map(classify_host, todo, chunksize=8))
+        else:
+            results = [classify_host(h) for h in todo]
+    for host, (platform, evidence, n_pages) in zip(todo, results):
+        by_host[host] = (platform, evidence)
+        scanned += n_pages
+        if not n_pages:
+            no_pages += 1
+
+    found = hosts.map(lambda h: by_host.get(h, ("", ""))[0])
+    evid  = hosts.map(lambda h: by_host.get(h, ("", ""))[1])
+    apply_platforms(df, found, evid)
+
+    elapsed = time.perf_counter() - started
+    df.to_csv(OUTPUT, index=False, encoding="utf-8")
+    print(f"Classified {len(by_host)} sites ({scanned} cached pages) in {elapsed:.3f}s")
+    print(f"Sites with no cached pages: {no_pages} (run enrich_from_websites.py first)")
+    print(df["platform"].replace("", "(unknown)").value_counts().to_string())
+    print(f"Wrote {OUTPUT}")
+    metrics.write("platforms")
+
+if __name__ == "__main__":
+    main()
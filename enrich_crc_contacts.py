@@ -1,10 +1,8 @@
 import re, time, sys, os
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+
+from njbuds import metrics
+from njbuds.merge import make_key, fill_missing
 
 # Input & output
 INPUT_CSV  = "nj_dispensaries_medicinal_rec_edit.csv"            # your current file (269 rows)
@@ -154,8 +152,9 @@ def scroll_list_until_stable(drv, container, max_rounds=40, settle_rounds=6, pau
 
 def extract_card_contacts(drv):
     """
-    Returns list of dicts keyed by (name, street, city) with website/phone if present.
+    Returns dict keyed by make_key(name, street, city) with website/phone if present.
     """
+    from selenium.webdriver.common.by import By
     contacts = {}
     # find each card via "Get Directions"
     direction_links = drv.find_elements(
@@ -216,7 +215,7 @@ def extract_card_contacts(drv):
                 m = PHONE_RE.search(joined)
                 if m: phone = m.group(0)
 
-            key = (norm(name), norm(street), norm(city))
+            key = make_key(name, street, city)
             contacts[key] = {
                 "name": name, "street": street, "city": city,
                 "website": website, "phone": phone
@@ -227,9 +226,12 @@ def extract_card_contacts(drv):
     return contacts
 
 def main():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
     base = load_base()
-    keycols = ["name","street","city"]
-    base["_key"] = base.apply(lambda r: (norm(r["name"]), norm(r["street"]), norm(r["city"])), axis=1)
 
     # build selenium
     opts = Options()
@@ -239,63 +241,59 @@ def main():
     opts.add_argument("--no-sandbox")
     opts.add_argument("--window-size=1440,1000")
 
-    drv = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-
-    # Find Atlist src from CRC page
-    drv.get(CRC_URL)
-    time.sleep(4)
-    atlist_src = None
-    for f in drv.find_elements(By.TAG_NAME, "iframe"):
-        s = f.get_attribute("src") or ""
-        if "my.atlist.com/map" in s:
-            atlist_src = s
-            break
-    if not atlist_src:
-        atlist_src = ATLIST_FALLBACK
-    print("Atlist src:", atlist_src)
-
-    # Open Atlist, turn BOTH categories ON (so we enrich all rows)
-    drv.get(atlist_src)
-    time.sleep(6)
-    js_zoom_out(drv, times=6)
-
-    nodes = js_find_buttons_by_text(drv, ON_LABELS) or []
-    # try to set them ON a couple times in case of re-rendering
-    for _ in range(2):
-        for n in nodes:
-            js_set_button_state(drv, n, want_on=True)
-        time.sleep(1.0)
-
-    # Scroll list pane until fully loaded
-    container = js_get_list_container(drv)
-    if container:
-        scroll_list_until_stable(drv, container, max_rounds=45, settle_rounds=6, pause=0.9)
-    else:
-        # fallback: whole window
-        for _ in range(14):
-            drv.execute_script("window.scrollTo(0, document.body.scrollHeight);"); time.sleep(1.0)
-            drv.execute_script("window.scrollTo(0, 0);"); time.sleep(0.7)
-
-    # Extract contacts from all cards
-    contacts = extract_card_contacts(drv)
-    drv.quit()
-
-    # Merge back into base where website/phone missing
-    updated_web = updated_phone = 0
-    for i, r in base.iterrows():
-        key = r["_key"]
-        if key in contacts:
-            c = contacts[key]
-            if (pd.isna(r["website"]) or not str(r["website"]).strip()) and c.get("website"):
-                base.at[i, "website"] = c["website"]; updated_web += 1
-            if (pd.isna(r["phone"]) or not str(r["phone"]).strip()) and c.get("phone"):
-                base.at[i, "phone"] = c["phone"]; updated_phone += 1
-
-    base.drop(columns=["_key"], inplace=True)
-    base.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-    print(f"Wrote {OUTPUT_CSV}")
-    print(f"Filled website: {updated_web} rows")
-    print(f"Filled phone:   {updated_phone} rows")
+    with metrics.stage("enrich_crc_contacts") as st:
+        drv = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+
+        # Find Atlist src from CRC page
+        drv.get(CRC_URL)
+        time.sleep(4)
+        atlist_src = None
+        for f in drv.find_elements(By.TAG_NAME, "iframe"):
+            s = f.get_attribute("src") or ""
+            if "my.atlist.com/map" in s:
+                atlist_src = s
+                break
+        if not atlist_src:
+            atlist_src = ATLIST_FALLBACK
+        print("Atlist src:", atlist_src)
+
+        # Open Atlist, turn BOTH categories ON (so we enrich all rows)
+        drv.get(atlist_src)
+        time.sleep(6)
+        js_zoom_out(drv, times=6)
+
+        nodes = js_find_buttons_by_text(drv, ON_LABELS) or []
+        # try to set them ON a couple times in case of re-rendering
+        for _ in range(2):
+            for n in nodes:
+                js_set_button_state(drv, n, want_on=True)
+            time.sleep(1.0)
+
+        # Scroll list pane until fully loaded
+        container = js_get_list_container(drv)
+        if container:
+            scroll_list_until_stable(drv, container, max_rounds=45, settle_rounds=6, pause=0.9)
+        else:
+            # fallback: whole window
+            for _ in range(14):
+                drv.execute_script("window.scrollTo(0, document.body.scrollHeight);"); time.sleep(1.0)
+                drv.execute_script("window.scrollTo(0, 0);"); time.sleep(0.7)
+
+        # Extract contacts from all cards
+        contacts = extract_card_contacts(drv)
+        st.rows = len(base)
+        drv.quit()
+
+        # Merge back into base where website/phone missing (hash join on the normalized key)
+        base, filled = fill_missing(base, pd.DataFrame(list(contacts.values())), ["website","phone"])
+        updated_web, updated_phone = filled["website"], filled["phone"]
+
+        base.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+        print(f"Wrote {OUTPUT_CSV}")
+        print(f"Filled website: {updated_web} rows")
+        print(f"Filled phone:   {updated_phone} rows")
+    print(metrics.summary())
+    metrics.write("enrich_crc_contacts")
 
 if __name__ == "__main__":
     main()
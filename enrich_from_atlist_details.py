@@ -1,12 +1,9 @@
 import re, time, os, sys
 import pandas as pd
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, JavascriptException
+
+from njbuds import metrics
+from njbuds.merge import make_key, key_series, fill_missing
 
 INPUT_CSV  = "nj_dispensaries.csv"              # your current file (269 rows from rec+med scrape)
 OUTPUT_CSV = "nj_dispensaries_enriched.csv"     # will be written
@@ -148,6 +145,8 @@ def extract_links_and_phone_from_panel(drv):
     - collect external (non-social) website link
     - also parse visible text for phone numbers
     """
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import StaleElementReferenceException
     website = ""
     phones = set()
 
@@ -208,6 +207,7 @@ def click_card_open_panel(drv, card_el):
         return False
 
 def close_panel_if_any(drv):
+    from selenium.webdriver.common.by import By
     # try close buttons / ESC-like elements
     try:
         close_buttons = drv.find_elements(By.XPATH, "//button[contains(.,'Close') or contains(.,'×') or contains(.,'close')]")
@@ -224,10 +224,15 @@ def close_panel_if_any(drv):
         pass
 
 def main():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import NoSuchElementException
     # Load base
     df = load_csv(INPUT_CSV)
-    df["_key"] = df.apply(lambda r: (norm(r["name"]), norm(r["street"]), norm(r["city"])), axis=1)
-    base_index = {k:i for i,k in enumerate(df["_key"])}
+    base_keys = set(key_series(df))
 
     # Selenium
     opts = Options()
@@ -235,111 +240,109 @@ def main():
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--window-size=1440,1000")
-    drv = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-
-    # Discover Atlist src
-    drv.get(CRC_URL); time.sleep(4)
-    atlist_src = None
-    for f in drv.find_elements(By.TAG_NAME, "iframe"):
-        s = f.get_attribute("src") or ""
-        if "my.atlist.com/map" in s:
-            atlist_src = s; break
-    if not atlist_src: atlist_src = ATLIST_FALLBACK
-    print("Atlist src:", atlist_src)
-
-    # Load Atlist and show everything (both categories ON)
-    drv.get(atlist_src); time.sleep(6)
-    js_zoom_out(drv, times=6)
-    nodes = js_find_buttons_by_text(drv, ON_LABELS) or []
-    for _ in range(2):
-        for n in nodes:
-            js_set_button_state(drv, n, True)
-        time.sleep(1.0)
-
-    # Find list container and fully load it
-    container = js_get_list_container(drv)
-    if container:
-        scroll_list_until_stable(drv, container, rounds=45, settle=6, pause=0.9)
-    else:
-        # fallback - entire window
-        for _ in range(14):
-            drv.execute_script("window.scrollTo(0, document.body.scrollHeight);"); time.sleep(1.0)
-            drv.execute_script("window.scrollTo(0, 0);"); time.sleep(0.7)
-
-    # Enumerate cards by their "Get Directions" control
-    direction_links = drv.find_elements(By.XPATH, "//a[contains(., 'Get Directions')] | //button[contains(., 'Get Directions')]")
-    print("Cards detected:", len(direction_links))
-
-    scraped = {}
-    for idx, link in enumerate(direction_links, start=1):
-        try:
-            card = link.find_element(By.XPATH, "ancestor::*[self::div or self::li or self::article or self::section][1]")
-        except NoSuchElementException:
-            continue
-
-        # Roughly parse name/street/city from the card to build a key
-        text_lines = []
-        try:
-            text_lines = [ln.strip() for ln in card.text.splitlines() if ln.strip()]
-        except Exception:
-            pass
-
-        name = ""
-        for ln in text_lines:
-            low = ln.lower()
-            if low in ("get directions","directions","website","view website"): continue
-            name = ln; break
-
-        addr_line = ""
-        for ln in text_lines:
-            if "NJ" in ln and (("," in ln and re.search(r"\b\d{5}\b", ln)) or ", NJ" in ln):
-                addr_line = ln; break
-
-        street = city = ""
-        if addr_line:
-            parts = [p.strip() for p in addr_line.split(",")]
-            if len(parts) >= 2:
-                street = parts[0]
-                city = parts[-2] if len(parts) >= 2 else ""
-
-        key = (norm(name), norm(street), norm(city))
-        if not key[0] and not key[1]:
-            # skip if we can't identify
-            continue
+    with metrics.stage("enrich_atlist_details") as st:
+        drv = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+
+        # Discover Atlist src
+        drv.get(CRC_URL); time.sleep(4)
+        atlist_src = None
+        for f in drv.find_elements(By.TAG_NAME, "iframe"):
+            s = f.get_attribute("src") or ""
+            if "my.atlist.com/map" in s:
+                atlist_src = s; break
+        if not atlist_src: atlist_src = ATLIST_FALLBACK
+        print("Atlist src:", atlist_src)
+
+        # Load Atlist and show everything (both categories ON)
+        drv.get(atlist_src); time.sleep(6)
+        js_zoom_out(drv, times=6)
+        nodes = js_find_buttons_by_text(drv, ON_LABELS) or []
+        for _ in range(2):
+            for n in nodes:
+                js_set_button_state(drv, n, True)
+            time.sleep(1.0)
+
+        # Find list container and fully load it
+        container = js_get_list_container(drv)
+        if container:
+            scroll_list_until_stable(drv, container, rounds=45, settle=6, pause=0.9)
+        else:
+            # fallback - entire window
+            for _ in range(14):
+                drv.execute_script("window.scrollTo(0, document.body.scrollHeight);"); time.sleep(1.0)
+                drv.execute_script("window.scrollTo(0, 0);"); time.sleep(0.7)
+
+        # Enumerate cards by their "Get Directions" control
+        direction_links = drv.find_elements(By.XPATH, "//a[contains(., 'Get Directions')] | //button[contains(., 'Get Directions')]")
+        print("Cards detected:", len(direction_links))
+        st.rows = len(direction_links)
+
+        scraped = {}
+        for idx, link in enumerate(direction_links, start=1):
+            try:
+                card = link.find_element(By.XPATH, "ancestor::*[self::div or self::li or self::article or self::section][1]")
+            except NoSuchElementException:
+                continue
 
-        # Click card to open details panel
-        ok = click_card_open_panel(drv, card)
-        if not ok:
-            continue
+            # Roughly parse name/street/city from the card to build a key
+            text_lines = []
+            try:
+                text_lines = [ln.strip() for ln in card.text.splitlines() if ln.strip()]
+            except Exception:
+                pass
 
-        # Extract website/phone from panel
-        website, phone = extract_links_and_phone_from_panel(drv)
-        close_panel_if_any(drv)
-
-        if website or phone:
-            scraped[key] = {"website": website, "phone": phone}
-
-        # small breather to be gentle
-        time.sleep(0.15)
-
-    drv.quit()
-
-    # Merge back into df
-    updated_web = 0; updated_phone = 0
-    for i, r in df.iterrows():
-        key = r["_key"]
-        if key in scraped:
-            add = scraped[key]
-            if (not str(r.get("website") or "").strip()) and add.get("website"):
-                df.at[i, "website"] = add["website"]; updated_web += 1
-            if (not str(r.get("phone") or "").strip()) and add.get("phone"):
-                df.at[i, "phone"] = add["phone"]; updated_phone += 1
-
-    df.drop(columns=["_key"], inplace=True)
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-    print(f"Wrote {OUTPUT_CSV}")
-    print(f"Filled website on {updated_web} rows")
-    print(f"Filled phone   on {updated_phone} rows")
+            name = ""
+            for ln in text_lines:
+                low = ln.lower()
+                if low in ("get directions","directions","website","view website"): continue
+                name = ln; break
+
+            addr_line = ""
+            for ln in text_lines:
+                if "NJ" in ln and (("," in ln and re.search(r"\b\d{5}\b", ln)) or ", NJ" in ln):
+                    addr_line = ln; break
+
+            street = city = ""
+            if addr_line:
+                parts = [p.strip() for p in addr_line.split(",")]
+                if len(parts) >= 2:
+                    street = parts[0]
+                    city = parts[-2] if len(parts) >= 2 else ""
+
+            if not norm(name) and not norm(street):
+                # skip if we can't identify
+                continue
+            key = make_key(name, street, city)
+            if key not in base_keys:
+                continue  # not a row we're enriching
+
+            # Click card to open details panel
+            ok = click_card_open_panel(drv, card)
+            if not ok:
+                continue
+
+            # Extract website/phone from panel
+            website, phone = extract_links_and_phone_from_panel(drv)
+            close_panel_if_any(drv)
+
+            if website or phone:
+                scraped[key] = {"name": name, "street": street, "city": city, "website": website, "phone": phone}
+
+            # small breather to be gentle
+            time.sleep(0.15)
+
+        drv.quit()
+
+        # Merge back into df (hash join on the normalized key; only empty cells are filled)
+        df, filled = fill_missing(df, pd.DataFrame(list(scraped.values())), ["website","phone"])
+        updated_web, updated_phone = filled["website"], filled["phone"]
+
+        df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+        print(f"Wrote {OUTPUT_CSV}")
+        print(f"Filled website on {updated_web} rows")
+        print(f"Filled phone   on {updated_phone} rows")
+    print(metrics.summary())
+    metrics.write("enrich_atlist_details")
 
 if __name__ == "__main__":
     main()
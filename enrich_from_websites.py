@@ -1,8 +1,9 @@
-import csv, re, time, sys, os
-import concurrent.futures as cf
-from urllib.parse import urlparse, urljoin
+import csv, hashlib, json, re, time, sys, os
+from urllib.parse import urlparse
 import requests
-from bs4 import BeautifulSoup
+
+from njbuds import domains, extractors, frontier, metrics, pagecache, parsepool, profiling, taskqueue
+from njbuds.extractors import SOCIAL_HOSTS
 
 INPUT  = "nj_dispensaries.csv"                # your current (clean) file
 OUTPUT = "nj_dispensaries_enriched.csv"       # new file will be written
@@ -13,6 +14,19 @@ TIMEOUT = 12
 MAX_WORKERS = 10
 PAUSE_BETWEEN_DOMAINS = 0.2  # politeness (seconds)
 
+# Work goes through a durable SQLite queue: an interrupted run resumes where it
+# stopped. NJBUDS_PROCS worker processes each keep MAX_WORKERS fetches in flight;
+# use NJBUDS_QUEUE_JOURNAL=delete when machines share the queue file over NFS/SMB.
+QUEUE_DB = os.getenv("NJBUDS_QUEUE", taskqueue.QUEUE_PATH)
+QUEUE = "enrich_sites"
+PROCS = int(os.getenv("NJBUDS_PROCS", 1))
+JOURNAL = os.getenv("NJBUDS_QUEUE_JOURNAL", "wal")
+# finished domains are re-crawled once their result is older than this (seconds);
+# --refresh re-crawls every domain now
+RESULT_TTL = float(os.getenv("NJBUDS_RESULT_TTL", pagecache.MAX_AGE))
+# fetch threads hand raw bytes to this many parser processes (per worker process)
+PARSE_PROCS = int(os.getenv("NJBUDS_PARSE_PROCS", 0)) or max(1, (os.cpu_count() or 1) // PROCS)
+
 # Try these contact-like paths in addition to the homepage
 CONTACT_PATHS = [
     "/contact", "/contact-us", "/contactus", "/locations", "/location", "/about", "/about-us"
@@ -25,15 +39,8 @@ GUESS_TLDS = [".com", ".org", ".net"]
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) NJBudsSiteBot/1.0"
 
-PHONE_RE = re.compile(r"""
-    (?:
-      (?:\+?1[\s\-\.\)]*)?              # optional country code
-      (?:\(?\d{3}\)?[\s\-\.\)]*)        # area code
-      \d{3}[\s\-\.\)]*\d{4}             # local number
-    )
-""", re.VERBOSE)
-
-SOCIAL_HOSTS = ("facebook.com","instagram.com","twitter.com","x.com","youtube.com","tiktok.com","linktr.ee")
+# filled from the same fetched pages by njbuds.extractors
+EXTRA_FIELDS = ("lat","lon","hours","email","socials","platform")
 
 def load_rows(path):
     if not os.path.exists(path):
@@ -45,14 +52,6 @@ def load_rows(path):
             row.setdefault(k, "")
     return r
 
-def norm_phone(s):
-    digits = re.sub(r"\D", "", s or "")
-    if len(digits) == 11 and digits.startswith("1"):
-        digits = digits[1:]
-    if len(digits) == 10:
-        return f"({digits[0:3]}) {digits[3:6]}-{digits[6:10]}"
-    return s.strip() if s else ""
-
 def canonical_url(u):
     if not u: return ""
     u = u.strip()
@@ -77,80 +76,49 @@ def is_social(u):
         return False
 
 def request_url(u, session):
-    try:
-        return session.get(u, headers={"User-Agent": UA}, timeout=TIMEOUT, allow_redirects=True)
-    except Exception:
-        return None
-
-def html_phones(soup):
-    # 1) tel: links
-    phones = set()
-    for a in soup.select("a[href^='tel:']"):
-        href = a.get("href","")
-        num = href.split("tel:")[-1]
-        if num: phones.add(norm_phone(num))
-
-    # 2) visible text patterns
-    txt = soup.get_text(separator=" ", strip=True)
-    for m in PHONE_RE.finditer(txt):
-        phones.add(norm_phone(m.group(0)))
-    # prune obviously short/bad
-    phones = {p for p in phones if re.search(r"\(\d{3}\)\s*\d{3}-\d{4}", p)}
-    return list(phones)
-
-def crawl_for_contact(website):
+    # read-through page cache: later stages (platform detection) reuse these pages
+    return pagecache.fetch(session, u, headers={"User-Agent": UA}, timeout=TIMEOUT, allow_redirects=True)
+
+def parse(r):
+    return parsepool.shared(PARSE_PROCS).parse(r)
+
+def crawl_for_contact(website, row=None):
     """
-    Returns (final_website, best_phone)
+    Returns (final_website, fields)
     final_website: site after redirects (homepage)
-    best_phone: formatted phone found on homepage/contact-like pages
+    fields: every registered extractor's value merged over the pages fetched
+            (phone, email, socials, platform, hours, jsonld).
+    Pages come from a best-first crawl (njbuds.frontier) that follows contact /
+    location / city links and stops at the first confident phone for the row.
     """
     if not website:
-        return ("","")
+        return ("", {})
+    row = row or {}
 
     start = canonical_url(website)
     base = base_origin(start)
     if not base:
-        return (website, "")
+        return (website, {})
 
     with requests.Session() as s:
         s.headers.update({"User-Agent": UA})
+        fetch = lambda u: request_url(u, s)
+        kw = dict(city=row.get("city", ""), street=row.get("street", ""), guess_paths=CONTACT_PATHS, parse=parse)
 
-        # fetch homepage
-        r = request_url(base, s)
-        if not r or (r.status_code >= 400):
-            # try full start if base failed
-            r = request_url(start, s)
-        if not r or (r.status_code >= 400):
-            return (website, "")
+        # crawl from the homepage; the full start URL if the homepage fails
+        res = frontier.crawl(base, fetch, **kw)
+        if not res.pages and start != base:
+            res = frontier.crawl(start, fetch, **kw)
+        if not res.pages:
+            return (website, {})
 
-        final_home = r.url  # after redirects
-        best_phone = ""
-        try:
-            soup = BeautifulSoup(r.text, "lxml")
-            phones = html_phones(soup)
-            if phones:
-                best_phone = phones[0]
-        except Exception:
-            pass
-
-        # if no phone yet, try contact-like pages
-        if not best_phone:
-            for path in CONTACT_PATHS:
-                url = urljoin(base_origin(final_home), path)
-                r2 = request_url(url, s)
-                if not r2 or (r2.status_code >= 400):
-                    continue
-                try:
-                    soup2 = BeautifulSoup(r2.text, "lxml")
-                    phones2 = html_phones(soup2)
-                    if phones2:
-                        best_phone = phones2[0]
-                        break
-                except Exception:
-                    continue
+        # the page the phone came from is the best source for address/hours too
+        pages = sorted(res.pages, key=lambda p: p.url != res.url)
+        fields = extractors.merge([extractors.run(p) for p in pages])
+        fields["phone"] = res.phone
 
         time.sleep(PAUSE_BETWEEN_DOMAINS)
-        return (final_home, best_phone)
+        return (res.pages[0].url, fields)
 
 def guess_website(name):
     # extremely conservative guesser (disabled by default)
@@ -174,19 +142,33 @@ def worker(row):
     phone = (row.get("phone") or "").strip()
 
     if not website and not ENABLE_GUESSING:
-        return (row, False, False)  # nothing to do
+        return (row, False, False, "")  # nothing to do
 
     if not website and ENABLE_GUESSING:
         website = guess_website(name)
 
     if not website:
-        return (row, False, False)
+        return (row, False, False, "")
 
-    final_site, found_phone = crawl_for_contact(website)
+    final_site, fields = crawl_for_contact(website, row)
+    return apply_fields(row, website, final_site, fields) + ("site",)
+
+def apply_fields(row, website, final_site, fields):
+    """Write crawl results into row; returns (row, changed_site, changed_phone)."""
+    phone = (row.get("phone") or "").strip()
+    found_phone = fields.get("phone", "")
 
     changed_site = False
     changed_phone = False
 
+    # page data only fills blanks, never overrides the registry address
+    extra = dict(fields.get("jsonld") or {})
+    extra.update({k: fields[k] for k in ("hours","email","platform") if fields.get(k)})
+    extra["socials"] = ";".join(fields.get("socials") or [])
+    for k in ("street","city","zip") + EXTRA_FIELDS:
+        if extra.get(k) and not (row.get(k) or "").strip():
+            row[k] = extra[k]
+
     if final_site and final_site.strip() and final_site.strip() != website.strip():
         row["website"] = final_site
         changed_site = True
@@ -197,30 +179,96 @@ def worker(row):
 
     return (row, changed_site, changed_phone)
 
+def chain_worker(rows):
+    """
+    Rows sharing one site domain (multi-location chains): fetch the domain's
+    pages once, then match each row to its own store page / phone. Rows keep
+    their own (often store-specific) website URL.
+    """
+    with requests.Session() as s:
+        s.headers.update({"User-Agent": UA})
+        fetch = lambda u: request_url(u, s)
+        home = base_origin(canonical_url(rows[0]["website"]))
+        pages = domains.fetch_domain_pages(home, rows, fetch, parse)
+        # store-specific URLs already on the rows are the best pages of all
+        for r in rows:
+            u = canonical_url(r["website"])
+            if u.rstrip("/") != home and not any(p.url.rstrip("/") == u.rstrip("/") for p in pages):
+                resp = fetch(u)
+                if resp is not None and resp.status_code < 400:
+                    pages.append(parse(resp))
+        time.sleep(PAUSE_BETWEEN_DOMAINS)
+
+    # brand-wide fields come from the homepage
+    shared = extractors.run(pages[0], ["socials", "platform", "email"]) if pages else {}
+    out = []
+    for row in rows:
+        phone, fields, how = domains.match_row(row, pages)
+        fields = extractors.merge([dict(fields, phone=phone), shared])
+        out.append(apply_fields(row, row["website"], row["website"], fields) + (how or "unmatched",))
+    return out
+
+def domain_worker(rows):
+    if len(rows) == 1:
+        return [worker(rows[0])]
+    return chain_worker(rows)
+
+def task_key(group):
+    """Domain (or the row itself) plus a hash of the rows: edited input rows become a new task."""
+    r = group[0]
+    head = domains.domain_of(r.get("website")) or f"{r['name']}|{r['street']}|{r['city']}"
+    digest = hashlib.sha1(json.dumps(group, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{head}#{digest}"
+
 def main():
     rows = load_rows(INPUT)
 
     updated_site = 0
     updated_phone = 0
 
-    with cf.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-        futures = [ex.submit(worker, r.copy()) for r in rows]
+    # one job per site domain, so a chain's pages are fetched once for all its rows
+    groups = list(domains.group_by_domain([r.copy() for r in rows]).values())
+    groups += [[r.copy()] for r in rows if not domains.domain_of(r.get("website"))]
+    matched = {}
+
+    tasks = {task_key(g): g for g in groups}
+    q = taskqueue.TaskQueue(QUEUE_DB, JOURNAL)
+    added = q.put(QUEUE, tasks.items())
+    q.retry_failed(QUEUE)
+    expired = q.expire(QUEUE, 0 if "--refresh" in sys.argv[1:] else RESULT_TTL)
+    if added < len(tasks):
+        print(f"Resuming: {len(tasks) - added} of {len(tasks)} domain tasks already in {QUEUE_DB}, "
+              f"{expired} of them stale and re-queued (--refresh to re-crawl every domain)")
+
+    with metrics.stage("enrich_sites") as st:
+        taskqueue.run_workers(QUEUE_DB, QUEUE, domain_worker, PROCS, MAX_WORKERS, JOURNAL)
+        left = q.outstanding(QUEUE)
+        if left:
+            # a worker died mid-run: writing now would drop the unfinished rows
+            q.close()
+            sys.exit(f"{left} domain tasks unfinished; {OUTPUT} not written. Rerun to resume.")
         new_rows = []
-        for fut in cf.as_completed(futures):
-            row, cs, cp = fut.result()
-            new_rows.append(row)
-            if cs: updated_site += 1
-            if cp: updated_phone += 1
+        for _, _, result in q.results(QUEUE, tasks):
+            for row, cs, cp, how in result:
+                new_rows.append(row)
+                if cs: updated_site += 1
+                if cp: updated_phone += 1
+                if how: matched[how] = matched.get(how, 0) + 1
+        st.rows = len(new_rows)
+    failed_keys = {k for k, _, _ in q.failures(QUEUE)}
+    failed = [g for k, g in tasks.items() if k in failed_keys]
+    q.close()
+    new_rows += [r for g in failed for r in g]   # kept as they were; rerun to retry them
 
     # Preserve original order as much as possible
-    # (as_completed scrambles order; re-key by (name, street, city))
+    # (workers finish out of order; re-key by (name, street, city))
     key = lambda r: (r["name"].lower(), (r["street"] or "").lower(), (r["city"] or "").lower())
     index = { key(r): i for i, r in enumerate(rows) }
     new_rows.sort(key=lambda r: index.get(key(r), 10**9))
 
     # Write output
-    fieldnames = ["name","street","city","state","zip","website","phone","source"]
-    with open(OUTPUT, "w", newline="", encoding="utf-8") as f:
+    fieldnames = ["name","street","city","state","zip","website","phone","source"] + list(EXTRA_FIELDS)
+    with profiling.span("write"), open(OUTPUT, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for r in new_rows:
@@ -229,11 +277,18 @@ def main():
     with open(LOG, "w", encoding="utf-8") as f:
         f.write(f"Updated website on {updated_site} rows\n")
         f.write(f"Filled phone on   {updated_phone} rows\n")
+        f.write(f"Crawled {len(groups)} domains for {len(rows)} rows; phone source: {matched}\n")
+        if failed:
+            f.write(f"Failed {len(failed)} domain tasks (python -m njbuds.taskqueue {QUEUE_DB} --failures {QUEUE})\n")
+        f.write(metrics.summary() + "\n")
+    report = metrics.write("enrich_sites")
 
     print(f"Wrote {OUTPUT}")
     print(f"Updated website on {updated_site} rows")
     print(f"Filled phone on   {updated_phone} rows")
-    print(f"See {LOG} for a tiny summary.")
+    print(f"Crawled {len(groups)} domains for {len(rows)} rows; phone source: {matched}")
+    print(metrics.summary())
+    print(f"See {LOG} and {report} for the run report.")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,9 @@
-import csv, re, time, os, sys, random
-from urllib.parse import urlparse, urljoin
+import csv, time, os, sys, random
+from urllib.parse import urlparse
 import requests
-from bs4 import BeautifulSoup
+
+from njbuds import extractors, frontier, metrics, pagecache
+from njbuds.extractors import Page
 
 INPUT  = "nj_dispensaries_with_websites.csv"   # your file with websites
 OUTPUT = "nj_dispensaries_with_phones.csv"     # new file with phone numbers filled
@@ -28,14 +30,6 @@ BAN_HOSTS = (
 # directories we may need to parse (or jump from) if no brand site exists
 DIR_FALLBACK = ("weedmaps.com","leafly.com","iheartjane.com","dutchie.com")
 
-PHONE_RE = re.compile(r"""
-    (?:
-      \+?1[\s\-\.\)]*?            # optional +1
-    )?
-    (?:\(?\d{3}\)?[\s\-\.\)]*?)   # area code
-    \d{3}[\s\-\.\)]*?\d{4}        # local
-""", re.VERBOSE)
-
 def norm(s): return (s or "").strip()
 def is_http(u): return bool(u) and (u.startswith("http://") or u.startswith("https://"))
 
@@ -81,81 +75,42 @@ def write_rows(path, rows):
 
 def get(url, session=None):
     s = session or requests.Session()
-    try:
-        r = s.get(url, headers={"User-Agent": UA}, timeout=TIMEOUT, allow_redirects=True)
-        if r.status_code >= 400:
-            return None
-        return r
-    except Exception:
+    # read-through page cache shared with the other site stages
+    r = pagecache.fetch(s, url, headers={"User-Agent": UA}, timeout=TIMEOUT, allow_redirects=True)
+    if r is None or r.status_code >= 400:
         return None
+    return r
 
-def extract_phones_from_html(html_text):
-    phones = set()
-    for m in PHONE_RE.finditer(html_text or ""):
-        digits = re.sub(r"\D","", m.group(0))
-        if len(digits) == 11 and digits.startswith("1"):
-            digits = digits[1:]
-        if len(digits) == 10:
-            phones.add(f"({digits[:3]}) {digits[3:6]}-{digits[6:]}")
-    return list(phones)
-
-def extract_phones_and_links(html):
-    soup = BeautifulSoup(html, "lxml")
-    # tel: links
-    phones = set()
-    for a in soup.select("a[href^='tel:']"):
-        num = a.get("href","").split("tel:")[-1]
-        num = re.sub(r"\D","", num)
-        if len(num) == 11 and num.startswith("1"):
-            num = num[1:]
-        if len(num) == 10:
-            phones.add(f"({num[:3]}) {num[3:6]}-{num[6:]}")
-
-    # visible text phones (if no tel:)
-    if not phones:
-        phones.update(extract_phones_from_html(soup.get_text(" ", strip=True)))
-
-    # collect external links (possibly to brand site from a directory)
-    links = []
-    for a in soup.select("a[href]"):
-        href = (a.get("href","")).strip()
-        if not is_http(href): 
-            continue
-        links.append(href)
-    return list(phones), links
-
-def crawl_brand_site_for_phone(site_url):
+def extract_phones_and_links(html, url=""):
+    # one Page per fetch: the phone extractor and the link list share its soup
+    page = Page(url, html)
+    phone = extractors.phone(page)
+    links = [href for href, _ in page.links if is_http(href)]
+    return ([phone] if phone else []), links
+
+def crawl_brand_site_for_phone(site_url, row=None):
     """
-    Fetch homepage; if no phone, try common contact/location/about pages.
+    Best-first crawl of the site (njbuds.frontier): contact / location / city
+    links first, stopping at the first confident phone for this row's store.
     Return (final_site, phone)
     """
     if not site_url: return ("","")
+    row = row or {}
     start = canonical(site_url)
     base  = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
 
     with requests.Session() as s:
         s.headers.update({"User-Agent": UA})
-
-        # Homepage
-        r = get(start, s) or get(base, s)
-        if not r: return (start, "")
-        final_site = canonical(r.url)
-
-        phones, _ = extract_phones_and_links(r.text)
-        if phones: return (final_site, phones[0])
-
-        # Try contact-like pages
-        for path in CONTACT_PATHS:
-            u = urljoin(base, path)
-            r2 = get(u, s)
-            if not r2: continue
-            phones2, _ = extract_phones_and_links(r2.text)
-            if phones2:
-                return (final_site, phones2[0])
-
-        return (final_site, "")
-
-def try_directory_then_brand(dir_url):
+        fetch = lambda u: get(u, s)
+        res = frontier.crawl(start, fetch, city=row.get("city", ""), street=row.get("street", ""),
+                             guess_paths=CONTACT_PATHS)
+        if not res.pages and start != base:
+            res = frontier.crawl(base, fetch, city=row.get("city", ""), street=row.get("street", ""),
+                                 guess_paths=CONTACT_PATHS)
+        if not res.pages: return (start, "")
+        return (canonical(res.pages[0].url), res.phone)
+
+def try_directory_then_brand(dir_url, row=None):
     """
     If we only have a directory page (weedmaps/leafly/iheartjane/dutchie),
     try to find a brand domain in its links; if found, crawl that brand site.
@@ -164,7 +119,7 @@ def try_directory_then_brand(dir_url):
     r = get(dir_url)
     if not r: 
         return (dir_url, "")
-    phones, links = extract_phones_and_links(r.text)
+    phones, links = extract_phones_and_links(r.text, r.url)
     # if directory itself exposes a phone, return it
     if phones:
         return (dir_url, phones[0])
@@ -174,7 +129,7 @@ def try_directory_then_brand(dir_url):
         if not is_dir(href) and not is_banned(href):
             brand = canonical(href); break
     if brand:
-        return crawl_brand_site_for_phone(brand)
+        return crawl_brand_site_for_phone(brand, row)
     return (dir_url, "")
 
 def enrich_row(row):
@@ -186,9 +141,9 @@ def enrich_row(row):
 
     # if it's a directory, special flow
     if is_dir(website):
-        final_site, found_phone = try_directory_then_brand(website)
+        final_site, found_phone = try_directory_then_brand(website, row)
     else:
-        final_site, found_phone = crawl_brand_site_for_phone(website)
+        final_site, found_phone = crawl_brand_site_for_phone(website, row)
 
     changed = False
     # update website if it redirected to a cleaner canonical
@@ -207,23 +162,27 @@ def main():
     out = []
     changed_count = 0
 
-    for i, r in enumerate(rows, start=1):
-        r2, changed = enrich_row(r.copy())
-        out.append(r2)
-        if changed:
-            changed_count += 1
+    with metrics.stage("enrich_phones") as st:
+        for i, r in enumerate(rows, start=1):
+            r2, changed = enrich_row(r.copy())
+            out.append(r2)
+            st.rows = i
+            if changed:
+                changed_count += 1
 
-        if i % 10 == 0:
-            print(f"[{i}/{len(rows)}] updated rows so far: {changed_count}")
-        if i % CHECKPOINT_EVERY == 0:
-            write_rows(OUTPUT, out)
-            print(f"Checkpoint written → {OUTPUT}")
+            if i % 10 == 0:
+                print(f"[{i}/{len(rows)}] updated rows so far: {changed_count}")
+            if i % CHECKPOINT_EVERY == 0:
+                write_rows(OUTPUT, out)
+                print(f"Checkpoint written → {OUTPUT}")
 
-        time.sleep(random.uniform(*SLEEP_BETWEEN))  # be polite
+            time.sleep(random.uniform(*SLEEP_BETWEEN))  # be polite
 
     write_rows(OUTPUT, out)
     print(f"Done. Wrote {OUTPUT}")
     print(f"Rows updated (website or phone): {changed_count}")
+    print(metrics.summary())
+    print(f"Run report: {metrics.write('enrich_phones')}")
 
 if __name__ == "__main__":
     main()
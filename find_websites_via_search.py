@@ -1,12 +1,10 @@
 import time, os, csv, re
 import pandas as pd
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException
+
+from njbuds import metrics
+from njbuds.merge import blank, carry_over, pending
+from njbuds.verify import MIN_CONFIDENCE, verify
 
 INPUT = "nj_dispensaries.csv"
 OUTPUT = "nj_dispensaries_with_websites.csv"
@@ -49,6 +47,10 @@ def load_df():
     return df
 
 def bootstrap_driver(headless=False):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.chrome.options import Options
     opts = Options()
     if headless:
         opts.add_argument("--headless=new")
@@ -62,6 +64,7 @@ def bootstrap_driver(headless=False):
     return driver
 
 def ddg_query(driver, q: str):
+    from selenium.webdriver.common.by import By
     driver.get("https://duckduckgo.com/?va=j&t=h_&ia=web")
     time.sleep(1.2)
     box = driver.find_element(By.ID, "searchbox_input") if driver.find_elements(By.ID, "searchbox_input") \
@@ -73,6 +76,7 @@ def ddg_query(driver, q: str):
     time.sleep(1.6)
 
 def ddg_top_links(driver, max_links=8):
+    from selenium.webdriver.common.by import By
     links = []
     # New DDG selectors first
     for a in driver.find_elements(By.CSS_SELECTOR, "a[data-testid='result-title-a']"):
@@ -106,56 +110,67 @@ def main():
 
     # If resuming, prefill from OUTPUT if present
     if os.path.exists(OUTPUT):
-        prev = pd.read_csv(OUTPUT)
-        prev_key = (prev["name"].str.lower() + "|" + prev["street"].fillna("").str.lower() + "|" + prev["city"].fillna("").str.lower())
-        cur_key  = (df["name"].str.lower()  + "|" + df["street"].fillna("").str.lower()  + "|" + df["city"].fillna("").str.lower())
-        mapping = dict(zip(prev_key, prev.get("website","")))
-        df["__key"] = cur_key
-        df["website"] = df.apply(lambda r: mapping.get(r["__key"], r.get("website","")), axis=1)
-        df.drop(columns=["__key"], inplace=True)
+        df = carry_over(df, pd.read_csv(OUTPUT), ["website", "website_confidence"])
+    if "website_confidence" not in df.columns:
+        df["website_confidence"] = ""
+
+    # only rows without a website (maybe filled by a previous run) need a search
+    todo = pending(df, "website")
+    rows = {c: blank(df.loc[todo, c]) for c in ("name", "street", "city", "phone")}
+    names, cities = rows["name"], rows["city"]
+    found = {}
 
     driver = bootstrap_driver(headless=False)  # set True if you don’t want to watch
-    filled = 0
-
-    for i, row in df.iterrows():
-        if str(row.get("website","")).strip():
-            continue  # already have one (maybe from a previous run)
-
-        name = str(row.get("name","")).strip()
-        city = str(row.get("city","")).strip()
-        if not name:
-            continue
-
-        q = f'{name} {city} NJ dispensary'
-        try:
-            ddg_query(driver, q)
-            links = ddg_top_links(driver, max_links=10)
-            # If nothing, try a variant
-            if not links:
-                q2 = f'{name} {city} New Jersey cannabis'
-                ddg_query(driver, q2)
+    filled = low = 0
+
+    with metrics.stage("find_websites") as st:
+        for n, (i, name, city, street, phone) in enumerate(
+                zip(todo, names, cities, rows["street"], rows["phone"]), start=1):
+            st.rows = n
+            if not name:
+                continue
+
+            q = f'{name} {city} NJ dispensary'
+            try:
+                ddg_query(driver, q)
                 links = ddg_top_links(driver, max_links=10)
-
-            best = pick_best(links)
-            if best:
-                df.at[i, "website"] = best
-                filled += 1
-        except Exception:
-            pass
-
-        # progress + checkpoint
-        if (i+1) % 10 == 0:
-            print(f"[{i+1}/{len(df)}] websites filled so far: {filled}")
-        if (i+1) % CHECKPOINT_EVERY == 0:
-            df.to_csv(OUTPUT, index=False, encoding="utf-8")
-            print(f"Checkpoint written → {OUTPUT}")
-
-        time.sleep(0.9)  # be polite to DDG
+                # If nothing, try a variant
+                if not links:
+                    q2 = f'{name} {city} New Jersey cannabis'
+                    ddg_query(driver, q2)
+                    links = ddg_top_links(driver, max_links=10)
+
+                # fetch and score the candidates; first-non-banned only when none of them loads
+                row = {"name": name, "street": street, "city": city, "phone": phone}
+                best, conf, _ = verify(row, links, skip=is_banned)
+                best = best or pick_best(links)
+                if best:
+                    found[i] = (best, f"{conf:.2f}")
+                    filled += 1
+                    low += conf < MIN_CONFIDENCE
+            except Exception as e:
+                metrics.error(type(e).__name__, "duckduckgo.com")
+
+            # progress + checkpoint
+            if n % 10 == 0:
+                print(f"[{n}/{len(todo)}] websites filled so far: {filled}")
+            if n % CHECKPOINT_EVERY == 0:
+                df.loc[list(found), "website"] = [u for u, _ in found.values()]
+                df.loc[list(found), "website_confidence"] = [c for _, c in found.values()]
+                df.to_csv(OUTPUT, index=False, encoding="utf-8")
+                print(f"Checkpoint written → {OUTPUT}")
+
+            time.sleep(0.9)  # be polite to DDG
 
     driver.quit()
+    if found:
+        df.loc[list(found), "website"] = [u for u, _ in found.values()]
+        df.loc[list(found), "website_confidence"] = [c for _, c in found.values()]
     df.to_csv(OUTPUT, index=False, encoding="utf-8")
     print(f"Done. Wrote {OUTPUT}")
-    print(f"Websites added: {filled}")
+    print(f"Websites added: {filled} ({low} below confidence {MIN_CONFIDENCE})")
+    print(metrics.summary())
+    metrics.write("find_websites")
 
 if __name__ == "__main__":
     main()
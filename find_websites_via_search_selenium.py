@@ -3,11 +3,10 @@
 import time, os
 import pandas as pd
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+
+from njbuds import metrics
+from njbuds.merge import blank, carry_over, pending
+from njbuds.verify import MIN_CONFIDENCE, verify
 
 INPUT = "nj_dispensaries.csv"
 OUTPUT = "nj_dispensaries_with_websites.csv"
@@ -51,13 +50,15 @@ def load_df():
             df[col] = ""
 
     # Treat NaN as empty strings (CRITICAL FIX)
-    df["website"] = df["website"].astype(str)
-    df["website"] = df["website"].replace({"nan": "", "NaN": "", "None": ""})
-    df["website"] = df["website"].where(df["website"].notna(), "")
+    df["website"] = blank(df["website"])
 
     return df
 
 def bootstrap_driver(headless=False):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.chrome.options import Options
     opts = Options()
     if headless:
         opts.add_argument("--headless=new")
@@ -71,6 +72,7 @@ def bootstrap_driver(headless=False):
     return driver
 
 def ddg_query(driver, q: str):
+    from selenium.webdriver.common.by import By
     driver.get("https://duckduckgo.com/?va=j&t=h_&ia=web")
     time.sleep(1.5)
     # New UI first
@@ -87,6 +89,7 @@ def ddg_query(driver, q: str):
     time.sleep(1.8)
 
 def ddg_top_links(driver, max_links=10):
+    from selenium.webdriver.common.by import By
     links = []
 
     # New UI selector
@@ -127,69 +130,72 @@ def main():
 
     # Resume: if OUTPUT exists, carry over any websites already found
     if os.path.exists(OUTPUT):
-        prev = pd.read_csv(OUTPUT)
-        # normalize prev too
-        if "website" in prev.columns:
-            prev["website"] = prev["website"].astype(str).replace({"nan":"","NaN":"","None":""}).fillna("")
-        prev_key = (prev["name"].str.lower().fillna("") + "|" +
-                    prev["street"].str.lower().fillna("") + "|" +
-                    prev["city"].str.lower().fillna(""))
-        cur_key  = (df["name"].str.lower().fillna("")  + "|" +
-                    df["street"].str.lower().fillna("")  + "|" +
-                    df["city"].str.lower().fillna(""))
-        mapping = dict(zip(prev_key, prev.get("website","")))
-        df["__key"] = cur_key
-        df["website"] = df.apply(lambda r: mapping.get(r["__key"], r.get("website","")), axis=1)
-        df.drop(columns=["__key"], inplace=True)
-
-    driver = bootstrap_driver(headless=False)  # set True to hide the browser
-    filled = 0
-    started = time.time()
-
-    for i, row in df.iterrows():
-        current_site = str(row.get("website","") or "").strip()
-        if current_site:
-            # already has a site; skip
-            continue
-
-        name = str(row.get("name","")).strip()
-        city = str(row.get("city","")).strip()
-        if not name:
-            continue
-
-        q = f'{name} {city} NJ dispensary'
-        try:
-            ddg_query(driver, q)
-            links = ddg_top_links(driver, max_links=10)
-
-            # If nothing, try a variant
-            if not links:
-                q2 = f'{name} {city} New Jersey cannabis'
-                ddg_query(driver, q2)
+        df = carry_over(df, pd.read_csv(OUTPUT), ["website", "website_confidence"])
+    if "website_confidence" not in df.columns:
+        df["website_confidence"] = ""
+
+    # rows that already have a site are skipped up front
+    todo = pending(df, "website")
+    rows = {c: blank(df.loc[todo, c]) for c in ("name", "street", "city", "phone")}
+    names, cities = rows["name"], rows["city"]
+    print(f"{len(todo)} rows still need a website")
+    found = {}
+
+    with metrics.stage("find_websites") as st:
+        driver = bootstrap_driver(headless=False)  # set True to hide the browser
+        filled = low = 0
+        started = time.time()
+
+        for n, (i, name, city, street, phone) in enumerate(
+                zip(todo, names, cities, rows["street"], rows["phone"]), start=1):
+            st.rows = n
+            if not name:
+                continue
+
+            q = f'{name} {city} NJ dispensary'
+            try:
+                ddg_query(driver, q)
                 links = ddg_top_links(driver, max_links=10)
 
-            best = pick_best(links)
-            if best:
-                df.at[i, "website"] = best
-                filled += 1
-        except Exception as e:
-            # don’t crash the whole run on one failure
-            print(f"Row {i+1} error: {e}")
-
-        # progress + checkpoint
-        if (i+1) % 10 == 0:
-            elapsed = int(time.time() - started)
-            print(f"[{i+1}/{total}] websites added so far: {filled} (elapsed {elapsed}s)")
-        if (i+1) % CHECKPOINT_EVERY == 0:
-            df.to_csv(OUTPUT, index=False, encoding="utf-8")
-            print(f"Checkpoint written → {OUTPUT}")
-
-        time.sleep(1.2)  # be polite to DDG; increase if you see blocking
-
-    driver.quit()
-    df.to_csv(OUTPUT, index=False, encoding="utf-8")
-    print(f"Done. Wrote {OUTPUT}")
-    print(f"Websites added this run: {filled}")
+                # If nothing, try a variant
+                if not links:
+                    q2 = f'{name} {city} New Jersey cannabis'
+                    ddg_query(driver, q2)
+                    links = ddg_top_links(driver, max_links=10)
+
+                # fetch and score the candidates; first-non-banned only when none of them loads
+                row = {"name": name, "street": street, "city": city, "phone": phone}
+                best, conf, _ = verify(row, links, skip=is_banned)
+                best = best or pick_best(links)
+                if best:
+                    found[i] = (best, f"{conf:.2f}")
+                    filled += 1
+                    low += conf < MIN_CONFIDENCE
+            except Exception as e:
+                # don’t crash the whole run on one failure
+                print(f"Row {i+1} error: {e}")
+
+            # progress + checkpoint
+            if n % 10 == 0:
+                elapsed = int(time.time() - started)
+                print(f"[{n}/{len(todo)}] websites added so far: {filled} (elapsed {elapsed}s)")
+            if n % CHECKPOINT_EVERY == 0:
+                df.loc[list(found), "website"] = [u for u, _ in found.values()]
+                df.loc[list(found), "website_confidence"] = [c for _, c in found.values()]
+                df.to_csv(OUTPUT, index=False, encoding="utf-8")
+                print(f"Checkpoint written → {OUTPUT}")
+
+            time.sleep(1.2)  # be polite to DDG; increase if you see blocking
+
+        driver.quit()
+        if found:
+            df.loc[list(found), "website"] = [u for u, _ in found.values()]
+            df.loc[list(found), "website_confidence"] = [c for _, c in found.values()]
+        df.to_csv(OUTPUT, index=False, encoding="utf-8")
+        print(f"Done. Wrote {OUTPUT}")
+        print(f"Websites added this run: {filled} ({low} below confidence {MIN_CONFIDENCE})")
+    print(metrics.summary())
+    metrics.write("find_websites")
 
 if __name__ == "__main__":
     main()
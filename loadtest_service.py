@@ -0,0 +1,83 @@
+#Load test for the njbuds HTTP service: keep-alive clients, reports p50/p99 latency
+
+import asyncio, json, random, sys, time
+from njbuds.snapshot import latest_snapshot
+
+HOST = "127.0.0.1"
+PORT = 8080
+CONCURRENCY = 32
+DURATION = 15        # seconds
+GZIP = True
+
+def build_targets(path, n=500):
+    """Sample ids, cities, zips and coordinates from the snapshot the server is using."""
+    with open(path, encoding="utf-8") as f:
+        recs = [json.loads(ln) for ln in f if ln.strip()]
+    random.seed(7)
+    targets = []
+    for r in random.sample(recs, min(n, len(recs))):
+        targets.append(f"/dispensaries/{r['id']}")
+        if r.get("city"):
+            targets.append(f"/search?city={r['city'].replace(' ', '%20')}")
+        if r.get("zip"):
+            targets.append(f"/search?zip={r['zip']}")
+        if r.get("lat") is not None:
+            lat = r["lat"] + random.uniform(-0.05, 0.05)
+            lon = r["lon"] + random.uniform(-0.05, 0.05)
+            targets.append(f"/nearest?lat={lat:.4f}&lon={lon:.4f}&k=5")
+    return targets
+
+async def client(targets, deadline, lat_ms, errors):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    enc = "Accept-Encoding: gzip\r\n" if GZIP else ""
+    try:
+        while time.perf_counter() < deadline:
+            t = random.choice(targets)
+            t0 = time.perf_counter()
+            writer.write(f"GET {t} HTTP/1.1\r\nHost: {HOST}\r\n{enc}\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for ln in head.split(b"\r\n"):
+                if ln.lower().startswith(b"content-length:"):
+                    length = int(ln.split(b":")[1])
+            if length:
+                await reader.readexactly(length)
+            lat_ms.append((time.perf_counter() - t0) * 1000)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+def pct(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))]
+
+async def run():
+    path = latest_snapshot()
+    if not path:
+        print("No snapshot in data/processed; run: python -m njbuds.snapshot <csv>")
+        sys.exit(1)
+    targets = build_targets(path)
+    print(f"{len(targets)} target URLs from {path}; {CONCURRENCY} clients for {DURATION}s")
+
+    lat_ms, errors = [], []
+    start = time.perf_counter()
+    deadline = start + DURATION
+    await asyncio.gather(*(client(targets, deadline, lat_ms, errors) for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+
+    s = sorted(lat_ms)
+    print(f"Requests: {len(s)}  errors: {len(errors)}  throughput: {len(s) / elapsed:,.0f} req/s")
+    print(f"Latency ms  p50={pct(s, 50):.3f}  p90={pct(s, 90):.3f}  p99={pct(s, 99):.3f}  max={s[-1] if s else 0:.3f}")
+
+def main():
+    # optional: python loadtest_service.py [port] [seconds]
+    global PORT, DURATION
+    if len(sys.argv) > 1: PORT = int(sys.argv[1])
+    if len(sys.argv) > 2: DURATION = float(sys.argv[2])
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,9 @@
 #This script will scrape all sites recreational and medicinal
 
-import re, time
+import time
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+
+from njbuds.cards import iter_cards
 
 # --- Config ---
 CRC_URL = "https://www.nj.gov/cannabis/dispensaries/find/"
@@ -23,13 +20,6 @@ ON_LABELS = [
 ]
 
 # --- Helpers ---
-ADDR_RE = re.compile(r"""
-    ^(?P<street>.+?)\s*,\s*
-    (?P<city>[A-Za-z'\.\-\s]+)\s*,\s*
-    (?P<state>NJ)\s*
-    (?P<zip>\d{5})?
-    """, re.VERBOSE)
-
 def js_find_buttons_by_text(drv, labels):
     """Return DOM nodes whose visible text matches any label (case-insensitive)."""
     script = """
@@ -130,8 +120,8 @@ def js_get_list_container_selector(drv):
     """
     return drv.execute_script(script)
 
-def scroll_list_until_stable(drv, container, max_rounds=40, settle_rounds=6, pause=0.9):
-    """Scroll the detected list pane until text length stops changing."""
+def scroll_rounds(drv, container, max_rounds=40, settle_rounds=6, pause=0.9):
+    """Scroll the detected list pane until text length stops changing; yields after each round."""
     prev_len = -1
     stable = 0
     for _ in range(max_rounds):
@@ -150,88 +140,33 @@ def scroll_list_until_stable(drv, container, max_rounds=40, settle_rounds=6, pau
                 prev_len = cur_len
         except Exception:
             break
+        yield cur_len
 
-def harvest_cards(drv, source_url):
-    """Card-aware extraction: find each card via 'Get Directions', then parse name/address/website."""
-    rows = []
-    direction_links = drv.find_elements(
-        By.XPATH, "//a[contains(., 'Get Directions')] | //button[contains(., 'Get Directions')]"
-    )
-    seen = set()
-
-    for link in direction_links:
-        try:
-            card = link.find_element(By.XPATH, "ancestor::*[self::div or self::li or self::article or self::section][1]")
-            card_lines = [ln.strip() for ln in card.text.splitlines() if ln.strip()]
-            if not card_lines:
-                continue
-
-            # Name = first non-button-ish line
-            name = ""
-            for ln in card_lines:
-                low = ln.lower()
-                if low in ("get directions", "directions", "website", "view website"):
-                    continue
-                name = ln
-                break
-
-            # Address line inside the card
-            addr_line = ""
-            for ln in card_lines:
-                if "NJ" in ln and (("," in ln and re.search(r"\b\d{5}\b", ln)) or ", NJ" in ln):
-                    addr_line = ln
-                    break
-            if not name or not addr_line:
-                if len(card_lines) >= 2:
-                    name = name or card_lines[0]
-                    addr_line = addr_line or card_lines[1]
-                else:
-                    continue
-
-            # Parse address
-            m = ADDR_RE.search(addr_line)
-            street = city = state = zipc = ""
-            if m:
-                street = (m.group("street") or "").strip(" ,")
-                city   = (m.group("city") or "").strip(" ,")
-                state  = (m.group("state") or "NJ").strip()
-                zipc   = (m.group("zip") or "").strip()
-
-            # Website in this card (non-social, non-gov, non-atlist)
-            website = ""
-            for a in card.find_elements(By.CSS_SELECTOR, "a[href]"):
-                href = (a.get_attribute("href") or "").strip()
-                if not href.startswith("http"):
-                    continue
-                low = href.lower()
-                if any(s in low for s in ["facebook.com","instagram.com","twitter.com","x.com","youtube.com","nj.gov","my.atlist.com"]):
-                    continue
-                website = href
-                break
+def scroll_list_until_stable(drv, container, max_rounds=40, settle_rounds=6, pause=0.9):
+    for _ in scroll_rounds(drv, container, max_rounds, settle_rounds, pause):
+        pass
 
-            key = (name.lower(), street.lower(), city.lower())
-            if name and (street or city) and key not in seen:
-                seen.add(key)
-                rows.append({
-                    "name": name,
-                    "street": street, "city": city, "state": state, "zip": zipc,
-                    "website": website, "phone": "", "source": source_url
-                })
-        except Exception:
-            continue
-    return rows
+def harvest_cards(drv, source_url):
+    """Card-aware extraction: every card around a 'Get Directions' control, parsed by njbuds.cards."""
+    return list(iter_cards(drv, source_url))
 
 # --- Main ---
-def main():
+def open_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.chrome.options import Options
     opts = Options()
     # Run visible so you can watch; comment the next line to go headless
     # opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--window-size=1440,1000")
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
 
-    drv = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-
+def open_map(drv):
+    """Open the Atlist map with only medicinal categories on; returns (atlist_src, list container or None)."""
+    from selenium.webdriver.common.by import By
     # Discover Atlist src from the CRC page
     drv.get(CRC_URL)
     time.sleep(4)
@@ -270,18 +205,31 @@ def main():
             js_set_button_state(drv, n, want_on=True)
         time.sleep(1.2)
 
-    # Find the list pane and scroll it until stable (lazy-loaded items)
-    container = js_get_list_container_selector(drv)
+    return atlist_src, js_get_list_container_selector(drv)
+
+def iter_rows(drv):
+    """
+    Yield rows while the list is still scrolling: the cards on screen are
+    harvested after every scroll round, so downstream stages (stream_pipeline.py)
+    start on the first card instead of waiting for the whole list.
+    """
+    atlist_src, container = open_map(drv)
+    seen = set()
     if container:
-        scroll_list_until_stable(drv, container, max_rounds=45, settle_rounds=6, pause=0.9)
+        for _ in scroll_rounds(drv, container, max_rounds=45, settle_rounds=6, pause=0.9):
+            yield from iter_cards(drv, atlist_src, seen)
     else:
         # Fallback: scroll window if list container not detected
         for _ in range(14):
             drv.execute_script("window.scrollTo(0, document.body.scrollHeight);"); time.sleep(1.0)
             drv.execute_script("window.scrollTo(0, 0);"); time.sleep(0.7)
+            yield from iter_cards(drv, atlist_src, seen)
+    yield from iter_cards(drv, atlist_src, seen)
 
+def main():
+    drv = open_driver()
     # Harvest and write CSV
-    rows = harvest_cards(drv, atlist_src)
+    rows = list(iter_rows(drv))
     print("Rows harvested (medicinal):", len(rows))
 
     pd.DataFrame(rows, columns=["name","street","city","state","zip","website","phone","source"]) \
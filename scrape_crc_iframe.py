@@ -2,12 +2,6 @@
 
 import re, time, io
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
 URL = "https://www.nj.gov/cannabis/dispensaries/find/"
 OUTFILE = "nj_dispensaries.csv"
@@ -77,6 +71,11 @@ def extract_records_from_text_lines(lines, external_links):
     return out
 
 def main():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
     opts = Options()
     opts.add_argument("--headless=new")
     opts.add_argument("--no-sandbox")
@@ -1,10 +1,5 @@
 import re, time
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 
 CRC_URL = "https://www.nj.gov/cannabis/dispensaries/find/"
 ATLIST_FALLBACK = "https://my.atlist.com/map/8bed33fa-9b8c-4c51-bb33-74cd0d98628a?share=true"
@@ -36,6 +31,7 @@ def js_click_any_with_text(driver, needles):
     return driver.execute_script(script, needles)
 
 def harvest_text(driver):
+    from selenium.webdriver.common.by import By
     # aggressive scroll to trigger lazy load
     for _ in range(16):
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
@@ -98,6 +94,11 @@ def harvest_text(driver):
     return out
 
 def main():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
     opts = Options()
     # run non-headless so we can see and interact if needed:
     # comment out the next line to run headless
@@ -0,0 +1,3 @@
+from njbuds.cli import main
+
+main()
@@ -0,0 +1,101 @@
+"""
+Parse one Atlist map card (the block around a "Get Directions" control).
+
+The card scrapers used to carry three copies of this. They now read every
+card's text and hrefs in one JavaScript call and hand them here, so the
+parsing can be timed and reused without a browser.
+
+    row = parse_card(card.text.splitlines(), (a.get_attribute("href") for a in anchors), url)
+    # {"name", "street", "city", "state", "zip", "website", "phone", "source"} or None
+
+    for row in iter_cards(drv, url, seen):   # only cards not yielded before
+        ...
+"""
+import re
+
+from njbuds.utils import address_re
+
+BUTTON_LABELS = ("get directions", "directions", "website", "view website")
+SKIP_LINK_HOSTS = ("facebook.com","instagram.com","twitter.com","x.com","youtube.com","nj.gov","my.atlist.com")
+_ZIP_RE = re.compile(r"\b\d{5}\b")
+
+# [innerText, [hrefs]] for the card around every "Get Directions" control, in one round trip
+SNAPSHOT_JS = """
+return Array.from(document.querySelectorAll('a, button'))
+  .filter(el => (el.textContent || '').includes('Get Directions'))
+  .map(el => el.parentElement && el.parentElement.closest('div, li, article, section'))
+  .filter(Boolean)
+  .map(card => [card.innerText || '', Array.from(card.querySelectorAll('a[href]')).map(a => a.href)]);
+"""
+
+def card_name(lines):
+    """First line that is not a button label."""
+    for ln in lines:
+        if ln.lower() not in BUTTON_LABELS:
+            return ln
+    return ""
+
+def address_line(lines, state="NJ"):
+    for ln in lines:
+        if state in ln and (("," in ln and _ZIP_RE.search(ln)) or f", {state}" in ln):
+            return ln
+    return ""
+
+def card_website(hrefs):
+    """First http(s) link that is not social / gov / Atlist. hrefs may be lazy."""
+    for href in hrefs:
+        href = (href or "").strip()
+        if not href.startswith("http"):
+            continue
+        low = href.lower()
+        if any(s in low for s in SKIP_LINK_HOSTS):
+            continue
+        return href
+    return ""
+
+def parse_card(lines, hrefs=(), source_url="", states=("NJ",)):
+    """One card's row, or None when it has no name or no street/city."""
+    lines = [ln.strip() for ln in lines if ln and ln.strip()]
+    if not lines:
+        return None
+    name = card_name(lines)
+    addr = ""
+    for st in states:
+        addr = address_line(lines, st)
+        if addr:
+            break
+    if not name or not addr:
+        if len(lines) < 2:
+            return None
+        name = name or lines[0]
+        addr = addr or lines[1]
+
+    m = address_re(states).search(addr)
+    street = city = state = zipc = ""
+    if m:
+        street = (m.group("street") or "").strip(" ,")
+        city   = (m.group("city") or "").strip(" ,")
+        state  = (m.group("state") or states[0]).strip()
+        zipc   = (m.group("zip") or "").strip()
+    if not (street or city):
+        return None
+    return {
+        "name": name,
+        "street": street, "city": city, "state": state, "zip": zipc,
+        "website": card_website(hrefs), "phone": "", "source": source_url,
+    }
+
+def card_key(row):
+    return (row["name"].lower(), row["street"].lower(), row["city"].lower())
+
+def iter_cards(drv, source_url, seen=None, states=("NJ",)):
+    """Yield rows for the cards on screen now whose key is not in seen (updated in place)."""
+    seen = set() if seen is None else seen
+    for text, hrefs in drv.execute_script(SNAPSHOT_JS) or ():
+        row = parse_card(text.splitlines(), hrefs, source_url, states)
+        if row is None:
+            continue
+        key = card_key(row)
+        if key not in seen:
+            seen.add(key)
+            yield row
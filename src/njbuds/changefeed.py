@@ -0,0 +1,163 @@
+"""
+Changefeed between two snapshots: what was added, removed, or changed.
+
+The snapshots are hash-joined on the stable `id` (dispensary_key of name,
+street and city) in a single linear pass: the old side is a dict of
+id -> line hash, and the new side is streamed against it. Only lines whose
+hashes differ are parsed and compared field by field. A renamed or moved dispensary gets a new id, so it
+shows up as removed + added.
+
+    {"op":"added","id":"...","record":{...}}
+    {"op":"removed","id":"...","record":{...}}
+    {"op":"modified","id":"...","changes":{"phone":["(973) 555-0100","(973) 555-0199"]}}
+
+Parquet output (one row per op/id/field, via pyarrow when installed) has the
+columns op, id, field, old, new.
+
+    python -m njbuds.changefeed                     # two newest snapshots in data/processed
+    python -m njbuds.changefeed old.jsonl new.jsonl -o changes.jsonl
+    python -m njbuds.changefeed --format parquet
+"""
+import argparse, glob, hashlib, json, os, re, time
+
+from njbuds.snapshot import PREFIX, SNAPSHOT_DIR, latest_snapshot
+
+CHANGES_DIR = os.path.join(SNAPSHOT_DIR, "changes")
+IGNORE = ("id",)
+
+_ID_RE = re.compile(r'^\{\s*"id"\s*:\s*"([^"\\]*)"')
+
+def split_line(line):
+    """(id, raw line) without parsing: write_snapshot puts "id" first."""
+    m = _ID_RE.match(line)
+    return (m.group(1) if m else json.loads(line)["id"]), line
+
+def iter_lines(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip():
+                yield split_line(line)
+
+def load_side(path):
+    """{id: (line hash, raw line)}; later duplicates of an id win."""
+    return {rid: (hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest(), line)
+            for rid, line in iter_lines(path)}
+
+def field_changes(old, new):
+    out = {}
+    for k in dict.fromkeys(list(old) + list(new)):
+        if k in IGNORE:
+            continue
+        a, b = old.get(k), new.get(k)
+        if a != b and not (a in (None, "") and b in (None, "")):
+            out[k] = [a, b]
+    return out
+
+def diff(old_path, new_path):
+    """
+    Yield change events. The old snapshot is held as {id: (hash, line)}, the
+    new one is streamed; lines are only parsed when their hashes differ. On
+    both sides the last line of a duplicated id wins.
+    """
+    old = load_side(old_path)
+    # same rule as load_side: the last line of a duplicated id wins (first pass keeps id -> line number)
+    last = {rid: i for i, (rid, _) in enumerate(iter_lines(new_path))}
+    seen = set()
+    for i, (rid, line) in enumerate(iter_lines(new_path)):
+        if last[rid] != i:
+            continue
+        seen.add(rid)
+        prev = old.get(rid)
+        if prev is None:
+            yield {"op": "added", "id": rid, "record": json.loads(line)}
+        elif prev[0] != hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest():
+            changes = field_changes(json.loads(prev[1]), json.loads(line))
+            if changes:  # a new empty column or reordered keys change the line, not the data
+                yield {"op": "modified", "id": rid, "changes": changes}
+    for rid, (_, line) in old.items():
+        if rid not in seen:
+            yield {"op": "removed", "id": rid, "record": json.loads(line)}
+
+def write_jsonl(events, path):
+    counts = {"added": 0, "removed": 0, "modified": 0}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for e in events:
+            counts[e["op"]] += 1
+            f.write(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+    return counts
+
+def _flat(events):
+    """One row per (op, id, field) for columnar output."""
+    for e in events:
+        if e["op"] == "modified":
+            for k, (a, b) in e["changes"].items():
+                yield e["op"], e["id"], k, a, b
+        else:
+            for k, v in e["record"].items():
+                if k not in IGNORE:
+                    yield e["op"], e["id"], k, (v if e["op"] == "removed" else None), (v if e["op"] == "added" else None)
+
+def write_parquet(events, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow (pip install 'njbuds[parquet]')")
+    counts = {"added": 0, "removed": 0, "modified": 0}
+    def counted():
+        for e in events:
+            counts[e["op"]] += 1
+            yield e
+    cols = {c: [] for c in ("op", "id", "field", "old", "new")}
+    for row in _flat(counted()):
+        for c, v in zip(cols, row):
+            cols[c].append(None if v is None else str(v) if c in ("old", "new") else v)
+    pq.write_table(pa.table(cols), path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return counts
+
+def stamp_of(path):
+    name = os.path.basename(path)
+    return name[len(PREFIX):-len(".jsonl")] if name.startswith(PREFIX) else os.path.splitext(name)[0]
+
+def default_pair(out_dir=SNAPSHOT_DIR):
+    found = sorted(glob.glob(os.path.join(out_dir, f"{PREFIX}*.jsonl")))
+    newest = latest_snapshot(out_dir)
+    if newest in found:
+        found = found[:found.index(newest) + 1]
+    if len(found) < 2:
+        raise SystemExit(f"Need two snapshots in {out_dir} (found {len(found)})")
+    return found[-2], found[-1]
+
+def write_changefeed(old_path, new_path, output=None, fmt="jsonl", changes_dir=CHANGES_DIR):
+    """Diff two snapshots into changes_dir (or output); returns (path, counts)."""
+    ext = "parquet" if fmt == "parquet" else "jsonl"
+    if output is None:
+        os.makedirs(changes_dir, exist_ok=True)
+        output = os.path.join(changes_dir, f"changes_{stamp_of(old_path)}_{stamp_of(new_path)}.{ext}")
+    events = diff(old_path, new_path)
+    counts = write_parquet(events, output) if fmt == "parquet" else write_jsonl(events, output)
+    return output, counts
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Diff two snapshots into a changefeed")
+    ap.add_argument("old", nargs="?")
+    ap.add_argument("new", nargs="?")
+    ap.add_argument("-o", "--output", default=None)
+    ap.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    ap.add_argument("--dir", default=SNAPSHOT_DIR)
+    args = ap.parse_args(argv)
+
+    old, new = (args.old, args.new) if args.old and args.new else default_pair(args.dir)
+    t0 = time.perf_counter()
+    path, counts = write_changefeed(old, new, args.output, args.format, os.path.join(args.dir, "changes"))
+    secs = time.perf_counter() - t0
+    print(f"{os.path.basename(old)} -> {os.path.basename(new)} in {secs:.3f}s: "
+          + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+`njbuds` command line: one entry point for every pipeline stage.
+
+Only os and sys load at startup. A subcommand imports its module
+(and pandas, selenium, bs4 ...) only when it runs, so `njbuds --help`,
+`njbuds stats` and `njbuds export` start in tens of milliseconds.
+
+    njbuds --help
+    njbuds stats nj_dispensaries_geocoded.csv
+    njbuds export nj_dispensaries_geocoded.csv -f jsonl -o out.jsonl
+    njbuds resolve a.csv=recreational b.csv=medicinal
+    njbuds --import-profile geocode        # what the subcommand's imports cost
+    njbuds --profile enrich-sites          # cProfile, tracemalloc, stacks (njbuds.profiling)
+"""
+import os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+# name -> (target, help). "njbuds.x" runs x.main(argv); "*.py" runs a top-level pipeline script.
+COMMANDS = {
+    "run":              ("njbuds.orchestrator", "run every stale pipeline stage (DAG, cached, parallel)"),
+    "scrape-open-data": ("scrape_nj_dispensaries.py", "fetch the data.nj.gov dispensary dataset"),
+    "socrata":          ("njbuds.socrata", "paged, incremental pull of any Socrata dataset into data/interim/socrata"),
+    "scrape-rec":       ("scrape_crc_recreational_cards.py", "scrape recreational cards from the CRC map"),
+    "scrape-med":       ("scrape_crc_medicinal_cards.py", "scrape medicinal cards from the CRC map"),
+    "sources":          ("njbuds.sources.runner", "fetch every configured state's sources into one dataset"),
+    "resolve":          ("njbuds.resolve", "merge sources into one record per dispensary"),
+    "find-websites":    ("find_websites_via_search.py", "search for missing official websites"),
+    "stream":           ("stream_pipeline.py", "scrape, find websites and enrich in one streaming pass"),
+    "enrich-phones":    ("enrich_phones_from_sites.py", "fill phones by crawling official sites"),
+    "enrich-sites":     ("enrich_from_websites.py", "extract phone/email/socials/hours from sites"),
+    "platforms":        ("detect_menu_platforms.py", "detect menu platforms from cached pages"),
+    "geocode":          ("njbuds.geocode", "offline lat/lon with a persistent cache"),
+    "snapshot":         ("njbuds.snapshot", "publish a CSV as a JSONL snapshot"),
+    "changes":          ("njbuds.changefeed", "diff two snapshots into an added/removed/modified feed"),
+    "queue":            ("njbuds.taskqueue", "inspect / retry / clear the durable enrichment work queue"),
+    "load":             ("njbuds.storage", "bulk upsert into SQLite / PostgreSQL"),
+    "serve":            ("njbuds.service", "HTTP query service over the latest snapshot"),
+    "bench":            ("benchmarks/run.py", "time parsing/extraction hot paths on recorded fixtures"),
+    "stats":            (None, "row count, fill rates and top cities for a CSV"),
+    "export":           (None, "CSV -> csv / json / jsonl with chosen columns"),
+}
+
+DEFAULT_INPUTS = (
+    "nj_dispensaries_geocoded.csv", "nj_dispensaries_with_platforms.csv",
+    "nj_dispensaries_enriched.csv", "nj_dispensaries.csv", "nj_dispensaries_complete.csv",
+)
+
+def usage():
+    lines = ["usage: njbuds [--import-profile | --profile] <command> [args...]", "", "commands:"]
+    lines += [f"  {name:18s}{help_}" for name, (_, help_) in COMMANDS.items()]
+    lines += ["", "njbuds <command> --help for a command's own options"]
+    return "\n".join(lines)
+
+def default_input():
+    for name in DEFAULT_INPUTS:
+        if os.path.exists(name):
+            return name
+    raise SystemExit("No dataset CSV found; pass a path")
+
+def read_rows(path):
+    import csv
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def cmd_stats(argv):
+    import argparse
+    ap = argparse.ArgumentParser(prog="njbuds stats", description="Quick profile of a dataset CSV")
+    ap.add_argument("input", nargs="?")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args(argv)
+    path = args.input or default_input()
+    rows = read_rows(path)
+    cols = list(rows[0].keys()) if rows else []
+    print(f"{path}: {len(rows)} rows, {len(cols)} columns")
+    for c in cols:
+        filled = sum(1 for r in rows if (r.get(c) or "").strip() not in ("", "nan"))
+        print(f"  {c:20s}{filled:7d}  {100.0 * filled / max(len(rows), 1):5.1f}%")
+    for col in ("city", "platform", "geo_precision"):
+        if col not in cols:
+            continue
+        counts = {}
+        for r in rows:
+            v = (r.get(col) or "").strip() or "(blank)"
+            counts[v] = counts.get(v, 0) + 1
+        top = sorted(counts.items(), key=lambda kv: -kv[1])[:args.top]
+        print(f"top {col}: " + ", ".join(f"{k} ({n})" for k, n in top))
+
+def cmd_export(argv):
+    import argparse, csv, json
+    from njbuds.utils import norm_zip
+    ap = argparse.ArgumentParser(prog="njbuds export", description="Convert a dataset CSV")
+    ap.add_argument("input", nargs="?")
+    ap.add_argument("-f", "--format", choices=("csv", "json", "jsonl"), default="jsonl")
+    ap.add_argument("-o", "--output", default="-", help="file path, or - for stdout")
+    ap.add_argument("-c", "--columns", default="", help="comma separated (default: all)")
+    args = ap.parse_args(argv)
+    rows = read_rows(args.input or default_input())
+    cols = [c.strip() for c in args.columns.split(",") if c.strip()] or (list(rows[0]) if rows else [])
+    for r in rows:
+        if "zip" in r:
+            r["zip"] = norm_zip(r["zip"])
+    rows = [{c: r.get(c, "") for c in cols} for r in rows]
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.format == "csv":
+            w = csv.DictWriter(out, fieldnames=cols)
+            w.writeheader()
+            w.writerows(rows)
+        elif args.format == "json":
+            json.dump(rows, out, ensure_ascii=False, indent=1)
+            out.write("\n")
+        else:
+            for r in rows:
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.output != "-":
+        print(f"Wrote {len(rows)} rows to {args.output}")
+
+def run_script(script, argv):
+    import runpy
+    path = os.path.join(ROOT, script)
+    if not os.path.exists(path):
+        raise SystemExit(f"{script} not found; run njbuds from a checkout of the repository")
+    sys.argv = [path] + list(argv)
+    sys.path.insert(0, ROOT)   # as `python <script>` would, so scripts can import their neighbours
+    runpy.run_path(path, run_name="__main__")
+
+def import_profile(argv, top=15):
+    """Re-run under -X importtime and summarize the slowest imports (top two levels)."""
+    import subprocess
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.join(ROOT, "src") + os.pathsep + env.get("PYTHONPATH", "")
+    p = subprocess.run([sys.executable, "-X", "importtime", "-m", "njbuds"] + list(argv),
+                       stderr=subprocess.PIPE, text=True, env=env)
+    rows, other = [], []
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2]
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(parts[1]), int(parts[0]), depth, name.strip()))
+    if other:
+        print("\n".join(other), file=sys.stderr)
+    roots = sorted((r for r in rows if r[2] <= 1), reverse=True)[:top]
+    total = sum(r[1] for r in rows)
+    print(f"\nimport time: {total / 1000:.1f} ms across {len(rows)} modules", file=sys.stderr)
+    print(f"{'cumulative ms':>14s} {'self ms':>8s}  module", file=sys.stderr)
+    for cum, self_, _, name in roots:
+        print(f"{cum / 1000:14.1f} {self_ / 1000:8.1f}  {name}", file=sys.stderr)
+    return p.returncode
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "--import-profile":
+        raise SystemExit(import_profile(argv[1:]))
+    if argv and argv[0] == "--profile":
+        os.environ.setdefault("NJBUDS_PROFILE", "all")   # read when njbuds.profiling is imported
+        argv = argv[1:]
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        raise SystemExit(f"\nnjbuds: unknown command {name!r}")
+
+    target = COMMANDS[name][0]
+    if name == "stats":
+        return cmd_stats(rest)
+    if name == "export":
+        return cmd_export(rest)
+    if target.endswith(".py"):
+        return run_script(target, rest)
+    import importlib
+    return importlib.import_module(target).main(rest)
+
+if __name__ == "__main__":
+    main()
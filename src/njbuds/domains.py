@@ -0,0 +1,165 @@
+"""
+Domain-level crawling for multi-location chains (RISE, Curaleaf, Ascend, Zen Leaf ...).
+
+Rows are grouped by site domain. Each domain's pages are fetched once: the
+homepage, the contact/locations paths, and any on-site link whose URL or
+anchor text names one of the domain's cities. Then each row is matched to
+its own store, best evidence first:
+
+    jsonld   a schema.org location whose street/city matches the row
+    page     a page about the row's city/street, phone nearest the street mention
+    near     anywhere in the pages, the phone nearest the row's street
+
+A chain row with no store match gets no phone rather than the corporate one.
+
+    groups = group_by_domain(rows)                     # {domain: [row, ...]}
+    pages  = fetch_domain_pages(home_url, rows, fetch) # fetch(url) -> response or None
+    phone, fields, how = match_row(row, pages)
+"""
+import re
+from urllib.parse import urljoin, urlparse
+
+from njbuds import extractors, structured
+from njbuds.extractors import PHONE_RE, Page
+from njbuds.utils import clean, norm_street, norm_text
+
+CONTACT_PATHS = ("/contact", "/contact-us", "/locations", "/location", "/stores", "/dispensaries")
+MAX_CITY_PAGES = 3      # per row; on top of the fixed paths
+NEAR_WINDOW = 400       # chars either side of the street mention
+
+LOCATION_WORDS = ("location", "store", "dispensar", "visit")
+
+def domain_of(url):
+    u = clean(url)
+    if not u:
+        return ""
+    if not u.startswith(("http://", "https://")):
+        u = "https://" + u
+    h = urlparse(u).netloc.lower()
+    return h[4:] if h.startswith("www.") else h
+
+def group_by_domain(rows, col="website"):
+    """{domain: [rows]} in first-seen order; rows without a website are left out."""
+    groups = {}
+    for r in rows:
+        d = domain_of(r.get(col))
+        if d:
+            groups.setdefault(d, []).append(r)
+    return groups
+
+def city_slug(city):
+    return re.sub(r"[^a-z0-9]+", "-", norm_text(city)).strip("-")
+
+def street_pattern(street):
+    """Regex for '<number> ... <street name>' in lowercased page text, or None."""
+    toks = norm_street(street).split()
+    if not toks or not toks[0].isdigit():
+        return None
+    name = next((t for t in toks[1:] if len(t) >= 3 and t.isalpha()), "")
+    if not name:
+        return None
+    return re.compile(rf"\b{toks[0]}\b[^0-9]{{0,40}}?\b{re.escape(name)}")
+
+def fetch_domain_pages(home_url, rows, fetch, parse=None):
+    """Every page of one domain the rows might need, each fetched once -> [Page]."""
+    pages, seen = [], set()
+    parse = parse or Page.from_response
+
+    def get(url):
+        if url in seen:
+            return None
+        seen.add(url)
+        r = fetch(url)
+        if r is None or r.status_code >= 400:
+            return None
+        p = parse(r)
+        pages.append(p)
+        return p
+
+    home = get(home_url)
+    if home is None:
+        return pages
+    base = f"{urlparse(home.url).scheme}://{urlparse(home.url).netloc}"
+    for path in CONTACT_PATHS:
+        get(urljoin(base, path))
+
+    # on-site links that name a row's city, e.g. /locations/paterson or "Visit us in Paterson"
+    domain = domain_of(base)
+    candidates = [(href, text.lower()) for p in pages for href, text in p.links
+                  if domain_of(href) == domain]
+    for r in rows:
+        slug, city = city_slug(r.get("city")), norm_text(r.get("city"))
+        if not slug:
+            continue
+        hits = [h for h, t in candidates
+                if slug in h.lower() or (city and city in t and any(w in t or w in h.lower() for w in LOCATION_WORDS))]
+        for href in hits[:MAX_CITY_PAGES]:
+            get(href.split("#")[0])
+    return pages
+
+def _addr_match(rec, row):
+    street = norm_street(row.get("street"))
+    num = street.split()[0] if street else ""
+    same_city = norm_text(rec.get("city")) == norm_text(row.get("city"))
+    rec_street = norm_street(rec.get("street"))
+    if num and rec_street.startswith(num + " "):
+        return 2 if same_city else 1
+    return 1 if same_city and not rec_street else 0
+
+def phone_near(text, pat):
+    best, best_d = "", None
+    for m in pat.finditer(text):
+        lo, hi = max(0, m.start() - NEAR_WINDOW), m.end() + NEAR_WINDOW
+        for pm in PHONE_RE.finditer(text, lo, hi):
+            phone = structured.fmt_phone(pm.group(0))
+            d = abs(pm.start() - m.start())
+            if phone and (best_d is None or d < best_d):
+                best, best_d = phone, d
+    return best
+
+def match_row(row, pages):
+    """(phone, fields, how) for one location row from its domain's pages."""
+    # 1) structured per-store records
+    best, best_score = None, 0
+    for p in pages:
+        for rec in structured.locations(p.html):
+            s = _addr_match(rec, row)
+            if s > best_score and rec.get("phone"):
+                best, best_score = rec, s
+    if best is not None and best_score == 2:
+        return best["phone"], {"jsonld": best, "hours": best.get("hours", "")}, "jsonld"
+
+    pat = street_pattern(row.get("street"))
+    slug, city = city_slug(row.get("city")), norm_text(row.get("city"))
+
+    # 2) a page about this store
+    scored = []
+    for p in pages:
+        text = p.text.lower()
+        s = 0
+        if slug and slug in p.url.lower():
+            s += 2
+        if pat is not None and pat.search(text):
+            s += 3
+        elif city and city in text:
+            s += 1
+        if s >= 3:
+            scored.append((s, p, text))
+    scored.sort(key=lambda t: -t[0])
+    for s, p, text in scored:
+        phone = phone_near(text, pat) if pat is not None else ""
+        if not phone and slug and slug in p.url.lower():
+            phone = extractors.phone(p)   # a dedicated store page: its phone is the store's
+        if phone:
+            return phone, extractors.run(p, ["hours", "email", "platform", "socials"]), "page"
+
+    # 3) the phone printed nearest the street anywhere on the site
+    if pat is not None:
+        for p in pages:
+            phone = phone_near(p.text.lower(), pat)
+            if phone:
+                return phone, {}, "near"
+
+    if best is not None:
+        return best["phone"], {"jsonld": best, "hours": best.get("hours", "")}, "jsonld"
+    return "", {}, ""
@@ -0,0 +1,188 @@
+"""
+Extractor registry: fetch a page once, pull every field from it.
+
+A Page wraps one fetched document and builds each representation (soup,
+visible text, links, schema.org data) lazily, at most once, whichever
+extractor asks first. Extractors are plain functions registered by field
+name. Adding a field costs CPU on pages already fetched, never another
+request.
+
+    @extractor("menu_url")
+    def menu_url(page): ...
+
+    page = Page(url, html)
+    run(page)                       ->  {"phone": "...", "email": "...", "socials": [...], ...}
+    merge([run(p) for p in pages])  ->  first non-empty value per field, lists unioned
+"""
+import html as _html
+import logging, re
+from functools import cached_property
+from urllib.parse import urljoin, urlparse
+
+from njbuds import metrics, profiling, structured
+
+EXTRACTORS = {}
+# what malformed markup or a missing key can raise; anything else is a bug and propagates
+EXTRACT_ERRORS = (ValueError, KeyError, IndexError, UnicodeError)
+
+log = logging.getLogger(__name__)
+
+PHONE_RE = re.compile(r"""
+    (?:
+      (?:\+?1[\s\-\.\)]*)?              # optional country code
+      (?:\(?\d{3}\)?[\s\-\.\)]*)        # area code
+      \d{3}[\s\-\.\)]*\d{4}             # local number
+    )
+""", re.VERBOSE)
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
+MAILTO_RE = re.compile(r"""\bhref\s*=\s*["']?\s*mailto:([^"'?>\s]+)""", re.I)
+HREF_RE = re.compile(r"""\bhref\s*=\s*["']?\s*(https?://[^"'>\s]+)""", re.I)
+EMAIL_JUNK = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", "example.com", "sentry", "wixpress.com")
+
+SOCIAL_HOSTS = ("facebook.com","instagram.com","twitter.com","x.com","youtube.com","tiktok.com","linktr.ee")
+
+class Page:
+    def __init__(self, url, html):
+        self.url = url or ""
+        self.html = html or ""
+        self.extracted = {}   # run() results, kept so a page is never extracted twice
+
+    @classmethod
+    def from_response(cls, r):
+        return cls(r.url, r.text)
+
+    @cached_property
+    def soup(self):
+        from bs4 import BeautifulSoup
+        with profiling.span("parse"):
+            return BeautifulSoup(self.html, "lxml")
+
+    @cached_property
+    def text(self):
+        return self.soup.get_text(" ", strip=True)
+
+    @cached_property
+    def links(self):
+        """(absolute href, anchor text) for every <a href>; hrefs urljoin rejects are skipped."""
+        out = []
+        for a in self.soup.select("a[href]"):
+            href = a.get("href", "").strip()
+            if not href:
+                continue
+            try:
+                href = urljoin(self.url, href) if self.url else href
+            except ValueError:   # e.g. an unclosed IPv6 host: "http://[bad"
+                log.debug("bad link %r on %s", href, self.url)
+                continue
+            out.append((href, a.get_text(" ", strip=True)))
+        return out
+
+    @cached_property
+    def structured(self):
+        return structured.extract(self.html)
+
+def extractor(name):
+    def register(fn):
+        EXTRACTORS[name] = fn
+        return fn
+    return register
+
+def run(page, names=None):
+    """{field: value} from every registered extractor (or just `names`)."""
+    out, done = {}, page.extracted
+    with profiling.span("extract"):
+        for name in names or EXTRACTORS:
+            if name not in done:
+                try:
+                    done[name] = EXTRACTORS[name](page)
+                except EXTRACT_ERRORS as e:
+                    # one bad page never costs the other extractors
+                    metrics.error(f"extract_{name}_{type(e).__name__}")
+                    log.debug("extractor %s failed on %s: %r", name, page.url, e)
+                    done[name] = ""
+            out[name] = done[name]
+    return out
+
+def merge(results):
+    """Combine per-page results: first non-empty scalar wins, lists are unioned in order."""
+    out = {}
+    for res in results:
+        for k, v in res.items():
+            if isinstance(v, list):
+                cur = out.setdefault(k, [])
+                cur.extend(x for x in v if x not in cur)
+            elif v and not out.get(k):
+                out[k] = v
+            else:
+                out.setdefault(k, v)
+    return out
+
+# ---------- built-in extractors ----------
+
+@extractor("jsonld")
+def jsonld(page):
+    return page.structured
+
+@extractor("phone")
+def phone(page):
+    # schema.org telephone needs no DOM parse; tel: links and text regex only without it
+    if page.structured.get("phone"):
+        return page.structured["phone"]
+    for href, _ in page.links:
+        if href.lower().startswith("tel:"):
+            p = structured.fmt_phone(href[4:])
+            if p:
+                return p
+    for m in PHONE_RE.finditer(page.text):
+        p = structured.fmt_phone(m.group(0))
+        if p:
+            return p
+    return ""
+
+def _is_social(href):
+    h = urlparse(href).netloc.lower()
+    return any(h == s or h.endswith("." + s) for s in SOCIAL_HOSTS)
+
+@extractor("email")
+def email(page):
+    # regexes over the raw page first; the soup only for what they miss (e.g. entity-encoded hrefs)
+    m = MAILTO_RE.search(page.html)
+    if m:
+        return _html.unescape(m.group(1)).strip()
+    for m in EMAIL_RE.finditer(page.html):
+        e = m.group(0)
+        if not any(j in e.lower() for j in EMAIL_JUNK):
+            return e
+    for href, _ in page.links:
+        if href.lower().startswith("mailto:"):
+            return href[7:].split("?")[0].strip()
+    return ""
+
+@extractor("socials")
+def socials(page):
+    low = page.html.lower()
+    if not any(s in low for s in SOCIAL_HOSTS):
+        return []
+    out = []
+    for m in HREF_RE.finditer(page.html):
+        href = _html.unescape(m.group(1))
+        if _is_social(href) and href not in out:
+            out.append(href)
+    for href, _ in ([] if out else page.links):
+        if _is_social(href) and href not in out:
+            out.append(href)
+    return out
+
+_matcher = None
+
+@extractor("platform")
+def platform(page):
+    global _matcher
+    if _matcher is None:
+        from njbuds.platforms import SignatureMatcher
+        _matcher = SignatureMatcher()
+    return _matcher.classify(page.html)[0]
+
+@extractor("hours")
+def hours(page):
+    return page.structured.get("hours", "")
@@ -0,0 +1,165 @@
+"""
+Bounded best-first crawl of one site for a location's phone number.
+
+Instead of walking a fixed list of paths, the crawler keeps a heapq frontier
+of on-site links. Each link is scored by its anchor text ("Contact", "Visit
+us", the row's city), the tokens in its URL, and its depth. The best link is
+always fetched next. Each fetched page is scored for how sure its phone is
+(schema.org data, nearness to the row's street, the city in the URL). The
+crawl stops at the first answer that reaches CONFIDENT, or when the page or
+depth budget runs out.
+
+Seen URLs are kept as 8-byte blake2b digests of the normalized URL, not as
+the strings themselves.
+
+    res = crawl(start_url, fetch, city="Paterson", street="26 Park Ave")
+    res.phone, res.confidence, res.url, res.fetched, res.pages
+"""
+import hashlib, heapq, re
+from urllib.parse import urljoin, urlparse
+
+from njbuds import extractors
+from njbuds.domains import city_slug, domain_of, phone_near, street_pattern
+from njbuds.extractors import Page
+from njbuds.utils import norm_text
+
+MAX_PAGES = 8       # fetch attempts per site, including 404s
+MAX_DEPTH = 2
+CONFIDENT = 0.8
+
+# Guessed paths are seeded with a small discount: a real link with the same
+# words beats a guess.
+GUESS_PATHS = ("/contact", "/contact-us", "/locations", "/location", "/about")
+GUESS_DISCOUNT = 1.0
+
+ANCHOR_WEIGHTS = {
+    "contact": 5.0, "visit": 4.0, "find us": 4.0, "location": 4.0, "directions": 3.0,
+    "store": 3.0, "hours": 2.0, "about": 2.0, "dispensar": 2.0, "call": 2.0,
+}
+URL_WEIGHTS = {
+    "contact": 4.0, "location": 3.5, "store": 3.0, "visit": 3.0, "dispensar": 2.0,
+    "about": 1.5, "hours": 1.5,
+}
+NEGATIVE = ("blog", "news", "product", "cart", "checkout", "login", "account", "career",
+            "jobs", "privacy", "terms", "press", "menu", "shop", "deals", "review", "event")
+SKIP_EXT = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".zip", ".mp4",
+            ".css", ".js", ".xml", ".ico")
+CITY_URL, CITY_ANCHOR = 6.0, 5.0
+DEPTH_COST = 1.0
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+class CrawlResult:
+    def __init__(self):
+        self.phone = ""
+        self.confidence = 0.0
+        self.url = ""         # page the phone came from
+        self.fetched = 0      # fetch attempts made
+        self.pages = []       # every Page fetched, for extractors.run/merge
+
+def url_key(url):
+    """Compact seen-set entry: scheme-less, query/fragment-less, trailing-slash-less digest."""
+    p = urlparse(url)
+    host = p.netloc.lower()
+    host = host[4:] if host.startswith("www.") else host
+    norm = f"{host}{p.path.rstrip('/').lower()}"
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest()
+
+def link_score(url, anchor, slug="", city=""):
+    path = urlparse(url).path.lower()
+    anchor = norm_text(anchor)
+    s = 0.0
+    for word, w in ANCHOR_WEIGHTS.items():
+        if word in anchor:
+            s += w
+    toks = " ".join(_TOKEN_RE.findall(path))
+    for word, w in URL_WEIGHTS.items():
+        if word in toks:
+            s += w
+    if slug and slug in path:
+        s += CITY_URL
+    if city and city in anchor:
+        s += CITY_ANCHOR
+    if any(n in toks for n in NEGATIVE):
+        s -= 4.0
+    return s
+
+def assess(page, slug="", city="", pat=None):
+    """(phone, confidence) for one page relative to the target location."""
+    text = page.text.lower()
+    store_url = bool(slug) and slug in page.url.lower()
+    if pat is not None:
+        # a city name in the nav is not enough once we know the street
+        about_here = store_url or bool(pat.search(text))
+    else:
+        about_here = (not city) or store_url or city in text
+    sd = page.structured
+    if sd.get("phone"):
+        same = not city or norm_text(sd.get("city")) == city or store_url
+        return sd["phone"], (1.0 if same else 0.6)
+    if pat is not None:
+        phone = phone_near(text, pat)
+        if phone:
+            return phone, 0.9
+    phone = extractors.phone(page)
+    if not phone:
+        return "", 0.0
+    return phone, (0.8 if about_here else 0.6 if city and city in text else 0.5)
+
+def crawl(start_url, fetch, city="", street="", max_pages=MAX_PAGES, max_depth=MAX_DEPTH,
+          confident=CONFIDENT, guess_paths=GUESS_PATHS, parse=None):
+    """
+    Best-first crawl from start_url. fetch(url) returns a response (with .url,
+    .status_code and .text) or None; parse(response) makes the Page (default
+    Page.from_response, or a parsepool's parse to do it in another process).
+    """
+    parse = parse or Page.from_response
+    res = CrawlResult()
+    domain = domain_of(start_url)
+    slug, city_n = city_slug(city), norm_text(city)
+    pat = street_pattern(street) if street else None
+    seen, heap, order = set(), [], 0
+
+    def push(url, score, depth):
+        nonlocal order
+        key = url_key(url)
+        if key in seen:
+            return
+        seen.add(key)
+        order += 1
+        heapq.heappush(heap, (-score, order, url, depth))
+
+    push(start_url, float("inf"), 0)
+    while heap and res.fetched < max_pages:
+        _, _, url, depth = heapq.heappop(heap)
+        res.fetched += 1
+        r = fetch(url)
+        if r is None or r.status_code >= 400:
+            continue
+        page = parse(r)
+        res.pages.append(page)
+        seen.add(url_key(r.url))  # redirects land on a URL that may also be linked
+
+        phone, conf = assess(page, slug, city_n, pat)
+        if conf > res.confidence:
+            res.phone, res.confidence, res.url = phone, conf, page.url
+        if res.confidence >= confident:
+            break
+
+        if depth == 0:
+            domain = domain_of(page.url)   # follow the site we were redirected to
+        if depth < max_depth:
+            for href, anchor in page.links:
+                href = href.split("#")[0]
+                low = href.lower()
+                if not low.startswith(("http://", "https://")) or low.endswith(SKIP_EXT):
+                    continue
+                if domain_of(href) != domain:
+                    continue
+                push(href, link_score(href, anchor, slug, city_n) - DEPTH_COST * (depth + 1), depth + 1)
+        if depth == 0:
+            # after the real links, so a linked /contact keeps its anchor-text score
+            base = f"{urlparse(page.url).scheme}://{urlparse(page.url).netloc}"
+            for path in guess_paths:
+                push(urljoin(base, path), link_score(path, "", slug) - DEPTH_COST - GUESS_DISCOUNT, 1)
+    return res
@@ -0,0 +1,231 @@
+"""
+Offline geocoder: street, city, zip -> lat/lon with no network calls.
+
+Lookups run as whole-column pandas joins against a local gazetteer, best
+precision first:
+
+    address   config/nj_address_ranges.csv (optional; interpolated along a range)
+    zip       bundled centroids of all 732 NJ 5-digit zips; config/nj_zip_centroids.csv
+              or a Census ZCTA gazetteer file overrides them
+    city      bundled municipality and postal-place centroids (+ config/nj_municipalities.csv)
+    zip3      bundled sectional-center centroids (always covers 070xx-089xx)
+    state     NJ centroid, so every row gets coordinates
+
+The bundled zip table comes from the USPS-based `zipcodes` package data. A
+postal place without its own municipality centroid gets the mean of its
+standard zips.
+
+Rows that already carry lat/lon (published in a site's schema.org data by
+enrich_from_websites.py) keep them, with precision "site".
+
+Results are cached in CACHE keyed by the normalized address and tagged with
+a hash of the gazetteer files. A re-run resolves only addresses it has never
+seen, and it skips loading the gazetteer entirely when everything hits. Any
+change to a gazetteer file makes every cached entry stale, so coarse
+zip3/state results are re-resolved once better data is available.
+
+    python -m njbuds.geocode [input.csv] [-o output.csv]
+"""
+import argparse, hashlib, os, time
+import numpy as np
+import pandas as pd
+
+from njbuds import metrics
+from njbuds.utils import norm_street, norm_zip, normalize_zips
+
+INPUT = "nj_dispensaries_complete.csv"
+OUTPUT = "nj_dispensaries_geocoded.csv"
+CACHE = os.path.join("data", "interim", "geocode_cache.csv")
+CONFIG_DIR = "config"
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+ZIP_FILES = ("nj_zip_centroids.csv", "2020_Gaz_zcta_national.txt", "2023_Gaz_zcta_national.txt")
+RANGE_FILE = "nj_address_ranges.csv"
+STATE_CENTROID = (40.0583, -74.4057)
+
+MUNI_SUFFIX_RE = r"\s+(township|twp|borough|boro|city|town|village)$"
+
+PRECISIONS = ("site", "address", "zip", "city", "zip3", "state")
+
+def _norm_city(s):
+    return s.fillna("").astype(str).str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+
+def _read_zip_file(path):
+    if path.endswith(".txt"):  # Census gazetteer: tab separated, padded header
+        df = pd.read_csv(path, sep="\t", dtype=str)
+        df.columns = [c.strip() for c in df.columns]
+        df = df.rename(columns={"GEOID": "zip", "INTPTLAT": "lat", "INTPTLONG": "lon"})
+    else:
+        df = pd.read_csv(path, dtype=str)
+    df = df[["zip","lat","lon"]].dropna()
+    df["zip"] = df["zip"].map(norm_zip)
+    return df.astype({"lat": float, "lon": float}).drop_duplicates("zip").set_index("zip")
+
+def gazetteer_files(config_dir=CONFIG_DIR):
+    """Every file load_gazetteer() reads, in the order it reads them."""
+    files = [os.path.join(BUNDLED_DIR, n) for n in ("nj_zip3.csv", "nj_municipalities.csv", "nj_zip_centroids.csv")]
+    files += [p for p in (os.path.join(config_dir, n) for n in ("nj_municipalities.csv",) + ZIP_FILES + (RANGE_FILE,))
+              if os.path.exists(p)]
+    return files
+
+def gazetteer_version(config_dir=CONFIG_DIR):
+    """Short content hash of the gazetteer; cache entries from another version are stale."""
+    h = hashlib.sha1()
+    for path in gazetteer_files(config_dir):
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+def load_gazetteer(config_dir=CONFIG_DIR):
+    """Return the lookup tables; "ranges" is None when its file is absent."""
+    gaz = {"ranges": None}
+
+    zip3 = pd.read_csv(os.path.join(BUNDLED_DIR, "nj_zip3.csv"), dtype={"zip3": str})
+    gaz["zip3"] = zip3.set_index("zip3")[["lat","lon"]]
+
+    cities = [pd.read_csv(os.path.join(BUNDLED_DIR, "nj_municipalities.csv"))]
+    extra = os.path.join(config_dir, "nj_municipalities.csv")
+    if os.path.exists(extra):
+        cities.append(pd.read_csv(extra))
+    city = pd.concat(cities, ignore_index=True)
+    city["city"] = _norm_city(city["city"])
+    gaz["city"] = city.drop_duplicates("city", keep="last").set_index("city")[["lat","lon"]]
+
+    gaz["zip"] = _read_zip_file(os.path.join(BUNDLED_DIR, "nj_zip_centroids.csv"))
+    for name in ZIP_FILES:
+        path = os.path.join(config_dir, name)
+        if os.path.exists(path):
+            local = _read_zip_file(path)
+            gaz["zip"] = pd.concat([local, gaz["zip"][~gaz["zip"].index.isin(local.index)]])
+            break
+
+    path = os.path.join(config_dir, RANGE_FILE)
+    if os.path.exists(path):
+        # columns: street,zip,from_num,to_num,from_lat,from_lon,to_lat,to_lon
+        r = pd.read_csv(path, dtype={"street": str, "zip": str})
+        r["street"] = r["street"].map(norm_street)
+        r["zip"] = r["zip"].map(norm_zip)
+        gaz["ranges"] = r
+    return gaz
+
+def normalize_addresses(df):
+    """Whole-column address normalization; returns a frame with street/city/zip/key."""
+    a = pd.DataFrame({
+        "street": df.get("street", pd.Series("", index=df.index)).map(norm_street),
+        "city": _norm_city(df.get("city", pd.Series("", index=df.index))),
+        "zip": normalize_zips(df.get("zip", pd.Series("", index=df.index)))[0],
+    }, index=df.index)
+    a["key"] = a["street"] + "|" + a["city"] + "|" + a["zip"]
+    return a
+
+def _interpolate_ranges(addr, ranges):
+    parts = addr["street"].str.extract(r"^(?P<num>\d+)[a-z]?\s+(?P<name>.+)$")
+    q = addr.assign(num=pd.to_numeric(parts["num"], errors="coerce"), name=parts["name"])
+    q = q.dropna(subset=["num"]).reset_index().rename(columns={"index": "_row"})
+    ranges = ranges.assign(name=ranges["street"].str.replace(r"^\d+[a-z]?\s+", "", regex=True))
+    m = q.merge(ranges.drop(columns=["street"]), on=["name","zip"], how="inner")
+    m = m[(m["num"] >= m["from_num"]) & (m["num"] <= m["to_num"])]
+    if m.empty:
+        return pd.DataFrame(columns=["lat","lon"])
+    span = (m["to_num"] - m["from_num"]).replace(0, 1)
+    t = ((m["num"] - m["from_num"]) / span).clip(0, 1)
+    m = m.assign(lat=m["from_lat"] + t * (m["to_lat"] - m["from_lat"]),
+                 lon=m["from_lon"] + t * (m["to_lon"] - m["from_lon"]))
+    return m.drop_duplicates("_row").set_index("_row")[["lat","lon"]]
+
+def resolve_batch(addr, gaz):
+    """Geocode unique normalized addresses; every row comes back with coordinates."""
+    out = pd.DataFrame({"lat": np.nan, "lon": np.nan, "precision": ""}, index=addr.index)
+
+    def fill(found, precision):
+        need = out["lat"].isna() & found["lat"].notna()
+        out.loc[need, ["lat","lon"]] = found.loc[need, ["lat","lon"]].values
+        out.loc[need, "precision"] = precision
+
+    if gaz["ranges"] is not None and len(addr):
+        fill(_interpolate_ranges(addr, gaz["ranges"]).reindex(addr.index), "address")
+    fill(gaz["zip"].reindex(addr["zip"]).set_index(addr.index), "zip")
+    fill(gaz["city"].reindex(addr["city"]).set_index(addr.index), "city")
+    # "Neptune Township" -> "neptune": municipal suffixes that postal place names drop
+    bare = addr["city"].str.replace(MUNI_SUFFIX_RE, "", regex=True)
+    fill(gaz["city"].reindex(bare).set_index(addr.index), "city")
+    fill(gaz["zip3"].reindex(addr["zip"].str[:3]).set_index(addr.index), "zip3")
+
+    rest = out["lat"].isna()
+    out.loc[rest, "lat"], out.loc[rest, "lon"] = STATE_CENTROID
+    out.loc[rest, "precision"] = "state"
+    return out
+
+def load_cache(path=CACHE, version=None):
+    """Cached results; with version, entries from any other gazetteer version are dropped."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["lat","lon","precision","gazetteer"], index=pd.Index([], name="key"))
+    c = pd.read_csv(path, dtype={"key": str, "precision": str}, keep_default_na=False)
+    if "gazetteer" not in c.columns:
+        c["gazetteer"] = ""
+    c["gazetteer"] = c["gazetteer"].astype(str)
+    if version is not None:
+        c = c[c["gazetteer"] == version]
+    return c.set_index("key")[["lat","lon","precision","gazetteer"]]
+
+def save_cache(cache, path=CACHE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    cache.reset_index().to_csv(tmp, index=False, encoding="utf-8")
+    os.replace(tmp, path)
+
+def geocode(df, cache_path=CACHE, config_dir=CONFIG_DIR):
+    """Return df with lat, lon and geo_precision columns, plus (rows from cache, rows resolved) counts."""
+    addr = normalize_addresses(df)
+    version = gazetteer_version(config_dir)
+    cache = load_cache(cache_path, version)
+    cached = addr["key"].isin(cache.index)
+    miss = addr[~cached].drop_duplicates("key")
+    if len(miss):
+        found = resolve_batch(miss, load_gazetteer(config_dir)).assign(gazetteer=version)
+        found.index = pd.Index(miss["key"].values, name="key")
+        cache = pd.concat([cache, found])
+        save_cache(cache, cache_path)
+
+    hit = cache.reindex(addr["key"].values)
+    out = df.copy()
+    lat = hit["lat"].astype(float).round(6).values
+    lon = hit["lon"].astype(float).round(6).values
+    precision = hit["precision"].values
+    if "lat" in df and "lon" in df:
+        site_lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy()
+        site_lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy()
+        site = ~(np.isnan(site_lat) | np.isnan(site_lon))
+        lat = np.where(site, site_lat, lat)
+        lon = np.where(site, site_lon, lon)
+        precision = np.where(site, "site", precision)
+    out["lat"], out["lon"], out["geo_precision"] = lat, lon, precision
+    hits = int(cached.sum())
+    return out, hits, len(addr) - hits
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline batch geocoding with a persistent cache")
+    ap.add_argument("input", nargs="?", default=INPUT)
+    ap.add_argument("-o", "--output", default=OUTPUT)
+    ap.add_argument("--cache", default=CACHE)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with metrics.stage("geocode") as st:
+        df = pd.read_csv(args.input, dtype=str, keep_default_na=False)
+        out, hits, misses = geocode(df, args.cache)
+        st.rows = len(out)
+    secs = time.perf_counter() - t0
+    metrics.count("geocode_cache_hits", hits)
+    metrics.count("geocode_cache_misses", misses)
+    out.to_csv(args.output, index=False, encoding="utf-8")
+
+    counts = out["geo_precision"].value_counts()
+    print(f"Geocoded {len(out)} rows in {secs:.3f}s ({hits} rows from cache, {misses} resolved)")
+    print("  precision: " + ", ".join(f"{p}={counts.get(p, 0)}" for p in PRECISIONS))
+    print(f"Wrote {args.output}")
+    metrics.write("geocode")
+
+if __name__ == "__main__":
+    main()
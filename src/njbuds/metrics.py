@@ -0,0 +1,213 @@
+"""
+Run metrics shared by every stage: timings, throughput, and fetch health.
+
+One process-wide registry, thread safe, that costs a dict update per event.
+It records:
+- stage wall time and rows/s
+- per-host request latency histograms
+- bytes fetched, page cache hits and misses, retries
+- errors by class (ReadTimeout, SSLError, http_404 ...)
+pagecache.fetch reports every request on its own, so stages only wrap their
+main work in stage().
+
+    with metrics.stage("enrich_sites") as st:
+        ...
+        st.rows = len(rows)
+    metrics.write()    # data/interim/metrics/<run>.json + njbuds.prom
+
+Worker processes dump() their registry and the parent merge()s it, so a
+multi-process stage still writes one report.
+
+The JSON report answers "where did the time go". The .prom file is in the
+Prometheus textfile-collector format (node_exporter --collector.textfile).
+Set NJBUDS_METRICS_DIR to change where both go.
+"""
+import json, os, sys, threading, time
+from contextlib import contextmanager
+
+from njbuds import profiling
+
+METRICS_DIR = os.getenv("NJBUDS_METRICS_DIR", os.path.join("data", "interim", "metrics"))
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOP_HOSTS = 25   # hosts listed individually in the report (all go to Prometheus)
+
+_lock = threading.Lock()
+_stages = {}        # name -> {"seconds", "rows", "runs"}
+_hosts = {}         # host -> {"requests", "bytes", "seconds", "buckets": [...], "errors"}
+_counters = {"cache_hits": 0, "cache_misses": 0, "retries": 0, "bytes": 0, "requests": 0}
+_errors = {}        # class -> count
+_started = time.time()
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+
+@contextmanager
+def stage(name, rows=0):
+    st = _Stage(name)
+    st.rows = rows
+    t0 = time.perf_counter()
+    try:
+        with profiling.profile(name):   # no-op unless NJBUDS_PROFILE is set
+            yield st
+    finally:
+        secs = time.perf_counter() - t0
+        with _lock:
+            rec = _stages.setdefault(name, {"seconds": 0.0, "rows": 0, "runs": 0})
+            rec["seconds"] += secs
+            rec["rows"] += st.rows
+            rec["runs"] += 1
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def error(kind, host=""):
+    with _lock:
+        _errors[kind] = _errors.get(kind, 0) + 1
+        if host:
+            _host(host)["errors"] += 1
+
+def _host(host):
+    h = _hosts.get(host)
+    if h is None:
+        h = _hosts[host] = {"requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0,
+                            "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+    return h
+
+def observe_request(host, seconds, nbytes=0, status=None):
+    """One live (non-cached) request; status >= 400 is also counted as an error."""
+    with _lock:
+        h = _host(host)
+        h["requests"] += 1
+        h["bytes"] += nbytes
+        h["seconds"] += seconds
+        i = 0
+        while i < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[i]:
+            i += 1
+        h["buckets"][i] += 1
+        _counters["requests"] += 1
+        _counters["bytes"] += nbytes
+    if status is not None and status >= 400:
+        error(f"http_{status}", host)
+
+def observe_cache(hit):
+    count("cache_hits" if hit else "cache_misses")
+
+def report():
+    with _lock:
+        stages = {k: dict(v, rows_per_sec=round(v["rows"] / v["seconds"], 1) if v["seconds"] else None,
+                          seconds=round(v["seconds"], 3))
+                  for k, v in _stages.items()}
+        hosts = sorted(_hosts.items(), key=lambda kv: -kv[1]["seconds"])
+        lookups = _counters["cache_hits"] + _counters["cache_misses"]
+        return {
+            "started": _started,
+            "wall_seconds": round(time.time() - _started, 3),
+            "argv": sys.argv,
+            "stages": stages,
+            "counters": dict(_counters),
+            "cache_hit_rate": round(_counters["cache_hits"] / lookups, 3) if lookups else None,
+            "errors": dict(sorted(_errors.items(), key=lambda kv: -kv[1])),
+            "latency_buckets": list(LATENCY_BUCKETS),
+            "hosts": {h: dict(v, seconds=round(v["seconds"], 3),
+                              mean_ms=round(1000 * v["seconds"] / v["requests"], 1) if v["requests"] else None)
+                      for h, v in hosts[:TOP_HOSTS]},
+            "hosts_total": len(hosts),
+        }
+
+def _label(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def prometheus(run=""):
+    """Prometheus text exposition of the current registry."""
+    rep = report()
+    lines = []
+    def metric(name, kind, help_, samples):
+        lines.append(f"# HELP njbuds_{name} {help_}")
+        lines.append(f"# TYPE njbuds_{name} {kind}")
+        for labels, value in samples:
+            lab = ",".join(f'{k}="{_label(v)}"' for k, v in (("run", run),) + tuple(labels) if v != "")
+            lines.append(f"njbuds_{name}{{{lab}}} {value}")
+
+    metric("stage_seconds", "gauge", "Wall time per stage.",
+           [((("stage", k),), v["seconds"]) for k, v in rep["stages"].items()])
+    metric("stage_rows", "gauge", "Rows processed per stage.",
+           [((("stage", k),), v["rows"]) for k, v in rep["stages"].items()])
+    for c in ("requests", "bytes", "cache_hits", "cache_misses", "retries"):
+        metric(f"fetch_{c}_total", "counter", f"Fetch {c.replace('_', ' ')}.", [((), rep["counters"].get(c, 0))])
+    metric("fetch_errors_total", "counter", "Fetch errors by class.",
+           [((("class", k),), v) for k, v in rep["errors"].items()])
+
+    with _lock:
+        hosts = {h: dict(v, buckets=list(v["buckets"])) for h, v in _hosts.items()}
+    lines.append("# HELP njbuds_request_seconds Live request latency per host.")
+    lines.append("# TYPE njbuds_request_seconds histogram")
+    for host, v in sorted(hosts.items()):
+        base = f'run="{_label(run)}",host="{_label(host)}"' if run else f'host="{_label(host)}"'
+        cum = 0
+        for le, n in zip(LATENCY_BUCKETS + ("+Inf",), v["buckets"]):
+            cum += n
+            lines.append(f'njbuds_request_seconds_bucket{{{base},le="{le}"}} {cum}')
+        lines.append(f"njbuds_request_seconds_sum{{{base}}} {v['seconds']:.6f}")
+        lines.append(f"njbuds_request_seconds_count{{{base}}} {v['requests']}")
+    return "\n".join(lines) + "\n"
+
+def _atomic_write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+def write(run=None, out_dir=None):
+    """Write <run>.json and <run>.prom; returns the JSON path."""
+    out_dir = out_dir or METRICS_DIR
+    run = run or (next(iter(_stages), None) or os.path.splitext(os.path.basename(sys.argv[0]))[0] or "run")
+    path = os.path.join(out_dir, f"{run}.json")
+    _atomic_write(path, json.dumps(report(), indent=1) + "\n")
+    _atomic_write(os.path.join(out_dir, f"{run}.prom"), prometheus(run))
+    return path
+
+def dump(path):
+    """Write the raw registry, for a parent process to merge() into its own."""
+    with _lock:
+        state = json.dumps({"stages": _stages, "hosts": _hosts, "counters": _counters, "errors": _errors})
+    _atomic_write(path, state)
+
+def merge(path):
+    """Add a registry written by dump() (a worker process) into this one."""
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    with _lock:
+        for name, v in state["stages"].items():
+            rec = _stages.setdefault(name, {"seconds": 0.0, "rows": 0, "runs": 0})
+            for k in rec:
+                rec[k] += v[k]
+        for host, v in state["hosts"].items():
+            h = _host(host)
+            for k in ("requests", "bytes", "seconds", "errors"):
+                h[k] += v[k]
+            h["buckets"] = [a + b for a, b in zip(h["buckets"], v["buckets"])]
+        for k, n in state["counters"].items():
+            _counters[k] = _counters.get(k, 0) + n
+        for k, n in state["errors"].items():
+            _errors[k] = _errors.get(k, 0) + n
+
+def summary():
+    """A few lines for a stage's console output / log file."""
+    rep = report()
+    out = []
+    for k, v in rep["stages"].items():
+        rate = f", {v['rows_per_sec']} rows/s" if v["rows_per_sec"] is not None else ""
+        out.append(f"stage {k}: {v['seconds']}s, {v['rows']} rows{rate}")
+    c = rep["counters"]
+    if c["requests"] or c["cache_hits"]:
+        hit = f"{100 * rep['cache_hit_rate']:.0f}%" if rep["cache_hit_rate"] is not None else "-"
+        out.append(f"fetch: {c['requests']} requests, {c['bytes'] / 1e6:.1f} MB, cache hit {hit}, retries {c['retries']}")
+    if rep["errors"]:
+        out.append("errors: " + ", ".join(f"{k} {v}" for k, v in rep["errors"].items()))
+    slow = [(h, v) for h, v in rep["hosts"].items() if v["requests"]][:3]
+    if slow:
+        out.append("slowest hosts: " + ", ".join(f"{h} {v['seconds']}s/{v['requests']} req" for h, v in slow))
+    return "\n".join(out)
@@ -0,0 +1,285 @@
+"""
+Run the pipeline as a DAG of stages, skipping what is up to date.
+
+Each stage declares its command, the artifacts it reads, and the artifacts it
+writes. A stage runs in its own scratch directory, data/interim/stages/<name>/.
+Its inputs are copied in under the file names the script expects, and its
+outputs are copied back out to distinct artifact paths. So three scripts that
+all write "nj_dispensaries.csv" no longer overwrite each other.
+
+A stage is skipped when its key is unchanged and its recorded outputs are
+still on disk untouched. The key is a hash of its command, its script, the
+njbuds package (code and bundled data, which every script imports) and the
+content of every input. Source stages (no inputs) are refreshed once they
+are older than their max_age. Stages whose dependencies are done run
+concurrently as subprocesses, up to --jobs at a time (default: all cores).
+
+    python -m njbuds.orchestrator                 # refresh whatever is stale
+    python -m njbuds.orchestrator --dry-run       # show what would run
+    python -m njbuds.orchestrator --force scrape_open_data --only resolve
+"""
+import argparse, glob, hashlib, json, os, shutil, subprocess, sys, time
+import concurrent.futures as cf
+from functools import lru_cache
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+SRC = os.path.join(ROOT, "src")
+PACKAGE = os.path.join(SRC, "njbuds")
+STAGE_DIR = os.path.join(ROOT, "data", "interim", "stages")
+STATE = os.path.join(ROOT, "data", "interim", "orchestrator_state.json")
+PAGE_CACHE = os.path.join(ROOT, "data", "interim", "pages")
+METRICS_DIR = os.path.join(ROOT, "data", "interim", "metrics")
+PROFILE_DIR = os.path.join(ROOT, "data", "interim", "profiles")
+GEOCODE_CACHE = os.path.join(ROOT, "data", "interim", "geocode_cache.csv")
+DAY = 86400
+
+class Stage:
+    """
+    cmd:     argv after the python executable
+    inputs:  {name in scratch dir: artifact path relative to ROOT}
+    outputs: {name the stage writes: artifact path relative to ROOT}
+    """
+    def __init__(self, name, cmd, inputs=None, outputs=None, max_age=None):
+        self.name = name
+        self.cmd = cmd
+        self.inputs = inputs or {}
+        self.outputs = outputs or {}
+        self.max_age = max_age
+
+    def argv(self):
+        # stages run in their scratch dir, so a script is passed by absolute path
+        cmd = list(self.cmd) if self.cmd[0] == "-m" else [self.script()] + list(self.cmd[1:])
+        return [sys.executable, "-u"] + cmd
+
+    def script(self):
+        if self.cmd[0] == "-m":
+            return os.path.join(SRC, *self.cmd[1].split(".")) + ".py"
+        return os.path.join(ROOT, self.cmd[0])
+
+STAGES = [
+    # sources: each writes its own artifact, no more shared nj_dispensaries.csv
+    Stage("scrape_open_data", ["scrape_nj_dispensaries.py"],
+          outputs={"nj_dispensaries.csv": "data/raw/nj_open_data.csv"}, max_age=DAY),
+    Stage("scrape_recreational", ["scrape_crc_recreational_cards.py"],
+          outputs={"nj_dispensaries.csv": "data/raw/nj_recreational.csv"}, max_age=DAY),
+    Stage("scrape_medicinal", ["scrape_crc_medicinal_cards.py"],
+          outputs={"nj_dispensaries_medicinal.csv": "data/raw/nj_medicinal.csv"}, max_age=DAY),
+    # one record per dispensary; the only writer of the top-level nj_dispensaries.csv
+    Stage("resolve", ["-m", "njbuds.resolve", "open.csv", "rec.csv=recreational", "med.csv=medicinal",
+                      "-o", "out.csv"],
+          inputs={"open.csv": "data/raw/nj_open_data.csv", "rec.csv": "data/raw/nj_recreational.csv",
+                  "med.csv": "data/raw/nj_medicinal.csv"},
+          outputs={"out.csv": "nj_dispensaries.csv"}),
+    Stage("find_websites", ["find_websites_via_search.py"],
+          inputs={"nj_dispensaries.csv": "nj_dispensaries.csv"},
+          outputs={"nj_dispensaries_with_websites.csv": "nj_dispensaries_with_websites.csv"}),
+    Stage("enrich_phones", ["enrich_phones_from_sites.py"],
+          inputs={"nj_dispensaries_with_websites.csv": "nj_dispensaries_with_websites.csv"},
+          outputs={"nj_dispensaries_with_phones.csv": "nj_dispensaries_with_phones.csv"}),
+    Stage("enrich_sites", ["enrich_from_websites.py"],
+          inputs={"nj_dispensaries.csv": "nj_dispensaries_with_phones.csv"},
+          outputs={"nj_dispensaries_enriched.csv": "nj_dispensaries_enriched.csv"}),
+    Stage("platforms", ["detect_menu_platforms.py"],
+          inputs={"nj_dispensaries_enriched.csv": "nj_dispensaries_enriched.csv"},
+          outputs={"nj_dispensaries_with_platforms.csv": "nj_dispensaries_with_platforms.csv"}),
+    Stage("geocode", ["-m", "njbuds.geocode", "in.csv", "-o", "out.csv", "--cache", GEOCODE_CACHE],
+          inputs={"in.csv": "nj_dispensaries_with_platforms.csv"},
+          outputs={"out.csv": "nj_dispensaries_geocoded.csv"}),
+    Stage("snapshot", ["-m", "njbuds.snapshot", "in.csv", "--dir", os.path.join(ROOT, "data", "processed")],
+          inputs={"in.csv": "nj_dispensaries_geocoded.csv"}),
+]
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+@lru_cache(maxsize=1)
+def package_hash():
+    """One hash over every file of the njbuds package, so a library change re-runs its stages."""
+    h = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(PACKAGE, "**", "*.*"), recursive=True)):
+        if "__pycache__" not in path and not path.endswith(".pyc"):
+            h.update(f"{os.path.relpath(path, PACKAGE)}:{file_hash(path)}".encode())
+    return h.hexdigest()
+
+def stage_key(stage):
+    """Hash of command + script + njbuds package + input contents; None if an input is missing."""
+    h = hashlib.sha1(json.dumps(stage.cmd).encode("utf-8"))
+    h.update(package_hash().encode())
+    if os.path.exists(stage.script()):
+        h.update(file_hash(stage.script()).encode())
+    for local, art in sorted(stage.inputs.items()):
+        path = os.path.join(ROOT, art)
+        if not os.path.exists(path):
+            return None
+        h.update(f"{local}={art}:{file_hash(path)}".encode())
+    return h.hexdigest()
+
+def load_state(path=STATE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def is_fresh(stage, key, state, now=None):
+    rec = state.get(stage.name)
+    if not rec or key is None or rec.get("key") != key:
+        return False
+    if stage.max_age is not None and (now or time.time()) - rec.get("finished", 0) > stage.max_age:
+        return False
+    for art, digest in rec.get("outputs", {}).items():
+        path = os.path.join(ROOT, art)
+        if not os.path.exists(path) or file_hash(path) != digest:
+            return False   # output deleted or edited by hand
+    return True
+
+def producers(stages):
+    return {art: s.name for s in stages for art in s.outputs.values()}
+
+def deps_of(stage, made_by):
+    return {made_by[a] for a in stage.inputs.values() if a in made_by}
+
+def run_stage(stage):
+    """Run one stage in its scratch dir; returns (ok, seconds, log_path)."""
+    work = os.path.join(STAGE_DIR, stage.name)
+    os.makedirs(work, exist_ok=True)
+    for local, art in stage.inputs.items():
+        shutil.copy2(os.path.join(ROOT, art), os.path.join(work, local))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("NJBUDS_PAGE_CACHE", PAGE_CACHE)   # one page cache for every stage
+    env.setdefault("NJBUDS_METRICS_DIR", METRICS_DIR)  # run reports land next to each other
+    env.setdefault("NJBUDS_PROFILE_DIR", PROFILE_DIR)
+    log = os.path.join(work, "stage.log")
+    started, t0 = time.time(), time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        rc = subprocess.call(stage.argv(), cwd=work, env=env, stdout=f, stderr=subprocess.STDOUT)
+    secs = time.perf_counter() - t0
+    if rc != 0:
+        return False, secs, log
+
+    for local, art in stage.outputs.items():
+        src, dst = os.path.join(work, local), os.path.join(ROOT, art)
+        # an old scratch copy is kept for the scripts' resume logic, but is never published
+        if not os.path.exists(src) or os.path.getmtime(src) < started - 1:
+            with open(log, "a", encoding="utf-8") as f:
+                f.write(f"\n[orchestrator] expected output {local} was not written\n")
+            return False, secs, log
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        shutil.copy2(src, dst + ".tmp")   # copy, so the scratch copy can feed a resume
+        os.replace(dst + ".tmp", dst)
+    return True, secs, log
+
+def tail(path, n=15):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-n:])
+    except OSError:
+        return ""
+
+def run(stages=STAGES, jobs=None, force=(), only=None, dry_run=False, state_path=STATE):
+    """Run stale stages in dependency order; returns {stage: status}."""
+    by_name = {s.name: s for s in stages}
+    made_by = producers(stages)
+    deps = {s.name: deps_of(s, made_by) for s in stages}
+    selected = set(only or by_name)
+    state = load_state(state_path)
+    status = {}
+    pending = [s.name for s in stages if s.name in selected]
+    running = {}
+
+    def ready(name):
+        return all(status.get(d) in ("ran", "fresh") or d not in selected for d in deps[name])
+
+    def blocked(name):
+        return any(status.get(d) in ("failed", "blocked") for d in deps[name])
+
+    with cf.ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 2) as ex:
+        while pending or running:
+            for name in list(pending):
+                if blocked(name):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    print(f"  - {name}: blocked by a failed dependency")
+                elif ready(name):
+                    pending.remove(name)
+                    stage = by_name[name]
+                    key = stage_key(stage)
+                    if key is None:
+                        status[name] = "failed"
+                        print(f"  ! {name}: missing input")
+                    elif name not in force and is_fresh(stage, key, state):
+                        status[name] = "fresh"
+                        print(f"  = {name}: up to date")
+                    elif dry_run:
+                        status[name] = "ran"
+                        print(f"  > {name}: would run")
+                    else:
+                        print(f"  > {name}: running")
+                        running[ex.submit(run_stage, stage)] = (name, key)
+            if not running:
+                if pending and not any(ready(n) or blocked(n) for n in pending):
+                    raise RuntimeError(f"dependency cycle among {pending}")
+                continue
+            done, _ = cf.wait(running, return_when=cf.FIRST_COMPLETED)
+            for fut in done:
+                name, key = running.pop(fut)
+                ok, secs, log = fut.result()
+                stage = by_name[name]
+                if ok:
+                    status[name] = "ran"
+                    state[name] = {
+                        "key": key, "finished": time.time(), "seconds": round(secs, 3),
+                        "outputs": {a: file_hash(os.path.join(ROOT, a)) for a in stage.outputs.values()},
+                    }
+                    save_state(state, state_path)
+                    print(f"  ✓ {name}: {secs:.1f}s")
+                else:
+                    status[name] = "failed"
+                    print(f"  ✗ {name}: failed after {secs:.1f}s (log: {log})")
+                    print(tail(log))
+    return status
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the pipeline stages that are out of date")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="parallel stages (default: cpu count)")
+    ap.add_argument("--force", nargs="*", default=[], metavar="STAGE", help="re-run even if up to date")
+    ap.add_argument("--only", nargs="*", default=None, metavar="STAGE", help="limit to these stages")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--list", action="store_true", help="print the stage graph and exit")
+    ap.add_argument("--profile", nargs="?", const="all", default=None, metavar="MODES",
+                    help="profile each stage (njbuds.profiling): all, or any of cpu,mem,stacks")
+    args = ap.parse_args(argv)
+    if args.profile:
+        os.environ["NJBUDS_PROFILE"] = args.profile   # inherited by every stage process
+
+    if args.list:
+        made_by = producers(STAGES)
+        for s in STAGES:
+            after = ", ".join(sorted(deps_of(s, made_by))) or "-"
+            print(f"{s.name:20s} after: {after:40s} writes: {', '.join(s.outputs.values()) or '-'}")
+        return
+    unknown = (set(args.force) | set(args.only or ())) - {s.name for s in STAGES}
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    t0 = time.perf_counter()
+    status = run(STAGES, args.jobs, set(args.force), args.only, args.dry_run)
+    counts = {k: list(status.values()).count(k) for k in ("ran", "fresh", "failed", "blocked")}
+    print(f"Done in {time.perf_counter() - t0:.1f}s: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    if counts["failed"] or counts["blocked"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
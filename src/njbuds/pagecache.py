@@ -0,0 +1,126 @@
+"""
+On-disk cache of fetched pages, shared by every stage that reads websites.
+
+Pages are stored gzip-compressed under data/interim/pages/<host>/<sha1>.gz:
+a JSON header line (url, final_url, status, encoding, fetched_at) and then
+the raw body. A redirect also leaves a small alias entry under the requested
+URL. Only responses with status < 400 are stored. Later stages, such as
+platform detection, read a site's pages from here instead of fetching them again.
+
+    r = pagecache.fetch(session, url, timeout=12)   # read-through; None on error
+    for page in pagecache.pages_for_host("example.com"): ...
+"""
+import glob, gzip, hashlib, json, os, time
+from urllib.parse import urlparse
+
+from njbuds import metrics, profiling
+
+CACHE_DIR = os.getenv("NJBUDS_PAGE_CACHE", os.path.join("data", "interim", "pages"))
+MAX_AGE = float(os.getenv("NJBUDS_PAGE_TTL", 7 * 86400))   # seconds; 0 disables reads
+RETRIES = int(os.getenv("NJBUDS_FETCH_RETRIES", 1))
+RETRY_STATUS = (429, 502, 503, 504)
+RETRY_PAUSE = 1.0
+# dropped connections are worth one more try; timeouts already cost TIMEOUT seconds each
+RETRY_ERRORS = ("ConnectionError", "ChunkedEncodingError")
+
+class CachedResponse:
+    """The parts of requests.Response the stages use."""
+    def __init__(self, url, status_code, content, encoding=None, from_cache=True):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+def _host(url):
+    h = urlparse(url).netloc.lower()
+    return h[4:] if h.startswith("www.") else h
+
+def _path(url, cache_dir=CACHE_DIR):
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, _host(url) or "_", digest + ".gz")
+
+def _write(path, header, body=b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=5) as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(body)
+    os.replace(tmp, path)
+
+def _read(path):
+    try:
+        with gzip.open(path, "rb") as f:
+            header = json.loads(f.readline())
+            return header, f.read()
+    except (OSError, ValueError, EOFError):
+        return None, b""
+
+def get(url, max_age=MAX_AGE, cache_dir=CACHE_DIR):
+    """Cached response for url (following a redirect alias), or None."""
+    header, body = _read(_path(url, cache_dir))
+    if header and "alias" in header:
+        header, body = _read(_path(header["alias"], cache_dir))
+    if not header:
+        return None
+    if max_age and time.time() - header.get("fetched_at", 0) > max_age:
+        return None
+    return CachedResponse(header["final_url"], header["status"], body, header.get("encoding"))
+
+def put(url, response, cache_dir=CACHE_DIR):
+    final = response.url or url
+    header = {
+        "url": url, "final_url": final, "status": response.status_code,
+        "encoding": response.encoding, "fetched_at": time.time(),
+    }
+    _write(_path(final, cache_dir), header, response.content)
+    if final != url:
+        _write(_path(url, cache_dir), {"alias": final, "fetched_at": header["fetched_at"]})
+
+def fetch(session, url, max_age=MAX_AGE, cache_dir=CACHE_DIR, retries=RETRIES, **kw):
+    """
+    Read-through GET. Returns a response (cached or live) or None on network
+    error. Every lookup and request is reported to njbuds.metrics.
+    """
+    hit = get(url, max_age, cache_dir) if max_age else None
+    metrics.observe_cache(hit is not None)
+    if hit is not None:
+        return hit
+    host = _host(url)
+    for attempt in range(retries + 1):
+        t0 = time.perf_counter()
+        try:
+            with profiling.span("fetch"):
+                r = session.get(url, **kw)
+        except Exception as e:
+            metrics.observe_request(host, time.perf_counter() - t0)
+            metrics.error(type(e).__name__, host)
+            if attempt < retries and type(e).__name__ in RETRY_ERRORS:
+                metrics.count("retries")
+                continue
+            return None
+        metrics.observe_request(host, time.perf_counter() - t0, len(r.content or b""), r.status_code)
+        if attempt < retries and r.status_code in RETRY_STATUS:
+            metrics.count("retries")
+            time.sleep(RETRY_PAUSE)
+            continue
+        break
+    if r.status_code < 400:   # a 429/5xx (or 404) is retried on the next run, not replayed for a week
+        try:
+            put(url, r, cache_dir)
+        except OSError:
+            pass  # caching is best-effort
+    return r
+
+def pages_for_host(host, cache_dir=CACHE_DIR):
+    """Yield (header, body) for every cached page of a host (aliases skipped)."""
+    host = host.lower()
+    host = host[4:] if host.startswith("www.") else host
+    for path in glob.glob(os.path.join(cache_dir, host, "*.gz")):
+        header, body = _read(path)
+        if header and "alias" not in header:
+            yield header, body
@@ -0,0 +1,106 @@
+"""
+Parse fetched pages in worker processes, so the fetch threads only wait on the network.
+
+A fetch thread hands the raw response bytes to parse(). A worker process then
+decodes the HTML, builds the soup once, and pulls out the visible text, the
+links, the schema.org data and every registered extractor's fields. What
+comes back is a Page with those values already filled in and no soup, so
+frontier, domains and extractors.run() never parse it again in the fetching
+process.
+
+At most max_pending pages (default 2 per process) can be in the pool at
+once. When parsing falls behind, parse() blocks the calling fetch thread
+instead of letting bytes pile up in memory; that is the backpressure. With a
+single process (NJBUDS_PARSE_PROCS=1, or a single-core machine) the same
+filling runs in the calling thread.
+
+Markup the parser cannot handle gives an empty page, counted in
+njbuds.metrics as parse_<error>, in either mode; it never fails the crawl.
+
+    pool = parsepool.shared()                       # one per process
+    res = frontier.crawl(url, fetch, parse=pool.parse)
+"""
+import concurrent.futures as cf, os, threading
+
+from njbuds import extractors, metrics
+from njbuds.extractors import Page
+
+PROCS = int(os.getenv("NJBUDS_PARSE_PROCS", 0)) or (os.cpu_count() or 1)
+PENDING_PER_PROC = 2
+
+def decode(content, encoding=None):
+    if encoding:
+        try:
+            return content.decode(encoding, errors="replace")
+        except LookupError:   # a charset Python does not know; sniff instead
+            pass
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("cp1252", errors="replace")
+
+def fill(page):
+    """Build every view and extractor field now; '' on success, else the error class (page emptied)."""
+    from bs4 import ParserRejectedMarkup
+    try:
+        page.text, page.links, page.structured
+        extractors.run(page)
+        return ""
+    except (ParserRejectedMarkup, RecursionError, ValueError, UnicodeError) as e:
+        page.__dict__.pop("soup", None)
+        page.__dict__.update(html="", text="", links=[], structured={}, extracted={})
+        return type(e).__name__
+
+def parse_page(url, content, encoding=None):
+    """Runs in a worker: (filled Page minus the soup, which does not pickle cheaply; error class or '')."""
+    page = Page(url, decode(content or b"", encoding))
+    err = fill(page)
+    page.__dict__.pop("soup", None)
+    return page, err
+
+def _mp_context():
+    import multiprocessing as mp
+    # never fork: the fetch threads may hold locks (ssl, logging) at that moment
+    return mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+
+class ParsePool:
+    def __init__(self, procs=PROCS, max_pending=None):
+        self.procs = max(1, procs)
+        self._ex = None
+        if self.procs > 1:
+            self._ex = cf.ProcessPoolExecutor(self.procs, mp_context=_mp_context())
+            self._slots = threading.BoundedSemaphore(max_pending or self.procs * PENDING_PER_PROC)
+
+    def parse(self, r):
+        """Page for a response (anything with .url, .content, .encoding)."""
+        if self._ex is None:
+            page = Page.from_response(r)
+            err = fill(page)
+        else:
+            with self._slots:
+                page, err = self._ex.submit(parse_page, r.url, r.content, r.encoding).result()
+        if err:
+            metrics.error(f"parse_{err}")   # counted here: a worker's registry is not this one
+        return page
+
+    def close(self):
+        if self._ex is not None:
+            self._ex.shutdown()
+            self._ex = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared(procs=PROCS):
+    """The process-wide pool, started on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ParsePool(procs)
+        return _shared
@@ -0,0 +1,93 @@
+"""
+Menu platform detection from page HTML with one multi-pattern pass.
+
+SIGNATURES is the single table of (platform, needle, weight). Every needle is
+matched in one scan over the lowercased page. pyahocorasick's automaton is
+used when installed; otherwise the needles are compiled into one
+longest-first regex alternation. Both scan in C. Hits inside src=/href=
+attributes (script and iframe embeds, menu links) count double.
+
+    m = SignatureMatcher()
+    m.classify(html)  ->  ("Dutchie", {"Dutchie": 6.0, ...}, ["embed.dutchie"])
+"""
+import re
+
+# (platform, lowercase needle, weight)
+SIGNATURES = [
+    ("Dutchie",  "dutchie.com",           2.0),
+    ("Dutchie",  "embed.dutchie",         3.0),
+    ("Dutchie",  "dutchie-plus",          3.0),
+    ("Dutchie",  "dutchieplus",           3.0),
+    ("Jane",     "iheartjane.com",        3.0),
+    ("Jane",     "jane-frame",            2.0),
+    ("Jane",     "jane-menu",             2.0),
+    ("Weedmaps", "weedmaps.com/embed",    3.0),
+    ("Weedmaps", "weedmaps.com",          1.0),
+    ("Leafly",   "web-embedded-menu.leafly", 3.0),
+    ("Leafly",   "leafly.com",            1.0),
+    ("Meadow",   "getmeadow.com",         3.0),
+    ("Tymber",   "tymber",                3.0),
+    ("Sweed",    "sweedpos.com",          3.0),
+    ("Sweed",    "sweed.app",             3.0),
+    ("Blaze",    "blaze.me",              2.0),
+    ("Treez",    "treez.io",              3.0),
+    ("Dispense", "dispenseapp.com",       3.0),
+    ("Flowhub",  "flowhub.com",           2.0),
+    ("Joint",    "jointcommerce",         3.0),
+]
+ATTR_BOOST = 2.0
+_ATTR_CTX_RE = re.compile(r"""(?:src|href|data-src)\s*=\s*["'][^"'<>]*$""")
+
+class SignatureMatcher:
+    def __init__(self, signatures=SIGNATURES):
+        self.table = {}
+        for platform, needle, weight in signatures:
+            self.table[needle.lower()] = (platform, weight)
+        needles = sorted(self.table, key=len, reverse=True)
+        try:
+            import ahocorasick
+            a = ahocorasick.Automaton()
+            for n in needles:
+                a.add_word(n, n)
+            a.make_automaton()
+            self._automaton, self._regex = a, None
+        except ImportError:
+            self._automaton = None
+            self._regex = re.compile("|".join(re.escape(n) for n in needles))
+
+    def iter_matches(self, text):
+        """(start, needle) for every signature occurrence; text must be lowercase."""
+        if self._automaton is not None:
+            for end, needle in self._automaton.iter_long(text):
+                yield end - len(needle) + 1, needle
+        else:
+            for m in self._regex.finditer(text):
+                yield m.start(), m.group(0)
+
+    def score(self, html, scores=None, evidence=None):
+        """Accumulate platform scores for one page."""
+        scores = {} if scores is None else scores
+        evidence = [] if evidence is None else evidence
+        text = html.lower()
+        for start, needle in self.iter_matches(text):
+            platform, weight = self.table[needle]
+            if _ATTR_CTX_RE.search(text, max(0, start - 200), start):
+                weight *= ATTR_BOOST
+            scores[platform] = scores.get(platform, 0.0) + weight
+            if needle not in evidence:
+                evidence.append(needle)
+        return scores, evidence
+
+    def classify(self, pages, url=""):
+        """Best platform over one or more pages (plus the site URL itself)."""
+        if isinstance(pages, str):
+            pages = [pages]
+        scores, evidence = {}, []
+        if url:
+            self.score(url, scores, evidence)
+        for html in pages:
+            self.score(html, scores, evidence)
+        if not scores:
+            return "", scores, evidence
+        best = max(scores.items(), key=lambda kv: kv[1])[0]
+        return best, scores, evidence
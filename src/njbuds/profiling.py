@@ -0,0 +1,208 @@
+"""
+Opt-in profiling for any stage: CPU (cProfile), peak memory (tracemalloc),
+sampled stacks for flamegraphs, and wall time on named spans.
+
+Off by default. Turn it on with NJBUDS_PROFILE, which is read once at import:
+
+    NJBUDS_PROFILE=1 njbuds enrich-sites          # everything
+    NJBUDS_PROFILE=cpu,stacks njbuds run          # every stage the orchestrator starts
+    njbuds --profile geocode                      # same as NJBUDS_PROFILE=1
+
+metrics.stage() opens a profile for its stage. cProfile sees only the
+thread that opened it; the stack sampler covers every thread, including
+fetch pools. Each stage writes to data/interim/profiles/ (or
+NJBUDS_PROFILE_DIR):
+  <stage>.pstats      cProfile data for pstats / snakeviz
+  <stage>.collapsed   sampled stacks, one "a;b;c count" line each, for
+                      flamegraph.pl or speedscope
+  <stage>.txt         the top-N summary that is also printed
+
+Spans mark the phases of a stage:
+
+    with profiling.span("fetch"):
+        r = session.get(url)
+
+    @profiling.spanned("parse")
+    def parse(html): ...
+
+When profiling is off, span() returns one shared no-op context, and
+spanned() returns the function unchanged.
+
+Profiles nest: each open profile keeps its own span table, and a span counts
+toward every profile open when it ends. cProfile and tracemalloc are
+process-wide, so only the outermost profile that asks for them starts and
+stops them. A nested stage still reports the peak so far and the largest live
+allocations.
+"""
+import os, sys, threading, time
+from contextlib import contextmanager
+
+MODES = ("cpu", "mem", "stacks")
+_env = os.getenv("NJBUDS_PROFILE", "").strip().lower()
+ENABLED = frozenset(MODES if _env in ("1", "all", "true", "yes") else
+                    (m for m in _env.split(",") if m in MODES))
+PROFILE_DIR = os.getenv("NJBUDS_PROFILE_DIR", os.path.join("data", "interim", "profiles"))
+TOP_N = int(os.getenv("NJBUDS_PROFILE_TOP", 25))
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+
+_lock = threading.Lock()
+_active = []  # span tables of the open profiles, outermost first: name -> [calls, seconds]
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "t0")
+    def __init__(self, name):
+        self.name = name
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        secs = time.perf_counter() - self.t0
+        with _lock:
+            for spans in _active:
+                rec = spans.setdefault(self.name, [0, 0.0])
+                rec[0] += 1
+                rec[1] += secs
+        return False
+
+if ENABLED:
+    def span(name):
+        return _Span(name)
+
+    def spanned(name):
+        def deco(fn):
+            def wrapper(*a, **kw):
+                with _Span(name):
+                    return fn(*a, **kw)
+            wrapper.__name__, wrapper.__doc__, wrapper.__wrapped__ = fn.__name__, fn.__doc__, fn
+            return wrapper
+        return deco
+else:
+    def span(name):
+        return _NULL
+
+    def spanned(name):
+        return lambda fn: fn
+
+class StackSampler(threading.Thread):
+    """Samples every thread's Python stack; counts collapsed "file:func;file:func" stacks."""
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="njbuds-stack-sampler", daemon=True)
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop_evt = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop_evt.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    key = names.get(code)
+                    if key is None:
+                        key = names[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                    stack.append(key)
+                    frame = frame.f_back
+                line = ";".join(reversed(stack))
+                self.counts[line] = self.counts.get(line, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_evt.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{k} {v}\n" for k, v in sorted(self.counts.items(), key=lambda kv: -kv[1]))
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def span_table(spans):
+    with _lock:
+        rows = sorted(spans.items(), key=lambda kv: -kv[1][1])
+    return [f"  {name:20s}{calls:9d} calls {secs:10.3f}s {1000 * secs / calls:9.2f} ms/call"
+            for name, (calls, secs) in rows]
+
+@contextmanager
+def profile(name, modes=None, out_dir=None, top=TOP_N):
+    """Profile the enclosed block as stage `name`; a no-op when no modes are enabled."""
+    modes = ENABLED if modes is None else frozenset(modes)
+    if not modes:
+        yield
+        return
+    out_dir = out_dir or PROFILE_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    spans = {}
+    with _lock:
+        outer = bool(_active)
+        _active.append(spans)
+    prof = sampler = None
+    own_mem = False
+    if "mem" in modes:
+        import tracemalloc
+        own_mem = not tracemalloc.is_tracing()
+        if own_mem:
+            tracemalloc.start()
+    if "stacks" in modes:
+        sampler = StackSampler()
+        sampler.start()
+    if "cpu" in modes and not outer:   # a second cProfile would displace the outer one
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - t0
+        if prof is not None:
+            prof.disable()
+        if sampler is not None:
+            sampler.stop()
+        with _lock:
+            _active.remove(spans)
+        lines = [f"profile {name}: {wall:.3f}s wall, modes {','.join(sorted(modes))}"]
+        base = os.path.join(out_dir, name)
+
+        if prof is not None:
+            import io, pstats
+            prof.dump_stats(base + ".pstats")
+            for key in ("cumulative", "tottime"):
+                buf = io.StringIO()
+                pstats.Stats(prof, stream=buf).strip_dirs().sort_stats(key).print_stats(top)
+                body = buf.getvalue()
+                lines += ["", f"top {top} by {key}:", body[body.find("   ncalls"):].rstrip()]
+        if "mem" in modes:
+            import tracemalloc
+            snap = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if own_mem:
+                tracemalloc.stop()
+            lines += ["", f"peak traced memory: {peak / 1e6:.1f} MB; largest live allocations:"]
+            for st in snap.statistics("lineno")[:min(top, 10)]:
+                fr = st.traceback[0]
+                lines.append(f"  {st.size / 1024:10.1f} KB {st.count:8d} blocks  {os.path.basename(fr.filename)}:{fr.lineno}")
+        if sampler is not None:
+            _write(base + ".collapsed", sampler.collapsed())
+            lines += ["", f"{sampler.samples} stack samples -> {base}.collapsed"]
+        table = span_table(spans)
+        if table:
+            lines += ["", "spans:"] + table
+        text = "\n".join(lines) + "\n"
+        _write(base + ".txt", text)
+        print(text, end="", file=sys.stderr)
@@ -0,0 +1,220 @@
+"""
+Entity resolution across sources (data.nj.gov, Atlist recreational, Atlist medicinal).
+
+Rows are only compared inside blocks (same zip, or same state+city), so the
+work grows with block size rather than N^2. Inside a block, name and street
+similarity are trigram-cosine matrices computed with numpy, phone agreement is
+an equality matrix, and pairs over THRESHOLD are unioned into clusters. Each
+cluster collapses to one canonical record.
+
+    python -m njbuds.resolve                      # default INPUTS below
+    python -m njbuds.resolve a.csv=recreational b.csv=medicinal -o out.csv
+"""
+import argparse, os, re, time
+import numpy as np
+import pandas as pd
+
+from njbuds import metrics
+from njbuds.utils import FIELDS, clean, norm_street, normalize_zips, phone_digits_batch
+
+INPUTS = {
+    "nj_dispensaries.csv": "recreational",
+    "nj_dispensaries_medicinal.csv": "medicinal",
+}
+OUTPUT = "nj_dispensaries_resolved.csv"
+
+THRESHOLD = 0.78
+WEIGHTS = {"name": 0.5, "street": 0.35, "phone": 0.15}
+MAX_BLOCK = 1500   # larger blocks are split by first name letter
+
+# Words that don't help tell two dispensaries apart
+NAME_STOP = {
+    "dispensary","dispensaries","cannabis","marijuana","co","company","llc","inc","the",
+    "nj","new","jersey","adult","use","medical","medicinal","recreational","atc","of","and",
+}
+SOURCE_RANK = ("data.nj.gov", "atlist")  # earlier = preferred when picking a canonical row
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+def norm_name(s):
+    toks = _NON_ALNUM.sub(" ", clean(s).lower().replace("&", " and ")).split()
+    kept = [t for t in toks if t not in NAME_STOP]
+    return " ".join(kept or toks)
+
+def _trigram_ids(values, vocab):
+    out = []
+    for v in values:
+        v = f"  {v} " if v else ""
+        out.append([vocab.setdefault(v[i:i+3], len(vocab)) for i in range(len(v) - 2)])
+    return out
+
+def _cosine_block(gram_lists):
+    """Cosine similarity matrix over trigram count vectors for one block."""
+    cols = np.unique(np.fromiter((g for gl in gram_lists for g in gl), dtype=np.int64))
+    m = np.zeros((len(gram_lists), max(len(cols), 1)), dtype=np.float32)
+    if len(cols):
+        rows = np.repeat(np.arange(len(gram_lists)), [len(gl) for gl in gram_lists])
+        flat = np.searchsorted(cols, np.fromiter((g for gl in gram_lists for g in gl), dtype=np.int64))
+        np.add.at(m, (rows, flat), 1.0)
+    norms = np.linalg.norm(m, axis=1)
+    m /= np.where(norms == 0, 1.0, norms)[:, None]
+    sim = m @ m.T
+    empty = norms == 0
+    sim[empty, :] = np.nan
+    sim[:, empty] = np.nan
+    return sim
+
+def _blocks(df):
+    """Yield index arrays for zip blocks and state+city blocks (overlap is fine)."""
+    zips = df["zip"].where(df["zip"].str.len() == 5, "")
+    city = df["state"].str.upper() + "|" + df["city"].map(lambda c: _NON_ALNUM.sub("", c.lower()))
+    for keys in (zips, city.where(df["city"] != "", "")):
+        groups = pd.Series(np.arange(len(df))).groupby(keys.values).indices
+        for k, idx in groups.items():
+            if not k or len(idx) < 2:
+                continue
+            if len(idx) > MAX_BLOCK:
+                first = df["_name"].str[:1].values[idx]
+                for sub in pd.Series(idx).groupby(first).indices.values():
+                    if len(sub) > 1:
+                        yield idx[sub]
+            else:
+                yield idx
+
+def score_block(name_grams, street_grams, phones):
+    """Weighted similarity matrix for one block; missing components are left out."""
+    parts = {
+        "name": _cosine_block(name_grams),
+        "street": _cosine_block(street_grams),
+    }
+    p = np.asarray(phones)
+    has = p != ""
+    ph = np.where(has[:, None] & has[None, :], (p[:, None] == p[None, :]).astype(np.float32), np.nan)
+    parts["phone"] = ph
+
+    num = np.zeros_like(parts["name"], dtype=np.float32)
+    den = np.zeros_like(num)
+    for k, mat in parts.items():
+        ok = ~np.isnan(mat)
+        num += np.where(ok, mat, 0.0) * WEIGHTS[k]
+        den += ok * WEIGHTS[k]
+    score = np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+    # a name alone is never enough to merge two locations
+    score[np.isnan(parts["street"]) & np.isnan(ph)] = 0.0
+    return score
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+def _source_rank(src):
+    s = src.lower()
+    for i, tag in enumerate(SOURCE_RANK):
+        if tag in s:
+            return i
+    return len(SOURCE_RANK)
+
+def prepare(df):
+    df = df.copy()
+    for col in FIELDS + ["category"]:
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].map(clean)
+    df["zip"] = normalize_zips(df["zip"])[0]
+    df["_name"] = df["name"].map(norm_name)
+    df["_street"] = df["street"].map(norm_street)
+    df["_phone"] = phone_digits_batch(df["phone"])[0]
+    return df.reset_index(drop=True)
+
+def cluster(df):
+    """(cluster id per row of a prepare()d frame, number of distinct candidate pairs)."""
+    vocab = {}
+    name_g = _trigram_ids(df["_name"], vocab)
+    street_g = _trigram_ids(df["_street"], vocab)
+    phones = df["_phone"].values
+    n = len(df)
+    uf = _UnionFind(n)
+    pairs = []   # i * n + j per candidate pair; a pair in both a zip and a city block counts once
+    for idx in _blocks(df):
+        score = score_block([name_g[i] for i in idx], [street_g[i] for i in idx], phones[idx])
+        a, b = np.triu_indices(len(idx), k=1)
+        pairs.append(np.minimum(idx[a], idx[b]).astype(np.int64) * n + np.maximum(idx[a], idx[b]))
+        a, b = np.nonzero(np.triu(score >= THRESHOLD, k=1))
+        for i, j in zip(idx[a], idx[b]):
+            uf.union(i, j)
+    roots = np.array([uf.find(i) for i in range(n)])
+    compared = len(np.unique(np.concatenate(pairs))) if pairs else 0
+    return pd.factorize(roots)[0], compared
+
+def canonicalize(df, cluster_ids):
+    """One row per cluster: the most complete, best-sourced member, gaps filled from the rest."""
+    df = df.assign(
+        cluster_id=cluster_ids,
+        _filled=(df[FIELDS] != "").sum(axis=1),
+        _rank=df["source"].map(_source_rank),
+    ).sort_values(["cluster_id", "_rank", "_filled"], ascending=[True, True, False], kind="stable")
+
+    blanks = df[FIELDS].replace("", np.nan)
+    best = blanks.groupby(df["cluster_id"], sort=True).first().fillna("")
+    agg = df.groupby("cluster_id", sort=True).agg(
+        cluster_size=("name", "size"),
+        category=("category", lambda s: ";".join(sorted({c for c in s if c}))),
+        sources=("source", lambda s: " | ".join(dict.fromkeys(c for c in s if c))),
+    )
+    out = best.join(agg).reset_index()
+    return out[["cluster_id"] + FIELDS + ["category","cluster_size","sources"]]
+
+def resolve(frames):
+    """frames: iterable of (DataFrame, category). Returns (canonical_df, members_df, pairs_compared)."""
+    parts = []
+    for frame, category in frames:
+        f = frame.copy()
+        if category:
+            f["category"] = category
+        parts.append(f)
+    df = prepare(pd.concat(parts, ignore_index=True))
+    ids, compared = cluster(df)
+    members = df.assign(cluster_id=ids)
+    return canonicalize(df, ids), members, compared
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fuzzy, blocked de-duplication across dispensary sources")
+    ap.add_argument("inputs", nargs="*", help="csv[=category] ... (default: INPUTS that exist)")
+    ap.add_argument("-o", "--output", default=OUTPUT)
+    args = ap.parse_args(argv)
+
+    specs = [tuple(a.split("=", 1)) if "=" in a else (a, "") for a in args.inputs] \
+            or [(p, c) for p, c in INPUTS.items() if os.path.exists(p)]
+    if not specs:
+        raise SystemExit("No input CSVs found")
+
+    t0 = time.perf_counter()
+    with metrics.stage("resolve") as st:
+        frames = [(pd.read_csv(p, dtype=str, keep_default_na=False), c) for p, c in specs]
+        canon, members, compared = resolve(frames)
+        st.rows = len(members)
+    secs = time.perf_counter() - t0
+    metrics.count("pair_comparisons", compared)
+
+    canon.drop(columns=["cluster_id"]).to_csv(args.output, index=False, encoding="utf-8")
+    print(f"Inputs: " + ", ".join(f"{p} ({len(f)})" for (p, _), (f, _) in zip(specs, frames)))
+    print(f"{len(members)} rows -> {len(canon)} dispensaries "
+          f"({len(members) - len(canon)} merged, {compared} pair comparisons) in {secs:.3f}s")
+    print(f"Wrote {args.output}")
+    metrics.write("resolve")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Autocomplete and typo-tolerant search over dispensary names, cities and streets.
+
+Two structures are built once per snapshot and pickled next to it:
+
+- a prefix trie, flattened to one int->int edge dict, with the top TOP_K
+  documents precomputed at every node. Single-token autocomplete is a walk of
+  len(prefix) steps plus a slice.
+- a vocabulary of terms with postings, and a trigram -> term inverted index.
+  A query token maps to terms by exact match, prefix (last token only), or
+  trigram Dice similarity, and the matched terms' postings are scored into a
+  ranked result.
+
+    idx = SearchIndex.build(records)       # records: dicts with id/name/city/street/zip
+    idx.save("snap.search.pkl"); idx = SearchIndex.load("snap.search.pkl")
+    idx.autocomplete("ris")
+    idx.search("rise patersn")
+"""
+import bisect, pickle, re
+from collections import defaultdict
+
+FORMAT_VERSION = 1
+TOP_K = 10
+FIELD_WEIGHTS = {"name": 3.0, "city": 2.0, "street": 1.0, "zip": 1.5}
+MIN_DICE = 0.45
+_CHAR_BITS = 21   # enough for any unicode code point
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(s):
+    return _TOKEN_RE.findall((s or "").lower())
+
+def _trigrams(term):
+    t = f"  {term} "
+    return {t[i:i+3] for i in range(len(t) - 2)}
+
+class SearchIndex:
+    def __init__(self, state):
+        self.__dict__.update(state)
+
+    # ---------- build ----------
+    @classmethod
+    def build(cls, records):
+        docs, postings = [], defaultdict(dict)   # term -> {doc: weight}
+        for d, rec in enumerate(records):
+            docs.append({k: rec.get(k, "") for k in ("id","name","city","zip")})
+            for field, w in FIELD_WEIGHTS.items():
+                for term in tokenize(str(rec.get(field, ""))):
+                    if postings[term].get(d, 0) < w:
+                        postings[term][d] = w
+
+        terms = sorted(postings)
+        term_docs = [tuple(sorted(postings[t].items(), key=lambda x: -x[1])) for t in terms]
+
+        grams = defaultdict(list)
+        for tid, t in enumerate(terms):
+            for g in _trigrams(t):
+                grams[g].append(tid)
+
+        # trie with per-node best documents
+        edges, node_best = {}, [dict()]
+        for tid, t in enumerate(terms):
+            node = 0
+            for ch in t:
+                key = (node << _CHAR_BITS) | ord(ch)
+                nxt = edges.get(key)
+                if nxt is None:
+                    nxt = edges[key] = len(node_best)
+                    node_best.append({})
+                node = nxt
+                best = node_best[node]
+                for d, w in term_docs[tid]:
+                    if best.get(d, 0) < w:
+                        best[d] = w
+        top = [tuple(d for d, _ in sorted(b.items(), key=lambda x: (-x[1], docs[x[0]]["name"]))[:TOP_K])
+               for b in node_best]
+
+        return cls({
+            "version": FORMAT_VERSION, "docs": docs, "terms": terms, "term_docs": term_docs,
+            "grams": {g: tuple(v) for g, v in grams.items()}, "edges": edges, "top": top,
+        })
+
+    # ---------- persistence ----------
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: search index format {state.get('version')} != {FORMAT_VERSION}")
+        return cls(state)
+
+    # ---------- queries ----------
+    def _trie_top(self, prefix):
+        node = 0
+        for ch in prefix:
+            node = self.edges.get((node << _CHAR_BITS) | ord(ch))
+            if node is None:
+                return ()
+        return self.top[node]
+
+    def _prefix_terms(self, prefix):
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + "\U0010ffff")
+        return range(lo, hi)
+
+    def _fuzzy_terms(self, token):
+        qg = _trigrams(token)
+        overlap = defaultdict(int)
+        for g in qg:
+            for tid in self.grams.get(g, ()):
+                overlap[tid] += 1
+        out = []
+        for tid, n in overlap.items():
+            dice = 2 * n / (len(qg) + len(self.terms[tid]) + 2)
+            if dice >= MIN_DICE:
+                out.append((tid, dice))
+        return out
+
+    def _term_matches(self, token, is_last):
+        tid = bisect.bisect_left(self.terms, token)
+        exact = tid < len(self.terms) and self.terms[tid] == token
+        matches = {tid: 1.0} if exact else {}
+        if is_last:
+            for t in self._prefix_terms(token):
+                matches.setdefault(t, 0.9)
+        if not matches or len(token) >= 4:
+            for t, dice in self._fuzzy_terms(token):
+                if dice * 0.8 > matches.get(t, 0):
+                    matches[t] = dice * 0.8
+        return matches
+
+    def search(self, query, limit=10, prefix=True):
+        """Ranked [(doc dict, score)] for a free-text query; tolerant of typos."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores, hits = defaultdict(float), defaultdict(int)
+        for i, tok in enumerate(tokens):
+            best = {}
+            for tid, sim in self._term_matches(tok, prefix and i == len(tokens) - 1).items():
+                for d, w in self.term_docs[tid]:
+                    s = sim * w
+                    if s > best.get(d, 0):
+                        best[d] = s
+            for d, s in best.items():
+                scores[d] += s
+                hits[d] += 1
+        # documents matching every token first, then by score, then by name
+        ranked = sorted(scores, key=lambda d: (-hits[d], -scores[d], self.docs[d]["name"]))[:limit]
+        return [(self.docs[d], round(scores[d], 3)) for d in ranked]
+
+    def autocomplete(self, prefix, limit=10):
+        """Completions for what the user has typed so far."""
+        tokens = tokenize(prefix)
+        if len(tokens) == 1 and limit <= TOP_K:
+            top = self._trie_top(tokens[0])
+            if top:
+                return [self.docs[d] for d in top[:limit]]
+        return [doc for doc, _ in self.search(prefix, limit)]
@@ -0,0 +1,313 @@
+"""
+Read-only HTTP query service over the latest processed snapshot.
+
+The snapshot file is memory-mapped; record bodies are served straight from
+the map, never re-serialized. Lookup-by-id and city/zip responses are built
+and gzip-compressed once per snapshot, each with an ETag. Nearest queries go
+through the SpatialIndex, and their compressed bodies are kept in a small LRU.
+A watcher picks up a new LATEST snapshot (or SIGHUP), builds it off the event
+loop, and swaps it in without a restart. Free-text search and autocomplete use
+the SearchIndex pickled next to the snapshot (built on the fly if missing). A /nearest
+radius above MAX_MILES, or a lat/lon outside the globe, is a 400; without a radius,
+/nearest still only looks MAX_MILES out.
+
+    GET /dispensaries/<id>
+    GET /search?city=Newark&zip=07102
+    GET /search?q=rise+patersn
+    GET /autocomplete?q=ris
+    GET /nearest?lat=40.73&lon=-74.17&k=5&miles=10&category=medicinal&platform=dutchie
+    GET /healthz
+
+    python -m njbuds.service --port 8080
+"""
+import argparse, asyncio, gzip, hashlib, json, math, mmap, os, signal, time
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+
+from njbuds.snapshot import SNAPSHOT_DIR, latest_snapshot, search_index_path
+from njbuds.spatial import SpatialIndex
+from njbuds.search import SearchIndex
+
+HOST, PORT = "127.0.0.1", 8080
+WATCH_EVERY = 5.0      # seconds between LATEST checks
+QUERY_CACHE = 4096     # compressed nearest/search responses kept per snapshot
+MAX_K = 100
+MAX_MILES = 100.0     # /nearest radius cap; the state is ~170 mi end to end
+
+def _norm(v):
+    return " ".join((v or "").lower().split())
+
+class _Body:
+    """A response body in both encodings, with its ETag."""
+    __slots__ = ("raw", "gz", "etag")
+
+    def __init__(self, raw, version):
+        self.raw = raw
+        self.gz = gzip.compress(raw, 6, mtime=0)
+        self.etag = f'"{version}-{hashlib.blake2b(raw, digest_size=8).hexdigest()}"'
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        self.version = hashlib.blake2b(os.path.basename(path).encode(), digest_size=4).hexdigest()
+        self._f = open(path, "rb")
+        self.mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+
+        spans, ids, cities, zips, lat, lon, cat, plat, docs = [], [], [], [], [], [], [], [], []
+        pos = 0
+        size = len(self.mm)
+        while pos < size:
+            end = self.mm.find(b"\n", pos)
+            end = size if end < 0 else end
+            if end > pos:
+                rec = json.loads(self.mm[pos:end])
+                spans.append((pos, end))
+                ids.append(rec.get("id", ""))
+                cities.append(_norm(rec.get("city")))
+                zips.append((rec.get("zip") or "").zfill(5))
+                lat.append(rec.get("lat"))
+                lon.append(rec.get("lon"))
+                cat.append(rec.get("category", ""))
+                plat.append(rec.get("platform", ""))
+                docs.append(rec)
+            pos = end + 1
+        self.spans = spans
+        self.count = len(spans)
+
+        self.by_id = {i: self._body(self.line(n)) for n, i in enumerate(ids) if i}
+        by_city, by_zip = {}, {}
+        for n, (c, z) in enumerate(zip(cities, zips)):
+            by_city.setdefault(c, []).append(n)
+            by_zip.setdefault(z, []).append(n)
+        self._by_city = by_city
+        self._by_zip = by_zip
+        self.city_bodies = {c: self._array(rows) for c, rows in by_city.items()}
+        self.zip_bodies = {z: self._array(rows) for z, rows in by_zip.items()}
+
+        geo = pd.DataFrame({"lat": lat, "lon": lon, "category": cat, "platform": plat, "_row": range(self.count)})
+        self.spatial = SpatialIndex(geo)
+        self._spatial_rows = self.spatial.df["_row"].values
+
+        idx_path = search_index_path(path)
+        self.search_index = SearchIndex.load(idx_path) if os.path.exists(idx_path) else SearchIndex.build(docs)
+        self._row_of = {i: n for n, i in enumerate(ids)}
+        self._cache = OrderedDict()
+
+    def line(self, n):
+        s, e = self.spans[n]
+        return self.mm[s:e]
+
+    def _body(self, raw):
+        return _Body(raw, self.version)
+
+    def _array(self, rows):
+        return self._body(b"[" + b",".join(self.line(n) for n in rows) + b"]")
+
+    def search(self, city, zipc):
+        c = _norm(city)
+        z = zipc.strip().zfill(5) if zipc else ""
+        if c and z:
+            rows = sorted(set(self._by_city.get(c, ())) & set(self._by_zip.get(z, ())))
+            return self._array(rows)
+        if c:
+            return self.city_bodies.get(c) or self._array([])
+        return self.zip_bodies.get(z) or self._array([])
+
+    def _cached(self, key, build):
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        body = self._cache[key] = self._body(build())
+        if len(self._cache) > QUERY_CACHE:
+            self._cache.popitem(last=False)
+        return body
+
+    def nearest(self, lat, lon, k, miles, category, platform):
+        lat, lon = round(lat, 4), round(lon, 4)   # the cache key and the query see the same point
+        def build():
+            if miles is not None:
+                idx, dist = self.spatial.within(lat, lon, miles, category, platform, limit=k)
+            else:
+                idx, dist = self.spatial.nearest(lat, lon, k, category, platform, max_miles=MAX_MILES)
+            parts = [b'{"distance_mi":%.3f,"dispensary":%s}' % (d, self.line(self._spatial_rows[i]))
+                     for i, d in zip(idx, dist)]
+            return b"[" + b",".join(parts) + b"]"
+        return self._cached(("near", lat, lon, k, miles, category, platform), build)
+
+    def text_search(self, q, limit):
+        def build():
+            parts = [b'{"score":%.3f,"dispensary":%s}' % (score, self.line(self._row_of[doc["id"]]))
+                     for doc, score in self.search_index.search(q, limit)]
+            return b"[" + b",".join(parts) + b"]"
+        return self._cached(("q", _norm(q), limit), build)
+
+    def autocomplete(self, q, limit):
+        def build():
+            return json.dumps(self.search_index.autocomplete(q, limit), separators=(",", ":")).encode()
+        return self._cached(("ac", _norm(q), limit), build)
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._f.close()
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 503: "Service Unavailable"}
+
+class Service:
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self.snap = None
+        self._reloading = False
+
+    def load_latest(self):
+        path = latest_snapshot(self.snapshot_dir)
+        if not path:
+            return False
+        t0 = time.perf_counter()
+        self.snap = Snapshot(path)
+        print(f"Serving {path} ({self.snap.count} rows, built in {time.perf_counter() - t0:.3f}s)")
+        return True
+
+    async def reload(self):
+        if self._reloading:
+            return
+        self._reloading = True
+        try:
+            path = latest_snapshot(self.snapshot_dir)
+            if path and not (self.snap and os.path.samefile(path, self.snap.path)):
+                new = await asyncio.to_thread(Snapshot, path)
+                # single reference swap; requests already holding the old snapshot finish on it
+                old, self.snap = self.snap, new
+                print(f"Hot-swapped to {path} ({new.count} rows)")
+                if old is not None:
+                    asyncio.get_running_loop().call_later(30, old.close)
+        except Exception as e:
+            print("Snapshot reload failed:", e)
+        finally:
+            self._reloading = False
+
+    async def watch(self, every=WATCH_EVERY):
+        while True:
+            await asyncio.sleep(every)
+            await self.reload()
+
+    def route(self, target):
+        """Return (status, _Body or None)."""
+        snap = self.snap
+        if snap is None:
+            return 503, None
+        u = urlsplit(target)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        path = u.path.rstrip("/")
+        if path == "/healthz":
+            return 200, _Body(json.dumps({"rows": snap.count, "snapshot": os.path.basename(snap.path)}).encode(), snap.version)
+        if path.startswith("/dispensaries/"):
+            body = snap.by_id.get(path[len("/dispensaries/"):])
+            return (200, body) if body else (404, None)
+        if path == "/search":
+            if q.get("q"):
+                return 200, snap.text_search(q["q"], min(int(q.get("limit", 10) or 10), MAX_K))
+            if not (q.get("city") or q.get("zip")):
+                return 400, None
+            return 200, snap.search(q.get("city"), q.get("zip"))
+        if path == "/autocomplete":
+            if not q.get("q"):
+                return 400, None
+            return 200, snap.autocomplete(q["q"], min(int(q.get("limit", 10) or 10), MAX_K))
+        if path == "/nearest":
+            lat, lon = float(q["lat"]), float(q["lon"])
+            k = min(int(q.get("k", 5)), MAX_K)
+            miles = float(q["miles"]) if q.get("miles") else None
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and k >= 1):   # also rejects nan
+                return 400, None
+            if miles is not None and not 0 <= miles <= MAX_MILES:
+                return 400, None
+            return 200, snap.nearest(lat, lon, k, miles, q.get("category"), q.get("platform"))
+        return 404, None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for ln in lines[1:]:
+                    if ":" in ln:
+                        k, v = ln.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                if method not in ("GET", "HEAD"):
+                    status, body = 405, None
+                else:
+                    try:
+                        status, body = self.route(target)
+                    except (KeyError, ValueError, OverflowError):
+                        status, body = 400, None
+
+                payload = b""
+                extra = []
+                if body is not None:
+                    extra += [f"ETag: {body.etag}", "Cache-Control: public, max-age=60", "Vary: Accept-Encoding"]
+                    if body.etag in headers.get("if-none-match", ""):
+                        status = 304
+                    elif "gzip" in headers.get("accept-encoding", ""):
+                        payload = body.gz
+                        extra.append("Content-Encoding: gzip")
+                    else:
+                        payload = body.raw
+                    extra.append("Content-Type: application/json")
+                keep = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                out = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"] + extra + [f"Content-Length: {len(payload) if status != 304 else 0}",
+                                "Connection: " + ("keep-alive" if keep else "close")]
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+                if method == "GET" and status != 304:
+                    writer.write(payload)
+                await writer.drain()
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host=HOST, port=PORT, snapshot_dir=SNAPSHOT_DIR, watch_every=WATCH_EVERY):
+    svc = Service(snapshot_dir)
+    if not svc.load_latest():
+        raise SystemExit(f"No snapshot found in {snapshot_dir} (run: python -m njbuds.snapshot <csv>)")
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(svc.reload()))
+    except (NotImplementedError, AttributeError):
+        pass  # Windows: rely on the watcher
+    server = await asyncio.start_server(svc.handle, host, port, backlog=1024)
+    print(f"Listening on http://{host}:{port}")
+    watcher = asyncio.ensure_future(svc.watch(watch_every))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve the latest dispensary snapshot over HTTP")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--dir", default=SNAPSHOT_DIR)
+    ap.add_argument("--watch", type=float, default=WATCH_EVERY, help="seconds between snapshot checks")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.dir, args.watch))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Processed snapshots: one JSON object per line, each with a stable, unique `id`.
+
+Snapshots are written to data/processed/ with a UTC timestamp in the name,
+and a LATEST pointer file is swapped in atomically once the snapshot is
+complete, so readers never see a half-written file. The search index for each
+snapshot is pickled alongside it (<snapshot>.search.pkl).
+
+    python -m njbuds.snapshot nj_dispensaries_geocoded.csv
+
+main() also writes the changefeed against the previous snapshot
+(njbuds.changefeed) into data/processed/changes/.
+"""
+import argparse, glob, json, os, time
+import pandas as pd
+
+from njbuds import metrics
+from njbuds.utils import clean, norm_zip, dispensary_key
+from njbuds.search import SearchIndex
+
+SNAPSHOT_DIR = os.path.join("data", "processed")
+PREFIX = "nj_dispensaries_"
+LATEST = "LATEST"
+FLOAT_COLS = ("lat", "lon")
+
+def write_snapshot(df, out_dir=SNAPSHOT_DIR, stamp=None):
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = stamp or time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    path = os.path.join(out_dir, f"{PREFIX}{stamp}.jsonl")
+    tmp = path + ".tmp"
+    recs = {}
+    for rec in df.to_dict(orient="records"):
+        out = {"id": dispensary_key(rec.get("name"), rec.get("street"), rec.get("city"))}
+        for k, v in rec.items():
+            if k in FLOAT_COLS:
+                v = pd.to_numeric(v, errors="coerce")
+                out[k] = None if pd.isna(v) else round(float(v), 6)
+            elif k == "zip":
+                out[k] = norm_zip(v)
+            else:
+                out[k] = clean(v)
+        recs.pop(out["id"], None)   # one line per id: the last duplicate wins, as in storage
+        recs[out["id"]] = out
+    with open(tmp, "w", encoding="utf-8") as f:
+        for out in recs.values():
+            f.write(json.dumps(out, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+
+    with open(path, encoding="utf-8") as f:
+        SearchIndex.build([json.loads(ln) for ln in f]).save(search_index_path(path))
+
+    pointer = os.path.join(out_dir, LATEST)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path) + "\n")
+    os.replace(pointer + ".tmp", pointer)
+    return path
+
+def search_index_path(snapshot_path):
+    return snapshot_path[:-len(".jsonl")] + ".search.pkl"
+
+def latest_snapshot(out_dir=SNAPSHOT_DIR):
+    """Path of the newest complete snapshot, or None."""
+    pointer = os.path.join(out_dir, LATEST)
+    if os.path.exists(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            name = f.read().strip()
+        if name and os.path.exists(os.path.join(out_dir, name)):
+            return os.path.join(out_dir, name)
+    found = sorted(glob.glob(os.path.join(out_dir, f"{PREFIX}*.jsonl")))
+    return found[-1] if found else None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Publish a CSV as a processed JSONL snapshot")
+    ap.add_argument("input")
+    ap.add_argument("--dir", default=SNAPSHOT_DIR)
+    ap.add_argument("--no-changes", action="store_true", help="skip the changefeed vs the previous snapshot")
+    args = ap.parse_args(argv)
+    with metrics.stage("snapshot") as st:
+        df = pd.read_csv(args.input, dtype=str, keep_default_na=False)
+        st.rows = len(df)
+        prev = latest_snapshot(args.dir)
+        path = write_snapshot(df, args.dir)
+        print(f"Wrote {path} ({len(df)} rows)")
+        if prev and not args.no_changes:
+            from njbuds.changefeed import write_changefeed
+            out, counts = write_changefeed(prev, path, changes_dir=os.path.join(args.dir, "changes"))
+            print(f"Changes since {os.path.basename(prev)}: " + ", ".join(f"{k} {v}" for k, v in counts.items()) + f" -> {out}")
+    metrics.write("snapshot")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Socrata (SODA 2.x) client: paged, concurrent, stream-parsed and incremental.
+
+Pages are `$limit`/`$offset` slices ordered by `:id`, so they line up even
+while the portal is being written to. The row count comes first, and then up
+to WORKERS pages are in flight at once. Request starts are spaced to stay
+under RATE per second, and a 429 backs off for as long as Retry-After says.
+Each response is parsed as it arrives (CSV line by line, or JSON objects
+decoded one at a time), so neither the body nor a DataFrame is ever
+held whole.
+
+pull() keeps a local copy of the dataset under data/interim/socrata/ (one per
+format, since CSV rows are all strings and JSON records are typed) and
+remembers the newest `:updated_at` it has seen. The next pull asks only for
+`$where=:updated_at > '<that>'` and merges the changes by `:id`. Socrata does
+not report deletions, so use full=True (`--full`) now and then.
+
+    for rec in socrata.fetch("data.nj.gov", "8hz7-zvhn"): ...
+    records, changed = socrata.pull("data.nj.gov", "8hz7-zvhn")   # incremental
+    python -m njbuds.socrata data.nj.gov 8hz7-zvhn [--full] [--format json]
+"""
+import argparse, concurrent.futures as cf, csv, json, os, threading, time
+
+import requests
+
+from njbuds import metrics
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) NJBudsBot/1.0"
+PAGE_SIZE = int(os.getenv("NJBUDS_SOCRATA_PAGE", 10000))
+WORKERS = int(os.getenv("NJBUDS_SOCRATA_WORKERS", 4))
+RATE = float(os.getenv("NJBUDS_SOCRATA_RATE", 4))     # request starts per second
+TIMEOUT = 60
+RETRIES = 4
+STORE_DIR = os.getenv("NJBUDS_SOCRATA_DIR", os.path.join("data", "interim", "socrata"))
+SYSTEM_FIELDS = ":*, *"   # adds :id, :created_at, :updated_at to every record
+
+class RateLimiter:
+    """Spaces call starts at least 1/rate seconds apart across threads."""
+    def __init__(self, rate=RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def headers(token_env="NJ_SODA_APP_TOKEN"):
+    h = {"User-Agent": UA}
+    token = os.getenv(token_env, "").strip()
+    if token:
+        h["X-App-Token"] = token
+    return h
+
+def _get(session, url, params, limiter, stream=False):
+    host = url.split("/")[2]
+    for attempt in range(RETRIES + 1):
+        limiter.wait()
+        t0 = time.perf_counter()
+        r = session.get(url, params=params, timeout=TIMEOUT, stream=stream)
+        metrics.observe_request(host, time.perf_counter() - t0, 0 if stream else len(r.content), r.status_code)
+        if r.status_code in (429, 502, 503, 504) and attempt < RETRIES:
+            r.close()
+            metrics.count("retries")
+            time.sleep(float(r.headers.get("Retry-After") or 2 ** attempt))
+            continue
+        r.raise_for_status()
+        return r
+
+def iter_json_array(chunks):
+    """Objects of a top-level JSON array, decoded as text chunks arrive."""
+    dec, buf, started = json.JSONDecoder(), "", False
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,[]":
+                started = started or buf[pos] == "["
+                pos += 1
+            if pos >= len(buf) or not started:
+                break
+            try:
+                obj, end = dec.raw_decode(buf, pos)
+            except ValueError:
+                break   # object continues in the next chunk
+            yield obj
+            pos = end
+        buf = buf[pos:]
+
+def _lines(chunks):
+    """
+    Text chunks -> lines ending in "\n" (kept, with any "\r"), so csv sees quoted
+    newlines intact. Only "\n" splits: str.splitlines would also break a field
+    on \x85, \u2028, \x0c and the like.
+    """
+    tail = ""
+    for chunk in chunks:
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        yield from (ln + "\n" for ln in lines)
+    if tail:
+        yield tail
+
+def _chunks(resp):
+    resp.encoding = resp.encoding or "utf-8"
+    return resp.iter_content(chunk_size=65536, decode_unicode=True)
+
+def _url(domain, dataset, fmt):
+    return f"https://{domain}/resource/{dataset}.{fmt}"
+
+def count(session, domain, dataset, where=None, limiter=None, fmt="json"):
+    """Matching rows; asked on the same endpoint as the pages, since portals may block one format."""
+    params = {"$select": "count(*) AS n"}
+    if where:
+        params["$where"] = where
+    r = _get(session, _url(domain, dataset, fmt), params, limiter or RateLimiter())
+    if fmt == "csv":
+        return int(next(csv.DictReader(r.text.splitlines()))["n"])
+    return int(r.json()[0]["n"])
+
+def _page(session, domain, dataset, fmt, offset, page_size, where, limiter):
+    params = {"$select": SYSTEM_FIELDS, "$order": ":id", "$limit": page_size, "$offset": offset}
+    if where:
+        params["$where"] = where
+    with _get(session, _url(domain, dataset, fmt), params, limiter, stream=True) as r:
+        if fmt == "csv":
+            return list(csv.DictReader(_lines(_chunks(r))))
+        return list(iter_json_array(_chunks(r)))
+
+def fetch(domain, dataset, where=None, fmt="csv", page_size=PAGE_SIZE, workers=WORKERS, rate=RATE,
+          token_env="NJ_SODA_APP_TOKEN"):
+    """Every record matching where, in :id order; at most `workers` pages held in memory."""
+    limiter = RateLimiter(rate)
+    with requests.Session() as s:
+        s.headers.update(headers(token_env))
+        total = count(s, domain, dataset, where, limiter, fmt)
+        offsets = range(0, total, page_size)
+        print(f"{domain}/{dataset}: {total} records in {len(offsets)} pages")
+        with cf.ThreadPoolExecutor(max(1, workers)) as ex:
+            pending = []
+            for off in offsets:
+                pending.append(ex.submit(_page, s, domain, dataset, fmt, off, page_size, where, limiter))
+                if len(pending) >= workers:
+                    yield from pending.pop(0).result()
+            for fut in pending:
+                yield from fut.result()
+
+# ---------- incremental pulls ----------
+def _store(domain, dataset, store_dir, fmt):
+    # one store per format: JSON records are typed, CSV rows are all strings
+    base = os.path.join(store_dir, f"{domain}_{dataset}.{fmt}")
+    return base + ".jsonl", base + ".state.json"
+
+def load_store(domain, dataset, store_dir=STORE_DIR, fmt="csv"):
+    """(records by :id, newest :updated_at) from the last `fmt` pull; empty when there was none."""
+    data, state = _store(domain, dataset, store_dir, fmt)
+    if not os.path.exists(data) or not os.path.exists(state):
+        return {}, ""
+    with open(state, encoding="utf-8") as f:
+        last = json.load(f).get("last_updated", "")
+    with open(data, encoding="utf-8") as f:
+        recs = {r[":id"]: r for r in map(json.loads, f)}
+    return recs, last
+
+def save_store(domain, dataset, recs, last, store_dir=STORE_DIR, fmt="csv"):
+    data, state = _store(domain, dataset, store_dir, fmt)
+    os.makedirs(store_dir, exist_ok=True)
+    for path, write in ((data, lambda f: f.writelines(json.dumps(r) + "\n" for r in recs.values())),
+                        (state, lambda f: json.dump({"last_updated": last, "records": len(recs),
+                                                     "pulled_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f))):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp, path)
+
+def pull(domain, dataset, full=False, store_dir=STORE_DIR, **kw):
+    """All current records (old ones merged with what changed since the last pull); returns (records, changed)."""
+    fmt = kw.setdefault("fmt", "csv")
+    recs, last = ({}, "") if full else load_store(domain, dataset, store_dir, fmt)
+    where = f":updated_at > '{last}'" if last else None
+    if where:
+        print(f"{domain}/{dataset}: changes since {last}")
+    changed = 0
+    for rec in fetch(domain, dataset, where=where, **kw):
+        recs[rec[":id"]] = rec
+        last = max(last, rec.get(":updated_at") or "")
+        changed += 1
+    metrics.count("socrata_changed", changed)
+    save_store(domain, dataset, recs, last, store_dir, fmt)
+    return list(recs.values()), changed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pull a Socrata dataset into the local store (incremental by default)")
+    ap.add_argument("domain")
+    ap.add_argument("dataset")
+    ap.add_argument("--full", action="store_true", help="ignore the stored copy and re-download everything")
+    ap.add_argument("--format", choices=("csv", "json"), default="csv")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--rate", type=float, default=RATE, help="request starts per second")
+    args = ap.parse_args(argv)
+    recs, changed = pull(args.domain, args.dataset, args.full, fmt=args.format,
+                         page_size=args.page_size, workers=args.workers, rate=args.rate)
+    print(f"{len(recs)} records stored, {changed} new or changed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Per-state source adapters, configured in config/states.json.
+
+    {"NJ": [{"kind": "socrata", "domain": "data.nj.gov", "dataset": "8hz7-zvhn"},
+            {"kind": "atlist", "page_url": "...", "map_url": "..."}],
+     "XX": [{"kind": "html_finder", "url": "..."}]}
+
+A new state is a new config entry, not a copy of a script. Run every state
+concurrently into one dataset with `python -m njbuds.sources.runner`.
+"""
+import json, os
+
+from njbuds.sources.atlist import AtlistSource
+from njbuds.sources.base import Source
+from njbuds.sources.html_finder import HtmlFinderSource
+from njbuds.sources.socrata import SocrataSource
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+CONFIG = os.getenv("NJBUDS_STATES", os.path.join(ROOT, "config", "states.json"))
+
+ADAPTERS = {cls.kind: cls for cls in (SocrataSource, AtlistSource, HtmlFinderSource)}
+
+def load_config(path=CONFIG):
+    with open(path, encoding="utf-8") as f:
+        return {st.upper(): entries for st, entries in json.load(f).items() if not st.startswith("_")}
+
+def build(config, states=None, kinds=None):
+    """Adapter instances for the chosen states (default all) and kinds (default all)."""
+    out = []
+    for st, entries in config.items():
+        if states and st not in states:
+            continue
+        for e in entries:
+            e = dict(e)
+            kind = e.pop("kind")
+            if kinds and kind not in kinds:
+                continue
+            if kind not in ADAPTERS:
+                raise ValueError(f"{st}: unknown source kind {kind!r} (have {', '.join(ADAPTERS)})")
+            out.append(ADAPTERS[kind](st, **e))
+    return out
@@ -0,0 +1,83 @@
+"""
+Atlist map adapter: the embedded store-locator maps some state regulators publish.
+
+    {"kind": "atlist", "map_url": "https://my.atlist.com/map/<id>?share=true",
+     "page_url": "https://www.nj.gov/cannabis/dispensaries/find/"}
+
+If page_url is set, the adapter takes the map from that page's iframe and
+falls back to map_url. It scrolls the longest scrollable pane and collects
+cards (njbuds.cards) after every round, whatever the category filters show.
+"""
+import time
+
+from njbuds.cards import iter_cards
+from njbuds.sources.base import Source
+
+MAX_ROUNDS = 45
+SETTLE_ROUNDS = 6
+PAUSE = 0.9
+
+# the element with the most scrollable overflow: Atlist's list pane
+LIST_PANE_JS = """
+let best = null, most = 0;
+for (const el of document.querySelectorAll('div, ul, section')) {
+  const extra = el.scrollHeight - el.clientHeight;
+  if (extra > most && getComputedStyle(el).overflowY !== 'visible') { best = el; most = extra; }
+}
+return best;
+"""
+
+def open_driver(headless=True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.chrome.options import Options
+    opts = Options()
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--window-size=1440,1000")
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+
+def find_map(drv, page_url):
+    from selenium.webdriver.common.by import By
+    drv.get(page_url)
+    time.sleep(4)
+    for f in drv.find_elements(By.TAG_NAME, "iframe"):
+        s = f.get_attribute("src") or ""
+        if "my.atlist.com/map" in s:
+            return s
+    return ""
+
+class AtlistSource(Source):
+    kind = "atlist"
+    uses_browser = True
+
+    def __init__(self, state, map_url="", page_url="", headless=True, label="", **opts):
+        super().__init__(state, label or "atlist", **opts)
+        self.map_url, self.page_url, self.headless = map_url, page_url, headless
+
+    def rows(self):
+        drv = open_driver(self.headless)
+        try:
+            src = (find_map(drv, self.page_url) if self.page_url else "") or self.map_url
+            if not src:
+                raise ValueError(f"{self}: no Atlist map found")
+            drv.get(src)
+            time.sleep(6)
+            states, seen = (self.state,), set()
+            pane = drv.execute_script(LIST_PANE_JS)
+            prev, stable = -1, 0
+            for _ in range(MAX_ROUNDS if pane else 0):
+                drv.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", pane)
+                time.sleep(PAUSE)
+                yield from iter_cards(drv, src, seen, states)
+                cur = drv.execute_script("return (arguments[0].innerText || '').length;", pane)
+                stable = stable + 1 if cur == prev else 0
+                if stable >= SETTLE_ROUNDS:
+                    break
+                prev = cur
+            yield from iter_cards(drv, src, seen, states)
+        finally:
+            drv.quit()
@@ -0,0 +1,41 @@
+"""
+The interface every source adapter implements.
+
+An adapter is built from one entry under a state in config/states.json
+(minus "kind") and yields rows with the columns in utils.FIELDS. Nothing in
+an adapter names New Jersey: the state code, URLs and dataset ids all come
+from config.
+
+    class MySource(Source):
+        kind = "my_kind"
+        def rows(self):
+            yield {"name": ..., "street": ..., "city": ..., "zip": ...}
+"""
+from njbuds.utils import FIELDS, clean, norm_zip
+
+class Source:
+    kind = ""
+    uses_browser = False   # the runner caps how many browser adapters run at once
+
+    def __init__(self, state, label="", **opts):
+        self.state = state.upper()
+        self.label = label or self.kind
+        self.opts = opts
+
+    def __repr__(self):
+        return f"{self.state}:{self.label}"
+
+    def rows(self):
+        """Yield raw row dicts; subclasses implement this."""
+        raise NotImplementedError
+
+    def fetch(self):
+        """rows(), with FIELDS filled in, cleaned and missing state/source defaulted; nameless rows dropped."""
+        for r in self.rows():
+            out = {k: clean(r.get(k, "")) for k in FIELDS}
+            if not out["name"] or not (out["street"] or out["city"]):
+                continue
+            out["state"] = (out["state"] or self.state).upper()
+            out["zip"] = norm_zip(out["zip"])
+            out["source"] = out["source"] or self.label
+            yield out
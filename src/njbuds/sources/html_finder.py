@@ -0,0 +1,81 @@
+"""
+Generic HTML "dispensary finder" adapter: any page listing stores as
+name lines followed by "street, city, ST 12345" lines.
+
+    {"kind": "html_finder", "url": "https://example.gov/dispensaries", "render": false}
+
+Static pages are fetched through the page cache. With "render": true the page
+is loaded in headless Chrome first, for finders that build the list in
+JavaScript. The address parsing is the one scrape_csc_finder.py does, with
+the state taken from config.
+"""
+import time
+
+import requests
+
+from njbuds import pagecache
+from njbuds.sources.base import Source
+from njbuds.utils import address_re
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) NJBudsBot/1.0"
+TIMEOUT = 30
+NAME_LOOKBACK = 3
+SKIP_LINK_HOSTS = ("facebook.com","instagram.com","twitter.com","x.com","youtube.com",".gov")
+
+def page_lines_links(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    for t in soup(["script", "style", "noscript"]):
+        t.decompose()
+    lines = [ln.strip() for ln in soup.get_text("\n").splitlines() if ln.strip()]
+    links = [a["href"].strip() for a in soup.find_all("a", href=True)
+             if a["href"].startswith("http") and not any(h in a["href"] for h in SKIP_LINK_HOSTS)]
+    return lines, list(dict.fromkeys(links))
+
+def collect(lines, links, states, source_url):
+    """Rows for every address line; the name is the nearest non-address line above it."""
+    rx = address_re(states)
+    out = []
+    for i, ln in enumerate(lines):
+        m = rx.match(ln)
+        if not m:
+            continue
+        name = next((lines[i - b] for b in range(1, NAME_LOOKBACK + 1)
+                     if i - b >= 0 and not rx.match(lines[i - b])), "")
+        toks = [t for t in name.lower().split() if len(t) > 3]
+        site = next((u for u in links if any(t in u.lower() for t in toks)), "")
+        out.append({
+            "name": name, "street": (m.group("street") or "").strip(" ,"),
+            "city": (m.group("city") or "").strip(" ,"), "state": m.group("state"),
+            "zip": m.group("zip") or "", "website": site, "phone": "", "source": source_url,
+        })
+    return out
+
+class HtmlFinderSource(Source):
+    kind = "html_finder"
+
+    def __init__(self, state, url, render=False, label="", **opts):
+        super().__init__(state, label or url, **opts)
+        self.url, self.render = url, render
+        self.uses_browser = bool(render)
+
+    def html(self):
+        if self.render:
+            from njbuds.sources.atlist import open_driver
+            drv = open_driver()
+            try:
+                drv.get(self.url)
+                time.sleep(4)
+                return drv.page_source
+            finally:
+                drv.quit()
+        with requests.Session() as s:
+            s.headers["User-Agent"] = UA
+            r = pagecache.fetch(s, self.url, timeout=TIMEOUT)
+        if r is None or r.status_code >= 400:
+            raise ValueError(f"{self}: fetch failed ({getattr(r, 'status_code', 'error')})")
+        return r.text
+
+    def rows(self):
+        lines, links = page_lines_links(self.html())
+        return collect(lines, links, (self.state,), self.url)
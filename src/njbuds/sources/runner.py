@@ -0,0 +1,95 @@
+"""
+Fetch every configured state's sources concurrently into one dataset.
+
+Each adapter runs in its own thread. Browser adapters (Atlist, rendered
+finders) are capped at BROWSERS at a time. Rows are de-duplicated on
+(state, name, street, city) and written with the usual FIELDS columns, so
+resolve, enrichment and geocoding read the national file the same way they
+read the NJ one. One failing source is reported and skipped; the rest of the
+run carries on.
+
+    python -m njbuds.sources.runner                       # every state in config/states.json
+    python -m njbuds.sources.runner --states NJ,NY --kinds socrata -o out.csv
+"""
+import argparse, concurrent.futures as cf, csv, os, threading, time
+
+from njbuds import metrics
+from njbuds.sources import CONFIG, build, load_config
+from njbuds.utils import FIELDS, dispensary_key
+
+OUTPUT = "dispensaries_all_states.csv"
+WORKERS = int(os.getenv("NJBUDS_SOURCE_WORKERS", 8))
+BROWSERS = int(os.getenv("NJBUDS_BROWSERS", 2))
+
+def run_source(src, browsers):
+    t0 = time.perf_counter()
+    if src.uses_browser:
+        with browsers:
+            rows = list(src.fetch())
+    else:
+        rows = list(src.fetch())
+    return rows, time.perf_counter() - t0
+
+def collect(sources, workers=WORKERS, browsers=BROWSERS):
+    """Rows from every source, de-duplicated in config order; returns (rows, [(source, count or error)])."""
+    sem = threading.BoundedSemaphore(max(1, browsers))
+    results, report = {}, []
+    with cf.ThreadPoolExecutor(max(1, workers)) as ex:
+        futs = {ex.submit(run_source, s, sem): i for i, s in enumerate(sources)}
+        for fut in cf.as_completed(futs):
+            i = futs[fut]
+            s = sources[i]
+            try:
+                rows, secs = fut.result()
+            except Exception as e:
+                metrics.error(type(e).__name__, s.kind)
+                report.append((repr(s), f"failed: {type(e).__name__}: {e}"))
+                print(f"{s!r}: failed: {type(e).__name__}: {e}")
+                continue
+            results[i] = rows
+            report.append((repr(s), len(rows)))
+            metrics.count(f"source_{s.kind}_rows", len(rows))
+            print(f"{s!r}: {len(rows)} rows in {secs:.1f}s")
+    seen, out = set(), []
+    for i in range(len(sources)):   # config order, so earlier sources win duplicates
+        for r in results.get(i, ()):
+            key = (r["state"], dispensary_key(r["name"], r["street"], r["city"]))
+            if key not in seen:
+                seen.add(key)
+                out.append(r)
+    return out, report
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--config", default=CONFIG)
+    ap.add_argument("--states", default="", help="comma-separated state codes (default: all in config)")
+    ap.add_argument("--kinds", default="", help="comma-separated adapter kinds (socrata, atlist, html_finder)")
+    ap.add_argument("-o", "--output", default=OUTPUT)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--browsers", type=int, default=BROWSERS, help="browser adapters running at once")
+    args = ap.parse_args(argv)
+
+    states = {s.strip().upper() for s in args.states.split(",") if s.strip()}
+    kinds = {k.strip() for k in args.kinds.split(",") if k.strip()}
+    sources = build(load_config(args.config), states, kinds)
+    if not sources:
+        raise SystemExit("No sources match; check --states / --kinds and the config")
+    print(f"{len(sources)} sources across {len({s.state for s in sources})} states")
+
+    with metrics.stage("sources") as st:
+        rows, _ = collect(sources, args.workers, args.browsers)
+        st.rows = len(rows)
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    by_state = {}
+    for r in rows:
+        by_state[r["state"]] = by_state.get(r["state"], 0) + 1
+    print("Rows per state:", ", ".join(f"{k} {v}" for k, v in sorted(by_state.items())))
+    print(f"Wrote {args.output} with {len(rows)} rows")
+    print(metrics.summary())
+    metrics.write("sources")
+
+if __name__ == "__main__":
+    main()
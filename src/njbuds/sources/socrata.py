@@ -0,0 +1,57 @@
+"""
+Socrata open-data adapter (data.nj.gov and every other state portal on Socrata).
+
+    {"kind": "socrata", "domain": "data.nj.gov", "dataset": "8hz7-zvhn"}
+
+Columns are matched by the usual aliases (name / business_name / ...), so most
+license datasets work without a mapping. Add "columns": {"name": "licensee"}
+when a portal uses a name not in ALIASES. The app token comes from the env
+var named by "token_env" (default NJ_SODA_APP_TOKEN). Paging and incremental
+pulls are njbuds.socrata's.
+"""
+from njbuds import socrata
+from njbuds.sources.base import Source
+
+ALIASES = {
+    "name":    ["name","business_name","retailer_name","dispensary_name"],
+    "street":  ["address","street_address","location_address","site_address"],
+    "city":    ["city","municipality","town"],
+    "state":   ["state","st"],
+    "zip":     ["zip","zipcode","postal_code"],
+    "phone":   ["phone","phone_number","telephone"],
+    "website": ["website","website_url","url"],
+}
+
+def pick(d, keys, default=""):
+    for k in keys:
+        if k in d and d[k]:
+            return str(d[k]).strip()
+    return default
+
+def normalize_record(rec, source, state="", columns=None):
+    """One Socrata record (JSON or CSV row) -> a FIELDS row, keys matched case-insensitively."""
+    r = {(k.lower() if isinstance(k, str) else k): v for k, v in rec.items()}
+    out = {f: pick(r, ([columns[f].lower()] if columns and f in columns else []) + keys)
+           for f, keys in ALIASES.items()}
+    out["state"] = out["state"] or state
+    if isinstance(r.get("location"), dict):
+        loc = r["location"]
+        out["street"] = out["street"] or loc.get("address", "")
+        out["city"]   = out["city"]   or loc.get("city", "")
+        out["state"]  = out["state"]  or loc.get("state", "")
+        out["zip"]    = out["zip"]    or loc.get("zip", "")
+    out["source"] = source
+    return out
+
+class SocrataSource(Source):
+    kind = "socrata"
+
+    def __init__(self, state, domain, dataset, columns=None, token_env="NJ_SODA_APP_TOKEN", label="", **opts):
+        super().__init__(state, label or f"{domain} {dataset}", **opts)
+        self.domain, self.dataset, self.columns, self.token_env = domain, dataset, columns, token_env
+
+    def rows(self):
+        # resource CSV: the endpoint that is least often blocked; incremental after the first pull
+        recs, _ = socrata.pull(self.domain, self.dataset, fmt="csv", token_env=self.token_env)
+        for rec in recs:
+            yield normalize_record(rec, self.label, self.state, self.columns)
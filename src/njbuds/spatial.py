@@ -0,0 +1,151 @@
+"""
+In-memory spatial index over a geocoded snapshot.
+
+Points are bucketed into a fixed lat/lon grid (CELL_DEG degrees per side).
+A radius query only touches the cells overlapping the search box, and a
+k-nearest query walks outward ring by ring, from the first ring that reaches
+the populated cells, until the k-th hit is closer than any unvisited cell, so
+neither scans the whole frame nor loops over empty grid far from the points. Distances are
+haversine, in miles, computed with numpy over the candidate cells only.
+
+    idx = load_index("nj_dispensaries_geocoded.csv")
+    idx.within(40.73, -74.17, 5, category="medicinal")
+    idx.nearest(40.73, -74.17, k=3, platform="Dutchie")
+"""
+import math, os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_MI = 3958.7613
+CELL_DEG = 0.1   # ~7 mi of latitude; a handful of dispensaries per cell in dense areas
+
+def haversine_mi(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles; scalars or numpy arrays (degrees)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class SpatialIndex:
+    def __init__(self, df, cell_deg=CELL_DEG):
+        lat = pd.to_numeric(df.get("lat"), errors="coerce")
+        lon = pd.to_numeric(df.get("lon"), errors="coerce")
+        keep = (lat.notna() & lon.notna()).values
+        self.df = df.loc[keep].reset_index(drop=True)
+        self.lat = lat.values[keep].astype(np.float64)
+        self.lon = lon.values[keep].astype(np.float64)
+        self.cell_deg = cell_deg
+
+        ci = np.floor(self.lat / cell_deg).astype(np.int64)
+        cj = np.floor(self.lon / cell_deg).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        self._cells = {}
+        if len(order):
+            keys = np.stack([ci[order], cj[order]], axis=1)
+            starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+            for s, e in zip(starts, np.r_[starts[1:], len(order)]):
+                self._cells[(int(keys[s, 0]), int(keys[s, 1]))] = order[s:e]
+        self._ci_range = (int(ci.min()), int(ci.max())) if len(ci) else (0, -1)
+        self._cj_range = (int(cj.min()), int(cj.max())) if len(cj) else (0, -1)
+
+        self._masks = {}
+        for col, multi in (("category", True), ("platform", False)):
+            if col in self.df.columns:
+                self._masks[col] = self._value_masks(self.df[col], multi)
+
+    def __len__(self):
+        return len(self.df)
+
+    @staticmethod
+    def _value_masks(col, multi):
+        vals = col.fillna("").astype(str).str.lower()
+        masks = {}
+        for v in (set(x for s in vals for x in s.split(";") if x) if multi else set(vals) - {""}):
+            masks[v] = vals.str.split(";").map(lambda parts: v in parts).values if multi else (vals == v).values
+        return masks
+
+    def _filter(self, idx, category, platform):
+        for col, want in (("category", category), ("platform", platform)):
+            if want:
+                mask = self._masks.get(col, {}).get(want.lower())
+                if mask is None:
+                    return idx[:0]
+                idx = idx[mask[idx]]
+        return idx
+
+    def _gather(self, i0, i1, j0, j1):
+        # only cells that can hold points: a huge box must not mean a huge loop
+        i0, i1 = max(i0, self._ci_range[0]), min(i1, self._ci_range[1])
+        j0, j1 = max(j0, self._cj_range[0]), min(j1, self._cj_range[1])
+        parts = [self._cells[c] for c in ((i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+                 if c in self._cells]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def within(self, lat, lon, miles, category=None, platform=None, limit=None):
+        """Rows within `miles` of (lat, lon), nearest first: (row positions, distances)."""
+        dlat = miles / 69.0
+        dlon = min(miles / max(69.0 * math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6), 180.0)
+        g = self.cell_deg
+        idx = self._gather(math.floor((lat - dlat) / g), math.floor((lat + dlat) / g),
+                           math.floor((lon - dlon) / g), math.floor((lon + dlon) / g))
+        idx = self._filter(idx, category, platform)
+        d = haversine_mi(lat, lon, self.lat[idx], self.lon[idx])
+        keep = d <= miles
+        idx, d = idx[keep], d[keep]
+        order = np.argsort(d, kind="stable")[:limit]
+        return idx[order], d[order]
+
+    def nearest(self, lat, lon, k=5, category=None, platform=None, max_miles=None):
+        """k closest rows to (lat, lon): (row positions, distances)."""
+        g = self.cell_deg
+        ci, cj = math.floor(lat / g), math.floor(lon / g)
+        (i_lo, i_hi), (j_lo, j_hi) = self._ci_range, self._cj_range
+        # rings before first_ring miss the populated cells entirely; after max_ring nothing is left
+        first_ring = max(0, i_lo - ci, ci - i_hi, j_lo - cj, cj - j_hi)
+        max_ring = max(abs(ci - i_lo), abs(ci - i_hi), abs(cj - j_lo), abs(cj - j_hi))
+        coslat = math.cos(math.radians(lat))
+        def outside(r):
+            # lower bound on the distance to any point outside ring r: it is at least r*g
+            # degrees off in latitude, or r*g degrees off in longitude, i.e. beyond the
+            # meridian at that offset (distance asin(cos(lat) * sin(dlon)) from the query)
+            dlat = math.radians(r * g)
+            dlon = math.asin(min(coslat * math.sin(math.radians(min(r * g, 90.0))), 1.0))
+            return EARTH_RADIUS_MI * min(dlat, dlon)
+
+        found_i, found_d = np.empty(0, dtype=np.int64), np.empty(0)
+        for r in range(first_ring, max_ring + 1):
+            if max_miles is not None and r and outside(r - 1) > max_miles:
+                break   # everything from ring r outward is farther than max_miles
+            if r == 0:
+                ring = self._gather(ci, ci, cj, cj)
+            else:
+                ring = np.concatenate([
+                    self._gather(ci - r, ci - r, cj - r, cj + r), self._gather(ci + r, ci + r, cj - r, cj + r),
+                    self._gather(ci - r + 1, ci + r - 1, cj - r, cj - r), self._gather(ci - r + 1, ci + r - 1, cj + r, cj + r),
+                ])
+            ring = self._filter(ring, category, platform)
+            if len(ring):
+                found_i = np.r_[found_i, ring]
+                found_d = np.r_[found_d, haversine_mi(lat, lon, self.lat[ring], self.lon[ring])]
+            if len(found_d) >= k and np.partition(found_d, k - 1)[k - 1] <= outside(r):
+                break
+        if max_miles is not None:
+            keep = found_d <= max_miles
+            found_i, found_d = found_i[keep], found_d[keep]
+        order = np.argsort(found_d, kind="stable")[:k]
+        return found_i[order], found_d[order]
+
+    def records(self, idx, dist):
+        """Row dicts with a distance_mi field, for JSON responses."""
+        rows = self.df.iloc[idx].to_dict(orient="records")
+        for r, d in zip(rows, dist):
+            r["distance_mi"] = round(float(d), 3)
+        return rows
+
+@lru_cache(maxsize=4)
+def _load(path, mtime_ns, cell_deg):
+    return SpatialIndex(pd.read_csv(path, dtype=str, keep_default_na=False), cell_deg)
+
+def load_index(path, cell_deg=CELL_DEG):
+    """Build (once per snapshot file version) and return the index for `path`."""
+    return _load(os.path.abspath(path), os.stat(path).st_mtime_ns, cell_deg)
@@ -0,0 +1,170 @@
+"""
+Storage stage: bulk-load the final dataset into SQLite (local/tests) or PostgreSQL.
+
+Rows are staged in one streaming pass (COPY FROM STDIN on Postgres, a single
+executemany on SQLite) and then merged with one set-based upsert keyed on
+`disp_key`. Rows whose content hash is unchanged are left untouched.
+
+    python -m njbuds.storage nj_dispensaries_complete.csv
+    python -m njbuds.storage nj_dispensaries_complete.csv --db postgresql://user@host/njbuds
+"""
+import argparse, csv, io, os, sqlite3, time
+
+from njbuds.utils import FIELDS, clean, norm_zip, dispensary_key, row_hash
+
+INPUT = "nj_dispensaries_complete.csv"
+SQLITE_PATH = os.path.join("data", "processed", "njbuds.sqlite")
+TABLE = "dispensaries"
+
+COLUMNS = ["disp_key"] + FIELDS + ["row_hash"]
+
+def _ddl(table, ts_type):
+    cols = ",\n  ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in FIELDS)
+    return f"""
+CREATE TABLE IF NOT EXISTS {table} (
+  disp_key TEXT PRIMARY KEY,
+  {cols},
+  row_hash TEXT NOT NULL,
+  updated_at {ts_type} NOT NULL
+)"""
+
+def _upsert_sql(table, staging, now_expr, distinct_op):
+    cols = ", ".join(COLUMNS)
+    sets = ",\n  ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+    return f"""
+INSERT INTO {table} ({cols}, updated_at)
+SELECT {cols}, {now_expr} FROM {staging} WHERE true
+ON CONFLICT (disp_key) DO UPDATE SET
+  {sets},
+  updated_at = excluded.updated_at
+WHERE {table}.row_hash {distinct_op} excluded.row_hash"""
+
+def _count_sql(table, staging):
+    # (new keys, keys whose content changed) -- computed before the merge
+    return f"""
+SELECT
+  SUM(CASE WHEN t.disp_key IS NULL THEN 1 ELSE 0 END),
+  SUM(CASE WHEN t.disp_key IS NOT NULL AND t.row_hash <> s.row_hash THEN 1 ELSE 0 END)
+FROM {staging} s LEFT JOIN {table} t ON t.disp_key = s.disp_key"""
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for raw in csv.DictReader(f):
+            row = {k: clean(raw.get(k)) for k in FIELDS}
+            row["zip"] = norm_zip(row["zip"])
+            yield dispensary_key(row["name"], row["street"], row["city"]), row
+
+def iter_records(path):
+    """
+    Yield load-ready tuples (COLUMNS order), de-duped on disp_key (last row wins).
+    Two passes over the file: the first keeps only key -> last line number, so
+    memory grows with the number of keys, not with the rows.
+    """
+    last = {key: i for i, (key, _) in enumerate(_rows(path))}
+    for i, (key, row) in enumerate(_rows(path)):
+        if last[key] == i:
+            yield tuple([key] + [row[k] for k in FIELDS] + [row_hash(row)])
+
+def load_sqlite(records, db_path=SQLITE_PATH, table=TABLE):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(_ddl(table, "TEXT"))
+        con.execute("BEGIN")
+        con.execute(f"CREATE TEMP TABLE _stage AS SELECT {', '.join(COLUMNS)} FROM {table} WHERE 0")
+        ph = ", ".join("?" for _ in COLUMNS)
+        con.executemany(f"INSERT INTO _stage VALUES ({ph})", records)
+        staged = con.execute("SELECT COUNT(*) FROM _stage").fetchone()[0]
+        added, modified = con.execute(_count_sql(table, "_stage")).fetchone()
+        con.execute(_upsert_sql(table, "_stage", "strftime('%Y-%m-%dT%H:%M:%SZ','now')", "<>"))
+        con.execute("DROP TABLE _stage")
+        con.execute("COMMIT")
+    except Exception:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+    return staged, added or 0, modified or 0
+
+class _CopyStream(io.RawIOBase):
+    """File-like view over a record iterator, rendered as CSV on demand for COPY."""
+    def __init__(self, records):
+        self._it = iter(records)
+        self._buf = b""
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buf) < len(b):
+            rec = next(self._it, None)
+            if rec is None:
+                break
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerow(rec)
+            self._buf += out.getvalue().encode("utf-8")
+            self.count += 1
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+def load_postgres(records, dsn, table=TABLE):
+    try:
+        import psycopg2
+    except ImportError:
+        raise SystemExit("PostgreSQL loading needs psycopg2: pip install psycopg2-binary")
+
+    stream = _CopyStream(records)
+    con = psycopg2.connect(dsn)
+    try:
+        with con:  # one transaction: commit on success, rollback on error
+            with con.cursor() as cur:
+                cur.execute(_ddl(table, "TIMESTAMPTZ"))
+                cur.execute(f"CREATE TEMP TABLE _stage (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+                cur.execute("ALTER TABLE _stage DROP COLUMN updated_at")
+                cur.copy_expert(
+                    # csv.writer leaves empty strings unquoted, which COPY would read as NULL
+                    f"COPY _stage ({', '.join(COLUMNS)}) FROM STDIN WITH "
+                    f"(FORMAT csv, FORCE_NOT_NULL ({', '.join(FIELDS)}))",
+                    io.BufferedReader(stream, buffer_size=1 << 16),
+                )
+                cur.execute(_count_sql(table, "_stage"))
+                added, modified = cur.fetchone()
+                cur.execute(_upsert_sql(table, "_stage", "now()", "IS DISTINCT FROM"))
+    finally:
+        con.close()
+    return stream.count, added or 0, modified or 0
+
+def load(path=INPUT, db=None, table=TABLE):
+    t0 = time.perf_counter()
+    records = iter_records(path)   # streamed into the loader; read time is part of the load
+
+    if db and db.startswith(("postgres://","postgresql://")):
+        staged, added, modified = load_postgres(records, db, table)
+        target = db.rsplit("@", 1)[-1]
+    else:
+        db_path = db[len("sqlite:///"):] if db and db.startswith("sqlite:///") else (db or SQLITE_PATH)
+        staged, added, modified = load_sqlite(records, db_path, table)
+        target = db_path
+    t2 = time.perf_counter()
+
+    secs = max(t2 - t0, 1e-9)
+    print(f"Loaded {staged} rows from {path} into {target}:{table} in {secs:.3f}s ({staged / secs:,.0f} rows/s)")
+    print(f"  inserted {added}, updated {modified}, unchanged {staged - added - modified}")
+    return {"rows": staged, "inserted": added, "updated": modified, "seconds": round(secs, 4)}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk upsert the final dataset into SQLite or PostgreSQL")
+    ap.add_argument("input", nargs="?", default=INPUT)
+    ap.add_argument("--db", default=None, help=f"sqlite path / sqlite:///path / postgresql://dsn (default {SQLITE_PATH})")
+    ap.add_argument("--table", default=TABLE)
+    args = ap.parse_args(argv)
+    load(args.input, args.db, args.table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Streaming row pipeline: stages run at the same time, connected by bounded queues.
+
+A source (any iterator of row dicts, such as a scraper's iter_rows) feeds a
+chain of stages. Each stage has its own worker threads, and its output queue
+holds at most `buffer` rows. A fast upstream blocks when a slow downstream
+falls behind, so memory stays flat however many rows go through. The first
+row reaches the sink while the scraper is still scrolling, and end-to-end
+time is roughly the slowest stage, not the sum of all stages.
+
+A stage function takes a row and returns a row, a list of rows, or None to
+drop it. If it raises, the input row passes through unchanged and the error
+is counted in njbuds.metrics, so one bad site never stops the stream.
+
+    stages = [Stage("websites", find_website, workers=1, close=quit_driver),
+              Stage("enrich", enrich_row, workers=10)]
+    with CsvSink("out.csv", FIELDS) as sink:
+        for row in pipeline(scraper.iter_rows(drv), stages):
+            sink.write(row)
+"""
+import csv, os, queue, threading, time
+
+from njbuds import metrics
+
+BUFFER = 64          # rows held between two stages
+FLUSH_EVERY = 20     # sink rows between flushes
+
+_DONE = object()
+
+class Stage:
+    def __init__(self, name, fn, workers=1, close=None):
+        self.name, self.fn, self.workers, self.close = name, fn, max(1, workers), close
+
+class _Abort(Exception):
+    pass
+
+def _put(q, item, stop):
+    while True:
+        if stop.is_set():
+            raise _Abort()
+        try:
+            q.put(item, timeout=0.2)
+            return
+        except queue.Full:
+            continue
+
+def _get(q, stop):
+    while True:
+        if stop.is_set():
+            raise _Abort()
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+
+def _feed(source, out, stop, errors):
+    try:
+        for row in source:
+            _put(out, row, stop)
+            metrics.count("stream_source_rows")
+    except _Abort:
+        return
+    except Exception as e:   # a dead scraper still ends the stream cleanly
+        errors.append(("source", e))
+        metrics.error(f"stream_source_{type(e).__name__}")
+    try:
+        _put(out, _DONE, stop)
+    except _Abort:
+        pass
+
+def _work(stage, inq, out, stop, left, lock):
+    aborted = False
+    try:
+        while True:
+            row = _get(inq, stop)
+            if row is _DONE:
+                _put(inq, _DONE, stop)   # let the stage's other workers see it too
+                break
+            try:
+                res = stage.fn(row)
+            except Exception as e:
+                metrics.error(f"stream_{stage.name}_{type(e).__name__}")
+                res = row
+            for r in (res if isinstance(res, list) else () if res is None else (res,)):
+                _put(out, r, stop)
+            metrics.count(f"stream_{stage.name}_rows")
+    except _Abort:
+        aborted = True
+    with lock:
+        left[stage.name] -= 1
+        last = left[stage.name] == 0
+    if last:
+        if stage.close:
+            stage.close()   # runs on early stop too, so drivers are not left open
+        if not aborted:
+            try:
+                _put(out, _DONE, stop)
+            except _Abort:
+                pass
+
+def pipeline(source, stages, buffer=BUFFER):
+    """Iterate the rows coming out of the last stage as soon as each is ready."""
+    stop, lock, errors = threading.Event(), threading.Lock(), []
+    q = queue.Queue(buffer)
+    threads = [threading.Thread(target=_feed, args=(source, q, stop, errors), name="stream-source", daemon=True)]
+    left = {}
+    for st in stages:
+        out = queue.Queue(buffer)
+        left[st.name] = st.workers
+        threads += [threading.Thread(target=_work, args=(st, q, out, stop, left, lock),
+                                     name=f"stream-{st.name}-{i}", daemon=True) for i in range(st.workers)]
+        q = out
+    for t in threads:
+        t.start()
+    try:
+        while True:
+            row = q.get()
+            if row is _DONE:
+                break
+            yield row
+    finally:
+        stop.set()   # also reached when the consumer stops early
+        for t in threads:
+            t.join(timeout=5)
+        for name, e in errors:
+            print(f"stream {name} stopped early: {type(e).__name__}: {e}")
+
+class CsvSink:
+    """Append rows to a CSV as they arrive; flushed every FLUSH_EVERY rows and on close."""
+    def __init__(self, path, fieldnames, flush_every=FLUSH_EVERY):
+        self.path, self.fieldnames, self.flush_every = path, list(fieldnames), flush_every
+        self.count = 0
+        self.started = time.perf_counter()
+        self.first_row_after = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=self.fieldnames, extrasaction="ignore")
+        self._w.writeheader()
+        return self
+
+    def write(self, row):
+        self._w.writerow({k: row.get(k, "") for k in self.fieldnames})
+        self.count += 1
+        if self.first_row_after is None:
+            self.first_row_after = time.perf_counter() - self.started
+        if self.count % self.flush_every == 0:
+            self._f.flush()
+
+    def __exit__(self, *exc):
+        self._f.close()
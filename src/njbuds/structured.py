@@ -0,0 +1,179 @@
+"""
+schema.org structured data (JSON-LD and microdata) pulled straight out of raw HTML.
+
+Only the <script type="application/ld+json"> blocks and itemprop= tags are
+looked at, with regexes over the page string, so there is no DOM parse. A
+page without either costs two substring checks. Callers use the result as a
+fast path and fall back to the text/regex phone scan only when it is empty.
+
+    sd = structured.extract(html)
+    sd  ->  {"phone": "(973) 555-0123", "street": "...", "city": "...", "state": "NJ",
+             "zip": "07304", "lat": "40.72", "lon": "-74.05", "hours": "Mo 09:00-21:00; ..."}
+
+locations(html) returns one dict per business node, for chain pages that
+list every store.
+"""
+import html as _html
+import json, re
+
+from njbuds.utils import NANP_RE, NON_DIGIT_RE, clean, norm_zip
+
+KEYS = ("phone","street","city","state","zip","lat","lon","hours")
+
+LD_RE = re.compile(
+    r"""<script\b[^>]*\btype\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""",
+    re.I | re.S)
+# itemprop may hold several space-separated names: capture up to the closing quote
+ITEMPROP_RE = re.compile(
+    r"""<[a-z][a-z0-9]*\b[^>]*?\bitemprop\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>/]+))[^>]*>""", re.I)
+CONTENT_RE = re.compile(r"""\b(?:content|href|datetime)\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I)
+
+DAYS = {"monday": "Mo", "tuesday": "Tu", "wednesday": "We", "thursday": "Th",
+        "friday": "Fr", "saturday": "Sa", "sunday": "Su"}
+
+# microdata itemprop -> our key
+MICRODATA = {
+    "telephone": "phone", "streetaddress": "street", "addresslocality": "city",
+    "addressregion": "state", "postalcode": "zip", "latitude": "lat",
+    "longitude": "lon", "openinghours": "hours",
+}
+
+def fmt_phone(v):
+    d = NON_DIGIT_RE.sub("", clean(v))
+    if len(d) == 11 and d.startswith("1"):
+        d = d[1:]
+    return f"({d[:3]}) {d[3:6]}-{d[6:]}" if NANP_RE.match(d) else ""
+
+def _coord(v):
+    try:
+        return f"{float(v):.6f}".rstrip("0").rstrip(".")
+    except (TypeError, ValueError):
+        return ""
+
+def _nodes(obj):
+    """Every dict in a JSON-LD document, flattening lists and @graph."""
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, list):
+            stack.extend(reversed(o))
+        elif isinstance(o, dict):
+            yield o
+            for k in ("@graph", "location", "department", "subOrganization"):
+                if k in o:
+                    stack.append(o[k])
+
+def _hours(node):
+    oh = node.get("openingHours")
+    if oh:
+        return "; ".join(clean(x) for x in (oh if isinstance(oh, list) else [oh]) if clean(x))
+    spec = node.get("openingHoursSpecification")
+    if not spec:
+        return ""
+    parts = []
+    for s in spec if isinstance(spec, list) else [spec]:
+        if not isinstance(s, dict):
+            continue
+        days = s.get("dayOfWeek") or []
+        days = days if isinstance(days, list) else [days]
+        days = [DAYS.get(clean(d).rsplit("/", 1)[-1].lower(), "") for d in days]
+        opens, closes = clean(s.get("opens"))[:5], clean(s.get("closes"))[:5]
+        if opens or closes:
+            parts.append(f"{','.join(d for d in days if d)} {opens}-{closes}".strip())
+    return "; ".join(parts)
+
+def _from_node(node):
+    rec = dict.fromkeys(KEYS, "")
+    rec["phone"] = fmt_phone(node.get("telephone"))
+    addr = node.get("address")
+    if isinstance(addr, list):
+        addr = addr[0] if addr else None
+    if isinstance(addr, dict):
+        rec["street"] = clean(addr.get("streetAddress"))
+        rec["city"] = clean(addr.get("addressLocality"))
+        rec["state"] = clean(addr.get("addressRegion"))
+        rec["zip"] = norm_zip(addr.get("postalCode"))
+    elif isinstance(addr, str):
+        rec["street"] = clean(addr)
+    geo = node.get("geo")
+    if isinstance(geo, dict):
+        rec["lat"], rec["lon"] = _coord(geo.get("latitude")), _coord(geo.get("longitude"))
+    rec["hours"] = _hours(node)
+    return rec
+
+def jsonld_locations(html):
+    out = []
+    for m in LD_RE.finditer(html):
+        raw = m.group(1).strip()
+        if raw.startswith("<!--"):
+            raw = raw[4:].rsplit("-->", 1)[0]
+        try:
+            doc = json.loads(raw, strict=False)
+        except ValueError:
+            continue
+        for node in _nodes(doc):
+            if any(k in node for k in ("telephone", "address", "geo", "openingHours", "openingHoursSpecification")):
+                rec = _from_node(node)
+                if any(rec.values()):
+                    out.append(rec)
+    return out
+
+def microdata(html):
+    """itemprop values on the page as one record (itemscope nesting is not tracked)."""
+    rec = dict.fromkeys(KEYS, "")
+    hours = []
+    for m in ITEMPROP_RE.finditer(html):
+        for prop in next(g for g in m.groups() if g is not None).lower().split():
+            key = MICRODATA.get(prop)
+            if not key or (rec[key] and key != "hours"):
+                continue
+            c = CONTENT_RE.search(m.group(0))
+            if c:
+                val = c.group(1) if c.group(1) is not None else c.group(2)
+            else:
+                end = html.find("<", m.end())
+                val = html[m.end(): end if end != -1 else m.end() + 200]
+            val = clean(_html.unescape(val))
+            if key == "phone":
+                val = fmt_phone(val.replace("tel:", ""))
+            elif key == "zip":
+                val = norm_zip(val)
+            elif key in ("lat","lon"):
+                val = _coord(val)
+            if key == "hours":
+                if val:
+                    hours.append(val)
+            else:
+                rec[key] = val
+    rec["hours"] = "; ".join(hours)
+    return rec if any(rec.values()) else None
+
+def locations(html):
+    """All structured business records on a page, JSON-LD first."""
+    if not html:
+        return []
+    recs = jsonld_locations(html) if "ld+json" in html or "LD+JSON" in html else []
+    if "itemprop" in html:
+        md = microdata(html)
+        if md:
+            recs.append(md)
+    return recs
+
+def extract(html):
+    """
+    One merged record for the page: the first location with a phone, with empty
+    fields filled from records that don't name a different phone (so one
+    store's hours never land on another). {} when the page has none.
+    """
+    recs = locations(html)
+    if not recs:
+        return {}
+    recs.sort(key=lambda r: not r["phone"])
+    best = dict(recs[0])
+    for r in recs[1:]:
+        if r["phone"] and r["phone"] != best["phone"]:
+            continue
+        for k in KEYS:
+            if not best[k] and r[k]:
+                best[k] = r[k]
+    return best
@@ -0,0 +1,312 @@
+"""
+Durable work queue in SQLite, plus a runner that drains it with N worker processes.
+
+A task is (queue, key, payload) -> result, in a single table. A worker leases a
+batch of tasks (status leased, lease_owner, lease_until), runs them, and
+records the result or the error. A task whose worker died is leased again once
+its lease expires. A task that fails MAX_ATTEMPTS times is marked failed and
+kept for inspection. Re-enqueueing a key that already exists is a no-op. A
+restarted run therefore skips finished work and picks up the rest; expire()
+sends results older than a TTL back to pending so they are recomputed.
+
+Each worker process runs one asyncio loop. It keeps `concurrency` handlers in
+flight on a thread pool (the fetch code is blocking requests) and renews the
+leases of running tasks in the background.
+
+Journal modes:
+  wal     (default) readers never block writers. Every process must be on
+          one machine, because WAL needs shared memory.
+  delete  classic rollback journal. Use this when several machines share
+          the queue file on a network mount (NFS/SMB), where WAL is unsafe.
+
+    q = TaskQueue("data/interim/queue.sqlite")
+    q.put("enrich", [(key, payload), ...])
+    run_workers(q.path, "enrich", "enrich_from_websites:domain_worker", procs=4, concurrency=10)
+    for key, payload, result in q.results("enrich"): ...
+
+    python -m njbuds.taskqueue data/interim/queue.sqlite             # status per queue
+    python -m njbuds.taskqueue data/interim/queue.sqlite --retry-failed enrich
+"""
+import argparse, asyncio, concurrent.futures as cf, importlib, json, os, socket, sqlite3, time
+
+QUEUE_PATH = os.path.join("data", "interim", "queue.sqlite")
+LEASE = 60.0          # seconds; renewed every LEASE/3 while a task runs
+MAX_ATTEMPTS = 3
+CONCURRENCY = 10      # handlers in flight per worker process
+POLL = 1.0            # idle wait when other workers hold the remaining leases
+JOURNALS = ("wal", "delete")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY,
+    queue       TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    result      TEXT,
+    error       TEXT,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    UNIQUE (queue, key)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (queue, status, id);
+"""
+
+class TaskQueue:
+    def __init__(self, path=QUEUE_PATH, journal="wal", max_attempts=MAX_ATTEMPTS):
+        if journal not in JOURNALS:
+            raise ValueError(f"journal must be one of {JOURNALS}")
+        self.path, self.journal, self.max_attempts = path, journal, max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.con = sqlite3.connect(path, isolation_level=None, timeout=60)
+        self.con.execute(f"PRAGMA journal_mode={journal.upper()}")
+        self.con.execute("PRAGMA synchronous=NORMAL" if journal == "wal" else "PRAGMA synchronous=FULL")
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.close()
+
+    def _tx(self, fn):
+        self.con.execute("BEGIN IMMEDIATE")   # take the write lock up front: no lease races
+        try:
+            out = fn()
+            self.con.execute("COMMIT")
+            return out
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+
+    def put(self, queue, items):
+        """Enqueue (key, payload) pairs; existing keys are left alone. Returns the number added."""
+        now = time.time()
+        rows = [(queue, str(k), json.dumps(p, ensure_ascii=False), now, now) for k, p in items]
+        def go():
+            before = self.con.total_changes
+            self.con.executemany("INSERT OR IGNORE INTO tasks (queue, key, payload, created, updated) "
+                                 "VALUES (?, ?, ?, ?, ?)", rows)
+            return self.con.total_changes - before
+        return self._tx(go)
+
+    def lease(self, queue, owner, n=1, seconds=LEASE):
+        """Up to n runnable tasks as [(id, key, payload, attempt)], leased to owner."""
+        def go():
+            now = time.time()
+            # expired leases that used their last attempt will never finish
+            self.con.execute("UPDATE tasks SET status='failed', error=COALESCE(error, 'lease expired'), updated=? "
+                             "WHERE queue=? AND status='leased' AND lease_until<? AND attempts>=?",
+                             (now, queue, now, self.max_attempts))
+            got = self.con.execute(
+                "SELECT id, key, payload, attempts FROM tasks WHERE queue=? AND attempts<? "
+                "AND (status='pending' OR (status='leased' AND lease_until<?)) ORDER BY id LIMIT ?",
+                (queue, self.max_attempts, now, n)).fetchall()
+            if got:
+                self.con.executemany("UPDATE tasks SET status='leased', lease_owner=?, lease_until=?, "
+                                     "attempts=attempts+1, updated=? WHERE id=?",
+                                     [(owner, now + seconds, now, t[0]) for t in got])
+            return [(i, k, json.loads(p), a + 1) for i, k, p, a in got]
+        return self._tx(go)
+
+    def extend(self, ids, owner, seconds=LEASE):
+        if ids:
+            now = time.time()
+            self._tx(lambda: self.con.executemany(
+                "UPDATE tasks SET lease_until=?, updated=? WHERE id=? AND lease_owner=? AND status='leased'",
+                [(now + seconds, now, i, owner) for i in ids]))
+
+    def complete(self, task_id, owner, result):
+        self._tx(lambda: self.con.execute(
+            "UPDATE tasks SET status='done', result=?, error=NULL, lease_until=NULL, updated=? "
+            "WHERE id=? AND lease_owner=?", (json.dumps(result, ensure_ascii=False), time.time(), task_id, owner)))
+
+    def fail(self, task_id, owner, error):
+        """Record an error; the task goes back to pending until it runs out of attempts."""
+        self._tx(lambda: self.con.execute(
+            "UPDATE tasks SET status=CASE WHEN attempts<? THEN 'pending' ELSE 'failed' END, "
+            "error=?, lease_until=NULL, updated=? WHERE id=? AND lease_owner=?",
+            (self.max_attempts, str(error)[:2000], time.time(), task_id, owner)))
+
+    def release(self, ids, owner):
+        """Hand leased tasks back untouched (clean shutdown); the attempt is not counted."""
+        if ids:
+            self._tx(lambda: self.con.executemany(
+                "UPDATE tasks SET status='pending', attempts=MAX(attempts-1, 0), lease_until=NULL, updated=? "
+                "WHERE id=? AND lease_owner=? AND status='leased'", [(time.time(), i, owner) for i in ids]))
+
+    def counts(self, queue=None):
+        """{queue: {status: n}}"""
+        sql, args = "SELECT queue, status, COUNT(*) FROM tasks", ()
+        if queue is not None:
+            sql, args = sql + " WHERE queue=?", (queue,)
+        out = {}
+        for q, st, n in self.con.execute(sql + " GROUP BY queue, status", args):
+            out.setdefault(q, {})[st] = n
+        return out
+
+    def outstanding(self, queue):
+        """Tasks not yet done or failed (pending, or leased by any worker)."""
+        return self.con.execute("SELECT COUNT(*) FROM tasks WHERE queue=? AND status IN ('pending','leased')",
+                                (queue,)).fetchone()[0]
+
+    def results(self, queue, keys=None):
+        """Yield (key, payload, result) for finished tasks (optionally only these keys)."""
+        cur = self.con.execute("SELECT key, payload, result FROM tasks WHERE queue=? AND status='done' ORDER BY id",
+                               (queue,))
+        wanted = set(keys) if keys is not None else None
+        for k, p, r in cur:
+            if wanted is None or k in wanted:
+                yield k, json.loads(p), json.loads(r)
+
+    def failures(self, queue):
+        return self.con.execute("SELECT key, attempts, error FROM tasks WHERE queue=? AND status='failed' ORDER BY id",
+                                (queue,)).fetchall()
+
+    def expire(self, queue, older_than):
+        """Send tasks finished more than `older_than` seconds ago back to pending. Returns how many."""
+        return self._tx(lambda: self.con.execute(
+            "UPDATE tasks SET status='pending', attempts=0, result=NULL, error=NULL, updated=? "
+            "WHERE queue=? AND status='done' AND updated<=?",
+            (time.time(), queue, time.time() - older_than)).rowcount)
+
+    def retry_failed(self, queue):
+        return self._tx(lambda: self.con.execute(
+            "UPDATE tasks SET status='pending', attempts=0, updated=? WHERE queue=? AND status='failed'",
+            (time.time(), queue)).rowcount)
+
+    def clear(self, queue):
+        return self._tx(lambda: self.con.execute("DELETE FROM tasks WHERE queue=?", (queue,)).rowcount)
+
+# ---------- workers ----------
+
+def resolve_handler(handler):
+    """A callable, or "module:function" (importable in a worker process)."""
+    if callable(handler):
+        return handler
+    mod, _, name = handler.partition(":")
+    return getattr(importlib.import_module(mod), name)
+
+async def _drain(q, queue, fn, owner, concurrency, lease):
+    loop = asyncio.get_running_loop()
+    pool = cf.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="njbuds-task")
+    inflight = {}   # asyncio future -> task id
+    done = failed = 0
+    renewed = time.monotonic()
+    try:
+        while True:
+            free = concurrency - len(inflight)
+            for tid, key, payload, attempt in (q.lease(queue, owner, free, lease) if free else []):
+                inflight[loop.run_in_executor(pool, fn, payload)] = tid
+            if not inflight:
+                if not q.outstanding(queue):
+                    break
+                await asyncio.sleep(POLL)   # the rest is leased by other workers
+                continue
+            finished, _ = await asyncio.wait(inflight, timeout=lease / 3, return_when=asyncio.FIRST_COMPLETED)
+            for fut in finished:
+                tid = inflight.pop(fut)
+                exc = fut.exception()
+                if exc is None:
+                    q.complete(tid, owner, fut.result())
+                    done += 1
+                else:
+                    q.fail(tid, owner, f"{type(exc).__name__}: {exc}")
+                    failed += 1
+            if time.monotonic() - renewed > lease / 3:
+                q.extend(list(inflight.values()), owner, lease)
+                renewed = time.monotonic()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        q.release(list(inflight.values()), owner)
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return done, failed
+
+def work(db_path, queue, handler, concurrency=CONCURRENCY, journal="wal", lease=LEASE,
+         max_attempts=MAX_ATTEMPTS, worker=0):
+    """One worker: drain `queue` until nothing is pending or leased. Returns (done, failed)."""
+    owner = f"{socket.gethostname()}:{os.getpid()}:{worker}"
+    q = TaskQueue(db_path, journal, max_attempts)
+    try:
+        return asyncio.run(_drain(q, queue, resolve_handler(handler), owner, concurrency, lease))
+    except KeyboardInterrupt:
+        if not worker:
+            raise   # in-process: the caller must not mistake an interrupt for a drained queue
+        return 0, 0   # worker process: the parent got the same SIGINT and re-raises it
+    finally:
+        q.close()
+        if worker:
+            from njbuds import metrics
+            metrics.dump(_worker_metrics(queue, worker, os.getppid()))   # each process has its own registry
+
+def _worker_metrics(queue, worker, parent):
+    from njbuds import metrics
+    return os.path.join(metrics.METRICS_DIR, f".{queue}.{parent}.worker{worker}.json")
+
+def _merge_worker_metrics(queue, procs):
+    from njbuds import metrics
+    for i in range(1, procs + 1):
+        path = _worker_metrics(queue, i, os.getpid())
+        if os.path.exists(path):
+            metrics.merge(path)
+            os.remove(path)
+
+def run_workers(db_path, queue, handler, procs=1, concurrency=CONCURRENCY, journal="wal",
+                lease=LEASE, max_attempts=MAX_ATTEMPTS, progress_every=10.0):
+    """
+    Drain a queue with `procs` worker processes (in this process when procs == 1).
+    Several machines can run this against one queue file (journal="delete").
+    """
+    if procs <= 1:
+        return work(db_path, queue, handler, concurrency, journal, lease, max_attempts)
+    import multiprocessing as mp
+    ps = [mp.Process(target=work, name=f"njbuds-worker-{i}",
+                     args=(db_path, queue, handler, concurrency, journal, lease, max_attempts, i))
+          for i in range(1, procs + 1)]
+    for p in ps:
+        p.start()
+    q = TaskQueue(db_path, journal, max_attempts)
+    c = {}
+    try:
+        while any(p.is_alive() for p in ps):
+            for p in ps:
+                p.join(progress_every / len(ps))
+            c = q.counts(queue).get(queue, {})
+            print(f"[{queue}] " + ", ".join(f"{k} {c.get(k, 0)}" for k in ("pending", "leased", "done", "failed")))
+        return c.get("done", 0), c.get("failed", 0)
+    except KeyboardInterrupt:
+        for p in ps:
+            p.join()   # workers got the same SIGINT and hand their leases back
+        raise
+    finally:
+        q.close()
+        _merge_worker_metrics(queue, procs)   # one report for the stage, not one per worker
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect or reset a njbuds task queue")
+    ap.add_argument("db", nargs="?", default=QUEUE_PATH)
+    ap.add_argument("--journal", choices=JOURNALS, default="wal")
+    ap.add_argument("--failures", metavar="QUEUE", help="list failed tasks and their last error")
+    ap.add_argument("--retry-failed", metavar="QUEUE")
+    ap.add_argument("--clear", metavar="QUEUE", help="delete every task (and result) in a queue")
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        raise SystemExit(f"{args.db} not found")
+    q = TaskQueue(args.db, args.journal)
+    try:
+        if args.retry_failed:
+            print(f"Re-queued {q.retry_failed(args.retry_failed)} failed task(s)")
+        if args.clear:
+            print(f"Deleted {q.clear(args.clear)} task(s)")
+        if args.failures:
+            for key, attempts, err in q.failures(args.failures):
+                print(f"{key}\t{attempts}\t{err}")
+            return
+        for name, c in sorted(q.counts().items()):
+            print(f"{name:24s}" + "  ".join(f"{k} {c.get(k, 0)}" for k in ("pending", "leased", "done", "failed")))
+    finally:
+        q.close()
+
+if __name__ == "__main__":
+    main()
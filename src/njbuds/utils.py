@@ -0,0 +1,154 @@
+import re, hashlib
+
+# Canonical column order used by every stage's CSV output
+FIELDS = ["name","street","city","state","zip","website","phone","source"]
+
+_WS_RE = re.compile(r"\s+")
+
+def clean(v):
+    """str() a cell, treating None/NaN/'nan' as empty."""
+    if v is None:
+        return ""
+    s = str(v).strip()
+    return "" if s.lower() in ("nan","none") else s
+
+def norm_zip(v):
+    # pandas/CSV round-trips drop the leading zero of NJ zips (07304 -> 7304)
+    z = clean(v).split("-")[0].split(".")[0]
+    return z.zfill(5) if z.isdigit() and len(z) <= 5 else z
+
+def norm_text(v):
+    return _WS_RE.sub(" ", clean(v).lower())
+
+STREET_ABBR = {
+    "street":"st","avenue":"ave","av":"ave","road":"rd","route":"rt","rte":"rt","highway":"hwy",
+    "boulevard":"blvd","drive":"dr","lane":"ln","place":"pl","court":"ct","parkway":"pkwy",
+    "turnpike":"tpke","pike":"pk","square":"sq","terrace":"ter","north":"n","south":"s",
+    "east":"e","west":"w","suite":"ste","unit":"ste",
+}
+_STREET_JUNK_RE = re.compile(r"[^a-z0-9 ]+")
+_SUITE_RE = re.compile(r"\b(ste|suite|unit|#)\s*\w+$")
+
+def norm_street(v):
+    """'123 North Main Street, Suite 4' -> '123 n main st'"""
+    toks = _STREET_JUNK_RE.sub(" ", clean(v).lower()).split()
+    out = " ".join(STREET_ABBR.get(t, t) for t in toks)
+    return _SUITE_RE.sub("", out).strip()
+
+def dispensary_key(name, street, city):
+    """
+    Stable id for a dispensary: sha1 of normalized name|street|city, truncated.
+    Same inputs as the (name, street, city) de-dupe key the scripts already use.
+    """
+    raw = "|".join(norm_text(x) for x in (name, street, city))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def row_hash(row, fields=FIELDS):
+    """Content hash over the published fields; changes whenever any field does."""
+    raw = "\x1f".join(clean(row.get(k, "")) for k in fields)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+# ---------- batch normalization ----------
+# Whole-column versions of the per-script helpers (norm_phone, canonical,
+# base_origin, host, ADDR_RE). Each takes a list/array/Series and returns
+# numpy arrays plus a boolean validity mask, so a stage cleans a column in one call.
+
+NON_DIGIT_RE = re.compile(r"\D")
+# NANP: NPA and NXX both start 2-9 and neither is an N11 service code
+NANP_RE = re.compile(r"^(?!\d11)[2-9]\d{2}(?!\d11)[2-9]\d{2}\d{4}$")
+URL_RE = re.compile(r"^(?:(?P<scheme>[A-Za-z][A-Za-z0-9+.\-]*)://)?(?P<host>[^/?#\s]+)(?P<path>[^?#\s]*)")
+ADDR_PATTERN = r"""
+    ^(?P<street>.+?)\s*,\s*
+    (?P<city>[A-Za-z'\.\-\s]+)\s*,\s*
+    (?P<state>{states})\s*
+    (?P<zip>\d{{5}})?
+    """
+
+def _series(values):
+    import pandas as pd
+    s = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    s = s.astype("string").fillna("").str.strip()
+    return s.where(~s.isin(("nan","NaN","None","none")), "")
+
+def _digits(s):
+    d = s.str.replace(NON_DIGIT_RE, "", regex=True)
+    d = d.where(~((d.str.len() == 11) & d.str.startswith("1")), d.str[1:])
+    return d, d.str.match(NANP_RE).fillna(False).to_numpy(dtype=bool)
+
+def phone_digits_batch(values):
+    """10-digit NANP numbers (leading 1 dropped) and a mask of which are valid."""
+    d, valid = _digits(_series(values))
+    return d.where(valid, "").to_numpy(dtype=object), valid
+
+def normalize_phones(values):
+    """
+    Batch norm_phone(): '(973) 555-0123' for valid NANP numbers, the stripped
+    input otherwise. Returns (formatted, valid_mask).
+    """
+    import numpy as np
+    raw = _series(values)
+    d, valid = _digits(raw)
+    fmt = "(" + d.str[:3] + ") " + d.str[3:6] + "-" + d.str[6:]
+    return np.where(valid, fmt.to_numpy(dtype=object), raw.to_numpy(dtype=object)), valid
+
+def _url_parts(values):
+    s = _series(values)
+    parts = s.str.extract(URL_RE)
+    scheme = parts["scheme"].fillna("").str.lower()
+    scheme = scheme.where(scheme != "", "https")
+    host_ = parts["host"].fillna("").str.lower()
+    path = parts["path"].fillna("")
+    valid = (host_.str.contains(".", regex=False) & scheme.isin(("http","https"))
+             & ~host_.str.contains("@", regex=False)).to_numpy(dtype=bool)
+    return scheme, host_, path, valid
+
+def canonical_urls(values, strip_slash=True):
+    """Batch canonical(): scheme://host/path with query/fragment dropped. Returns (urls, valid_mask)."""
+    import numpy as np
+    scheme, host_, path, valid = _url_parts(values)
+    if strip_slash:
+        path = path.where(~(path.str.endswith("/") & (path.str.len() > 1)), path.str[:-1])
+    urls = (scheme + "://" + host_ + path).to_numpy(dtype=object)
+    return np.where(valid, urls, ""), valid
+
+def origins(values):
+    """Batch base_origin(): scheme://host. Returns (origins, valid_mask)."""
+    import numpy as np
+    scheme, host_, _, valid = _url_parts(values)
+    return np.where(valid, (scheme + "://" + host_).to_numpy(dtype=object), ""), valid
+
+def hosts(values, strip_www=False):
+    """Batch host(): lowercase netloc. Returns (hosts, valid_mask)."""
+    import numpy as np
+    _, host_, _, valid = _url_parts(values)
+    if strip_www:
+        host_ = host_.str.replace(r"^www\.", "", regex=True)
+    return np.where(valid, host_.to_numpy(dtype=object), ""), valid
+
+_ADDR_CACHE = {}
+
+def address_re(states=("NJ",)):
+    """ADDR_RE for any set of state codes (compiled once per set)."""
+    key = tuple(states)
+    if key not in _ADDR_CACHE:
+        _ADDR_CACHE[key] = re.compile(ADDR_PATTERN.format(states="|".join(map(re.escape, key))), re.VERBOSE)
+    return _ADDR_CACHE[key]
+
+def parse_addresses(values, states=("NJ",)):
+    """
+    Batch ADDR_RE parse of 'street, city, ST 07000' lines.
+    Returns (DataFrame[street, city, state, zip], matched_mask).
+    """
+    parts = _series(values).str.extract(address_re(states))
+    matched = parts["street"].notna().to_numpy(dtype=bool)
+    parts = parts.fillna("")
+    for c in ("street","city"):
+        parts[c] = parts[c].str.strip(" ,")
+    return parts.astype(object), matched
+
+def normalize_zips(values):
+    """Batch norm_zip(): 5-digit zips with leading zeros restored. Returns (zips, valid_mask)."""
+    z = _series(values).str.split("-").str[0].str.split(".").str[0]
+    short = z.str.fullmatch(r"\d{1,5}").fillna(False)
+    z = z.where(~short, z.str.zfill(5))
+    return z.to_numpy(dtype=object), short.to_numpy(dtype=bool)
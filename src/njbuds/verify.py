@@ -0,0 +1,105 @@
+"""
+Check search-result candidates against the row before one becomes its website.
+
+The first non-banned result is often a directory, a news story or a
+same-named shop in another state. verify() fetches the top TOP_K candidates
+at once through the page cache, so ten candidates take about as long as the
+slowest one. It then scores each page on the evidence that it is this
+dispensary's site:
+
+    name     share of the row's distinctive name tokens in the page text,
+             with a bonus when they appear in the domain
+    street   '<number> ... <street name>' somewhere on the page
+    city     the row's city on the page
+    phone    the row's phone among the page's numbers (skipped when the row has none)
+
+The score is the weighted share of the evidence the row can offer, between
+0 and 1. The best candidate wins, and its score is stored as
+website_confidence.
+
+    best, conf, scores = verify.verify(row, links, skip=is_banned)
+"""
+import concurrent.futures as cf, os, re, threading
+
+import requests
+
+from njbuds import pagecache
+from njbuds.domains import domain_of, street_pattern
+from njbuds.extractors import PHONE_RE, Page
+from njbuds.resolve import NAME_STOP
+from njbuds.utils import NON_DIGIT_RE, norm_text
+
+TOP_K = int(os.getenv("NJBUDS_VERIFY_TOP_K", 8))
+TIMEOUT = 12
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) NJBudsSiteBot/1.0"
+WEIGHTS = {"name": 0.35, "host": 0.15, "street": 0.25, "city": 0.1, "phone": 0.15}
+MIN_CONFIDENCE = 0.3   # below this a pick is still kept, but counted as low confidence
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_local = threading.local()
+
+def _session():
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+        s.headers["User-Agent"] = UA
+    return s
+
+def name_tokens(name):
+    toks = [t for t in _TOKEN_RE.findall(norm_text(name).replace("&", " and ")) if len(t) > 1]
+    return [t for t in toks if t not in NAME_STOP] or toks
+
+def phone_digits(text):
+    out = set()
+    for m in PHONE_RE.finditer(text):
+        d = NON_DIGIT_RE.sub("", m.group(0))
+        out.add(d[1:] if len(d) == 11 and d.startswith("1") else d)
+    return out
+
+def score(row, page):
+    """(confidence 0..1, {signal: 0..1}) for one fetched page."""
+    text = norm_text(page.text)
+    toks = name_tokens(row.get("name"))
+    host = domain_of(page.url).replace("-", "")
+    signals = {
+        "name": sum(t in text for t in toks) / len(toks) if toks else 0.0,
+        "host": 1.0 if toks and any(t in host for t in toks if len(t) > 2) else 0.0,
+    }
+    pat = street_pattern(row.get("street"))
+    if pat is not None:
+        signals["street"] = 1.0 if pat.search(text) else 0.0
+    city = norm_text(row.get("city"))
+    if city:
+        signals["city"] = 1.0 if city in text else 0.0
+    phone = NON_DIGIT_RE.sub("", row.get("phone") or "")[-10:]
+    if len(phone) == 10:
+        signals["phone"] = 1.0 if phone in phone_digits(page.html) else 0.0
+    total = sum(WEIGHTS[k] for k in signals)
+    return sum(WEIGHTS[k] * v for k, v in signals.items()) / total, signals
+
+def fetch_page(url):
+    r = pagecache.fetch(_session(), url, timeout=TIMEOUT)
+    if r is None or r.status_code >= 400:
+        return None
+    return Page.from_response(r)
+
+def verify(row, candidates, skip=None, k=TOP_K, fetch=fetch_page):
+    """
+    (best url, confidence, [(url, confidence, signals)]) over the top-k candidates
+    not rejected by skip. ("", 0.0, []) when none of them could be fetched.
+    """
+    cands = list(dict.fromkeys(u for u in candidates if u and not (skip and skip(u))))[:k]
+    if not cands:
+        return "", 0.0, []
+    scored = []
+    with cf.ThreadPoolExecutor(len(cands)) as ex:
+        for url, page in zip(cands, ex.map(fetch, cands)):
+            if page is None:
+                continue
+            conf, signals = score(row, page)
+            scored.append((url, round(conf, 3), signals))
+    if not scored:
+        return "", 0.0, []
+    # best score wins; ties go to the higher-ranked search result
+    best = max(scored, key=lambda s: (s[1], -cands.index(s[0])))
+    return best[0], best[1], scored
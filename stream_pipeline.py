@@ -0,0 +1,100 @@
+"""
+Scrape, find websites and enrich in one streaming pass (njbuds.streaming).
+
+Rows flow out of the CRC map as each scroll round is harvested. A DuckDuckGo
+worker fills missing websites, and the enrichment pool crawls each site as
+soon as it has one. Finished rows are appended to OUTPUT while the map is
+still scrolling. The batch scripts (scrape -> find_websites -> enrich) stay
+the way to rebuild a stage on its own; this is the fast path for a fresh run.
+
+Chains: the batch enrich groups rows by domain before crawling. A stream
+cannot wait for the whole group, so a row on a domain the stream has already
+seen is matched to its own store (enrich.chain_worker), with the shared pages
+coming from the page cache instead of the network. The first row of a chain
+is crawled like a single site, because nothing marks it as a chain yet.
+
+    python stream_pipeline.py                    # scrape + websites + enrich
+    python stream_pipeline.py --no-search        # skip DuckDuckGo; card websites only
+    python stream_pipeline.py --headless -o out.csv
+"""
+import argparse, threading, time
+
+from njbuds import domains, metrics
+from njbuds.streaming import BUFFER, CsvSink, Stage, pipeline
+from njbuds.verify import verify
+
+import enrich_from_websites as enrich
+import find_websites_via_search as search
+import scrape_crc_all_sites as scrape
+
+OUTPUT = "nj_dispensaries_streamed.csv"
+FIELDS = ["name","street","city","state","zip","website","phone","source","website_confidence"] + list(enrich.EXTRA_FIELDS)
+SEARCH_PAUSE = 0.9   # be polite to DDG
+
+def website_stage(headless):
+    driver = search.bootstrap_driver(headless=headless)
+
+    def find(row):
+        name, city = (row.get("name") or "").strip(), (row.get("city") or "").strip()
+        if (row.get("website") or "").strip() or not name:
+            return row
+        try:
+            search.ddg_query(driver, f"{name} {city} NJ dispensary")
+            links = search.ddg_top_links(driver, max_links=10)
+            if not links:
+                search.ddg_query(driver, f"{name} {city} New Jersey cannabis")
+                links = search.ddg_top_links(driver, max_links=10)
+        except Exception as e:
+            metrics.error(type(e).__name__, "duckduckgo.com")
+            return row
+        finally:
+            time.sleep(SEARCH_PAUSE)
+        best, conf, _ = verify(row, links, skip=search.is_banned)
+        best = best or search.pick_best(links)
+        if best:
+            row["website"], row["website_confidence"] = best, f"{conf:.2f}"   # as find_websites writes it
+        return row
+
+    # one browser, so one worker: DuckDuckGo is the rate limit anyway
+    return Stage("websites", find, workers=1, close=driver.quit)
+
+_seen_domains, _seen_lock = set(), threading.Lock()
+
+def enrich_row(row):
+    d = domains.domain_of(row.get("website"))
+    with _seen_lock:
+        repeat = d in _seen_domains
+        _seen_domains.add(d)
+    if d and repeat:
+        return enrich.chain_worker([row])[0][0]
+    return enrich.worker(row)[0]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-o", "--output", default=OUTPUT)
+    ap.add_argument("--no-search", action="store_true", help="skip the DuckDuckGo website stage")
+    ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--workers", type=int, default=enrich.MAX_WORKERS, help="enrichment threads")
+    ap.add_argument("--buffer", type=int, default=BUFFER, help="rows held between stages")
+    args = ap.parse_args(argv)
+
+    stages = [] if args.no_search else [website_stage(args.headless)]
+    stages.append(Stage("enrich", enrich_row, workers=args.workers))
+
+    drv = scrape.open_driver()
+    try:
+        with metrics.stage("stream") as st, CsvSink(args.output, FIELDS) as sink:
+            for row in pipeline(scrape.iter_rows(drv), stages, args.buffer):
+                sink.write(row)
+                st.rows = sink.count
+                if sink.count % 10 == 0:
+                    print(f"[{sink.count}] rows written")
+    finally:
+        drv.quit()
+    first = f"{sink.first_row_after:.1f}s" if sink.first_row_after is not None else "n/a"
+    print(f"Done. Wrote {args.output} with {sink.count} rows (first row after {first})")
+    print(metrics.summary())
+    metrics.write("stream")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Test doubles shared across the suite: a fake HTTP response, a fetch over a dict of pages, a JSON-LD store page."""
+import requests
+
+# one store page with JSON-LD, a mailto link, a social link and a second number in the text
+LD = """<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Store", "telephone": "+1 973-555-0123",
+ "address": {"streetAddress": "1 Main St", "addressLocality": "Paterson", "addressRegion": "NJ", "postalCode": "7501"},
+ "geo": {"latitude": 40.9168, "longitude": -74.1718},
+ "openingHoursSpecification": [{"dayOfWeek": "Monday", "opens": "09:00", "closes": "21:00"}]}
+</script></head><body><a href="mailto:hi@rise.example?subject=x">mail</a>
+<a href="https://www.instagram.com/rise">ig</a><p>Call 201-555-0199</p></body></html>"""
+
+class Resp:
+    """Enough of requests.Response for the fetchers: body given as text or bytes."""
+    def __init__(self, url="", status=200, body=b"", encoding="utf-8", headers=None):
+        self.url, self.status_code, self.encoding, self.headers = url, status, encoding, headers or {}
+        if isinstance(body, str):
+            self.text, self.content = body, body.encode(encoding or "utf-8")
+        else:
+            self.content, self.text = body, body.decode(encoding or "utf-8", errors="replace")
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+def site(pages, fetched=None):
+    """fetch(url) over {url: html}: 200 for known pages, 404 otherwise; urls appended to `fetched`."""
+    def fetch(url):
+        if fetched is not None:
+            fetched.append(url)
+        return Resp(url, 200, pages[url]) if url in pages else Resp(url, 404, "")
+    return fetch
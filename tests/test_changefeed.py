@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+
+from njbuds.changefeed import diff, write_changefeed
+from njbuds.snapshot import write_snapshot
+
+def snap(path, *recs):
+    path.write_text("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in recs), encoding="utf-8")
+    return str(path)
+
+A = {"id": "a", "name": "Rise", "phone": "(973) 555-0100"}
+B = {"id": "b", "name": "Zen Leaf", "phone": ""}
+C = {"id": "c", "name": "Curaleaf", "phone": ""}
+
+def events(tmp_path, old, new):
+    return sorted(diff(snap(tmp_path / "old.jsonl", *old), snap(tmp_path / "new.jsonl", *new)),
+                  key=lambda e: (e["op"], e["id"]))
+
+def test_added_removed_modified(tmp_path):
+    got = events(tmp_path, [A, B], [dict(A, phone="(973) 555-0199"), C])
+    assert got == [
+        {"op": "added", "id": "c", "record": C},
+        {"op": "modified", "id": "a", "changes": {"phone": ["(973) 555-0100", "(973) 555-0199"]}},
+        {"op": "removed", "id": "b", "record": B},
+    ]
+
+def test_reordered_keys_and_new_empty_columns_are_not_changes(tmp_path):
+    a = {"id": "a", "phone": A["phone"], "name": A["name"], "email": ""}
+    assert events(tmp_path, [A, B], [a, dict(B, website=None)]) == []
+
+def test_duplicate_ids_use_the_same_rule_on_both_sides(tmp_path):
+    recs = [A, dict(A, phone="(973) 555-0199"), B]
+    assert events(tmp_path, recs, recs) == []
+    got = events(tmp_path, [A, B], recs)
+    assert got == [{"op": "modified", "id": "a", "changes": {"phone": ["(973) 555-0100", "(973) 555-0199"]}}]
+
+def test_write_snapshot_keeps_one_line_per_id(tmp_path):
+    df = pd.DataFrame([{"name": "Rise", "street": "1 Main St", "city": "Paterson", "phone": "1"},
+                       {"name": "Zen Leaf", "street": "2 Broad St", "city": "Elizabeth", "phone": "2"},
+                       {"name": "Rise", "street": "1 Main St", "city": "Paterson", "phone": "3"}])
+    path = write_snapshot(df, str(tmp_path), stamp="20260101T000000Z")
+    with open(path, encoding="utf-8") as f:
+        recs = [json.loads(ln) for ln in f]
+    assert [r["phone"] for r in recs] == ["2", "3"]
+    out, counts = write_changefeed(path, path, changes_dir=str(tmp_path / "changes"))
+    assert counts == {"added": 0, "removed": 0, "modified": 0}
@@ -0,0 +1,32 @@
+from njbuds.domains import domain_of, fetch_domain_pages, group_by_domain, match_row
+from njbuds.extractors import Page
+from tests.conftest import site
+
+HOME = """<a href="/locations/paterson">Paterson</a><a href="/locations/bloomfield">Bloomfield</a>
+<a href="https://other.example/paterson">elsewhere</a><p>Corporate line (800) 555-0100</p>"""
+PATERSON = "<h1>RISE Paterson</h1><p>26 Park Ave, Paterson NJ</p><p>Phone: (973) 555-0123</p>"
+BLOOMFIELD = """<script type="application/ld+json">{"@type": "Store", "telephone": "201-555-0199",
+"address": {"streetAddress": "1 Broad St", "addressLocality": "Bloomfield"}}</script>"""
+
+PAGES = {"https://rise.example/": HOME, "https://rise.example/locations/paterson": PATERSON,
+         "https://rise.example/locations/bloomfield": BLOOMFIELD}
+
+ROWS = [{"name": "RISE", "street": "26 Park Avenue", "city": "Paterson", "website": "https://www.rise.example/x"},
+        {"name": "RISE", "street": "1 Broad Street", "city": "Bloomfield", "website": "rise.example"},
+        {"name": "Solo", "street": "5 Elm", "city": "Dover", "website": ""}]
+
+def test_group_by_domain():
+    assert domain_of("WWW.Rise.example/shop") == "rise.example"
+    assert {d: len(rs) for d, rs in group_by_domain(ROWS).items()} == {"rise.example": 2}
+
+def test_each_chain_row_gets_its_own_store():
+    fetched = []
+    pages = fetch_domain_pages("https://rise.example/", ROWS[:2], site(PAGES, fetched))
+    assert len(fetched) == len(set(fetched))                       # nothing fetched twice
+    assert not any("other.example" in u for u in fetched)          # off-site links ignored
+    assert match_row(ROWS[0], pages)[::2] == ("(973) 555-0123", "page")
+    assert match_row(ROWS[1], pages)[::2] == ("(201) 555-0199", "jsonld")
+
+def test_unmatched_chain_row_gets_no_corporate_phone():
+    pages = [Page("https://rise.example/", HOME)]
+    assert match_row({"street": "9 Nowhere Rd", "city": "Camden"}, pages) == ("", {}, "")
@@ -0,0 +1,47 @@
+import pytest
+
+from njbuds import extractors, metrics
+from njbuds.extractors import Page
+from tests.conftest import LD
+
+def test_run_fills_every_field_from_one_page():
+    out = extractors.run(Page("https://rise.example/", LD))
+    assert out["phone"] == "(973) 555-0123"    # JSON-LD beats the text number
+    assert out["email"] == "hi@rise.example"
+    assert out["socials"] == ["https://www.instagram.com/rise"]
+
+def test_structured_page_needs_no_dom_parse():
+    page = Page("https://rise.example/", LD)
+    assert extractors.run(page, ["phone", "email", "socials", "hours"])["email"] == "hi@rise.example"
+    assert "soup" not in page.__dict__
+
+def test_email_and_socials_fall_back_to_the_soup():
+    page = Page("https://x.example/", '<a href="&#109;ailto:hi&#64;x.example">m</a>'
+                                      '<a href="//instagram.com/x">ig</a>')
+    assert extractors.run(page, ["email", "socials"]) == {"email": "hi@x.example",
+                                                          "socials": ["https://instagram.com/x"]}
+    assert extractors.socials(Page("https://y.example/", "<p>no links</p>")) == []
+
+def test_merge_first_scalar_wins_lists_union():
+    assert extractors.merge([{"phone": "", "socials": ["a"]}, {"phone": "1", "socials": ["a", "b"]}, {"phone": "2"}]) \
+        == {"phone": "1", "socials": ["a", "b"]}
+
+@pytest.fixture
+def broken(monkeypatch):
+    def register(exc):
+        def fn(page):
+            raise exc
+        monkeypatch.setitem(extractors.EXTRACTORS, "broken", fn)
+    return register
+
+def test_expected_errors_are_counted_not_raised(broken):
+    broken(ValueError("bad markup"))
+    before = metrics.report()["errors"].get("extract_broken_ValueError", 0)
+    out = extractors.run(Page("https://x.example/", "<p>x</p>"), ["broken", "email"])
+    assert out == {"broken": "", "email": ""}
+    assert metrics.report()["errors"]["extract_broken_ValueError"] == before + 1
+
+def test_bugs_propagate(broken):
+    broken(NameError("typo"))
+    with pytest.raises(NameError):
+        extractors.run(Page("https://x.example/", "<p>x</p>"), ["broken"])
@@ -0,0 +1,29 @@
+from njbuds.frontier import crawl, link_score, url_key
+from tests.conftest import site
+
+def test_link_score_prefers_contact_and_city_over_blog():
+    assert link_score("https://a.example/contact", "Contact us") > link_score("https://a.example/about", "About")
+    assert link_score("https://a.example/blog/contact-tips", "Read") < link_score("https://a.example/contact", "")
+    assert link_score("https://a.example/stores/paterson", "", "paterson") > link_score("https://a.example/stores", "")
+
+def test_url_key_ignores_scheme_www_query_and_slash():
+    assert url_key("https://www.A.example/Contact/?x=1#top") == url_key("http://a.example/contact")
+
+def test_crawl_follows_best_link_and_stops_when_confident():
+    pages = {
+        "https://a.example/": '<a href="/blog">Blog</a><a href="/shop">Shop</a>'
+                              '<a href="/locations/paterson">Visit us in Paterson</a><p>(800) 555-0100</p>',
+        "https://a.example/locations/paterson": "<p>26 Park Ave, Paterson</p><p>(973) 555-0123</p>",
+        "https://a.example/blog": "<p>(201) 555-0199</p>",
+    }
+    fetched = []
+    res = crawl("https://a.example/", site(pages, fetched), city="Paterson", street="26 Park Avenue")
+    assert res.phone == "(973) 555-0123" and res.confidence >= 0.8
+    assert res.url == "https://a.example/locations/paterson"
+    assert fetched == ["https://a.example/", "https://a.example/locations/paterson"] and res.fetched == 2
+
+def test_crawl_respects_page_budget():
+    pages = {"https://a.example/": "".join(f'<a href="/p{i}">page {i}</a>' for i in range(20))}
+    fetched = []
+    res = crawl("https://a.example/", site(pages, fetched), max_pages=3)
+    assert res.fetched == len(fetched) == 3 and res.phone == ""
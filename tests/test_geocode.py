@@ -0,0 +1,33 @@
+import pandas as pd
+
+from njbuds import geocode
+
+def rows(*recs):
+    return pd.DataFrame([dict(zip(("street", "city", "zip"), r)) for r in recs])
+
+def test_precision_falls_back_zip_city_zip3_state(tmp_path):
+    df = rows(("1 Main St", "Paterson", "07501"),       # bundled 5-digit zip
+              ("NJ-66", "Neptune Township", ""),         # city, after dropping "Township"
+              ("9 Elm St", "Nowhere", "08950"),          # unknown zip, known zip3
+              ("", "", ""))                               # nothing to go on
+    out, _, _ = geocode.geocode(df, str(tmp_path / "cache.csv"), str(tmp_path))
+    assert list(out["geo_precision"]) == ["zip", "city", "zip3", "state"]
+    assert out["lat"].between(38.9, 41.4).all() and out["lon"].between(-75.6, -73.9).all()
+
+def test_hits_count_rows_not_unique_keys(tmp_path):
+    cache = str(tmp_path / "cache.csv")
+    df = rows(("1 Main St", "Paterson", "07501"), ("1 Main St", "Paterson", "07501"), ("2 Elm", "Trenton", "08608"))
+    _, hits, misses = geocode.geocode(df, cache, str(tmp_path))
+    assert (hits, misses) == (0, 3)
+    _, hits, misses = geocode.geocode(df, cache, str(tmp_path))
+    assert (hits, misses) == (3, 0)
+
+def test_gazetteer_change_invalidates_cached_entries(tmp_path):
+    cache, df = str(tmp_path / "cache.csv"), rows(("5 Oak St", "Nowhere", "08950"))
+    out, _, _ = geocode.geocode(df, cache, str(tmp_path))
+    assert out["geo_precision"][0] == "zip3"
+
+    (tmp_path / "nj_zip_centroids.csv").write_text("zip,lat,lon\n08950,40.5,-74.5\n")
+    out, hits, misses = geocode.geocode(df, cache, str(tmp_path))
+    assert (hits, misses) == (0, 1)
+    assert out["geo_precision"][0] == "zip" and out["lat"][0] == 40.5
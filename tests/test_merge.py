@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from njbuds.merge import carry_over, fill_missing, key_series, make_key, pending
+
+def frame(**cols):
+    return pd.DataFrame({"name": ["Rise", "Zen Leaf", "Ascend"], "street": ["1 Main St", "2 Broad St", "3 Elm"],
+                         "city": ["Paterson", "Elizabeth", "Rochelle Park"], **cols})
+
+def test_key_series_matches_scalar_key():
+    df = pd.DataFrame({"name": ["  Rise  NJ", None], "street": ["1\tMain St", "x"], "city": ["PATERSON", np.nan]})
+    assert list(key_series(df)) == [make_key("Rise NJ", "1 Main St", "paterson"), make_key(None, "x", None)]
+
+def test_carry_over_prefers_previous_non_empty_last_wins():
+    df = frame(website=["", "https://cur.example", "https://keep.example"])
+    prev = pd.DataFrame({"name": ["rise", "RISE", "Zen Leaf"], "street": ["1 main st"] * 2 + ["2 Broad St"],
+                         "city": ["Paterson"] * 2 + ["Elizabeth"], "website": ["https://old.example", "https://new.example", ""]})
+    out = carry_over(df, prev, ["website"])
+    assert list(out["website"]) == ["https://new.example", "https://cur.example", "https://keep.example"]
+
+def test_fill_missing_only_fills_blanks_and_counts():
+    df = frame(phone=["", "nan", "555-0100"])
+    upd = frame(phone=["555-0001", "555-0002", "555-0003"])
+    out, filled = fill_missing(df, upd, ["phone", "email"])
+    assert list(out["phone"]) == ["555-0001", "555-0002", "555-0100"]
+    assert filled == {"phone": 2, "email": 0}
+    assert fill_missing(df, None, ["phone"])[1] == {"phone": 0}
+
+def test_pending_lists_empty_rows():
+    df = frame(website=["", None, "https://x.example"])
+    assert list(pending(df, "website")) == [0, 1]
@@ -0,0 +1,33 @@
+import json
+
+from njbuds import metrics, taskqueue
+
+def test_dump_and_merge_add_up(tmp_path):
+    before = metrics.report()
+    with metrics.stage("unit_merge") as st:
+        st.rows = 3
+    metrics.observe_request("a.example", 0.2, 100, 404)
+    path = str(tmp_path / "w.json")
+    metrics.dump(path)
+    metrics.merge(path)
+    rep = metrics.report()
+    assert rep["stages"]["unit_merge"]["rows"] == 2 * (before["stages"].get("unit_merge", {}).get("rows", 0) + 3)
+    assert rep["errors"]["http_404"] == 2 * (before["errors"].get("http_404", 0) + 1)
+    assert rep["hosts"]["a.example"]["requests"] >= 2
+
+def bump(payload):
+    metrics.count("unit_worker_items")
+    return payload
+
+def test_worker_metrics_land_in_the_parent_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    db = str(tmp_path / "q.sqlite")
+    q = taskqueue.TaskQueue(db)
+    q.put("unit", [(str(i), i) for i in range(6)])
+    q.close()
+    start = metrics.report()["counters"].get("unit_worker_items", 0)
+    assert taskqueue.run_workers(db, "unit", bump, procs=2, concurrency=2, progress_every=0.2) == (6, 0)
+    assert metrics.report()["counters"]["unit_worker_items"] == start + 6
+    assert list(tmp_path.glob(".unit.*")) == []     # worker dumps are merged and removed
+    report = json.loads(open(metrics.write("unit", str(tmp_path))).read())
+    assert report["counters"]["unit_worker_items"] == start + 6
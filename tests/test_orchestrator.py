@@ -0,0 +1,42 @@
+import pytest
+
+from njbuds import orchestrator as orch
+from njbuds.orchestrator import Stage
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(orch, "ROOT", str(tmp_path))
+    monkeypatch.setattr(orch, "STAGE_DIR", str(tmp_path / "stages"))
+    (tmp_path / "make.py").write_text("open('out.txt', 'w').write('a\\n')\n")
+    (tmp_path / "upper.py").write_text("open('out.txt', 'w').write(open('in.txt').read().upper())\n")
+    stages = [Stage("make", ["make.py"], outputs={"out.txt": "raw.txt"}),
+              Stage("upper", ["upper.py"], inputs={"in.txt": "raw.txt"}, outputs={"out.txt": "final.txt"})]
+    return tmp_path, stages, str(tmp_path / "state.json")
+
+def test_runs_in_order_then_skips_fresh_stages(tree):
+    root, stages, state = tree
+    assert orch.run(stages, jobs=2, state_path=state) == {"make": "ran", "upper": "ran"}
+    assert (root / "final.txt").read_text() == "A\n"
+    assert orch.run(stages, state_path=state) == {"make": "fresh", "upper": "fresh"}
+
+def test_changed_script_or_deleted_output_reruns(tree):
+    root, stages, state = tree
+    orch.run(stages, state_path=state)
+    (root / "make.py").write_text("open('out.txt', 'w').write('b\\n')\n")
+    assert orch.run(stages, state_path=state) == {"make": "ran", "upper": "ran"}
+    (root / "final.txt").unlink()
+    assert orch.run(stages, state_path=state) == {"make": "fresh", "upper": "ran"}
+    assert (root / "final.txt").read_text() == "B\n"
+
+def test_package_change_changes_every_key(tree, tmp_path, monkeypatch):
+    _, stages, _ = tree
+    pkg = tmp_path / "pkg"
+    pkg.mkdir()
+    (pkg / "mod.py").write_text("X = 1\n")
+    monkeypatch.setattr(orch, "PACKAGE", str(pkg))
+    orch.package_hash.cache_clear()
+    before = orch.stage_key(stages[0])
+    (pkg / "mod.py").write_text("X = 2\n")
+    orch.package_hash.cache_clear()
+    assert orch.stage_key(stages[0]) != before
+    orch.package_hash.cache_clear()
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from njbuds import pagecache
+from njbuds.platforms import SignatureMatcher
+from detect_menu_platforms import apply_platforms
+from tests.conftest import Resp
+
+class Session:
+    def __init__(self, *responses):
+        self.responses, self.calls = list(responses), 0
+    def get(self, url, **kw):
+        self.calls += 1
+        return self.responses.pop(0)
+
+URL = "https://www.example.com/contact"
+
+def test_success_is_cached_with_redirect_alias(tmp_path):
+    s = Session(Resp("https://example.com/contact-us", 200, b"<p>hi</p>"))
+    assert pagecache.fetch(s, URL, cache_dir=str(tmp_path), retries=0).status_code == 200
+    hit = pagecache.fetch(s, URL, cache_dir=str(tmp_path), retries=0)
+    assert s.calls == 1 and hit.from_cache and hit.text == "<p>hi</p>" and hit.url == "https://example.com/contact-us"
+    assert [h["url"] for h, _ in pagecache.pages_for_host("example.com", str(tmp_path))] == [URL]
+
+@pytest.mark.parametrize("status", [404, 429, 503])
+def test_error_statuses_are_not_cached(tmp_path, status):
+    s = Session(Resp(URL, status), Resp(URL, 200))
+    assert pagecache.fetch(s, URL, cache_dir=str(tmp_path), retries=0).status_code == status
+    assert pagecache.get(URL, cache_dir=str(tmp_path)) is None
+    assert pagecache.fetch(s, URL, cache_dir=str(tmp_path), retries=0).status_code == 200
+    assert s.calls == 2
+
+def test_expired_entries_are_refetched(tmp_path):
+    s = Session(Resp(URL, 200), Resp(URL, 200))
+    pagecache.fetch(s, URL, cache_dir=str(tmp_path), retries=0)
+    assert pagecache.get(URL, max_age=1e-9, cache_dir=str(tmp_path)) is None
+
+def test_platform_classify_weights_embeds():
+    best, scores, evidence = SignatureMatcher().classify(
+        ['<script src="https://embed.dutchie.com/x.js"></script> see weedmaps.com'])
+    assert best == "Dutchie" and scores["Dutchie"] > scores["Weedmaps"] and "embed.dutchie" in evidence
+    assert SignatureMatcher().classify("<p>nothing here</p>")[0] == ""
+
+def test_matcher_overrides_extractor_guess_but_not_manual_rows():
+    df = pd.DataFrame({"platform": ["Jane", "Jane", "Dutchie", ""],
+                       "platform_evidence": ["", "manual", "", ""]})
+    found = pd.Series(["Dutchie", "Dutchie", "", "Weedmaps"])
+    evid = pd.Series(["dutchie.com", "dutchie.com", "", "weedmaps.com"])
+    out = apply_platforms(df, found, evid)
+    assert list(out["platform"]) == ["Dutchie", "Jane", "Dutchie", "Weedmaps"]
+    assert list(out["platform_evidence"]) == ["dutchie.com", "manual", "", "weedmaps.com"]
@@ -0,0 +1,32 @@
+import pytest
+
+from njbuds import metrics, parsepool
+from tests.conftest import Resp
+
+GOOD = Resp("https://a.example/", 200, b'<a href="mailto:hi@a.example">m</a><p>Call (973) 555-0123</p>')
+BAD = Resp("https://b.example/", 200, b'<a href="http://[bad">x</a><a href="/menu">menu</a><p>(973) 555-0123</p>',
+           encoding=None)
+
+def test_decode_falls_back():
+    assert parsepool.decode("café".encode("cp1252")) == "café"
+    assert parsepool.decode(b"abc", "no-such-charset") == "abc"
+
+@pytest.mark.parametrize("procs", [1, 2])
+def test_pool_and_inline_agree_and_skip_only_bad_links(procs):
+    with parsepool.ParsePool(procs) as pool:
+        good, bad = pool.parse(GOOD), pool.parse(BAD)
+    assert good.extracted["phone"] == "(973) 555-0123" and good.extracted["email"] == "hi@a.example"
+    assert good.links
+    assert ("soup" in good.__dict__) == (procs == 1)     # pool pages come back without the soup
+    assert bad.links == [("https://b.example/menu", "menu")]   # urljoin rejects "http://[bad"
+    assert bad.extracted["phone"] == "(973) 555-0123" and "(973) 555-0123" in bad.text
+
+def test_parser_failure_empties_the_page_and_is_counted(monkeypatch):
+    def boom(html):
+        raise RecursionError("too deep")
+    monkeypatch.setattr(parsepool.extractors.structured, "extract", boom)
+    before = metrics.report()["errors"].get("parse_RecursionError", 0)
+    with parsepool.ParsePool(1) as pool:
+        page = pool.parse(GOOD)
+    assert (page.text, page.links, page.structured, page.extracted) == ("", [], {}, {})
+    assert metrics.report()["errors"]["parse_RecursionError"] == before + 1
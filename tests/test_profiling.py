@@ -0,0 +1,33 @@
+import tracemalloc
+
+from njbuds import profiling
+
+def test_nested_profiles_keep_their_own_spans_and_share_tracemalloc(tmp_path):
+    out = str(tmp_path)
+    with profiling.profile("outer", modes=("mem",), out_dir=out):
+        with profiling._Span("load"):
+            pass
+        with profiling.profile("inner", modes=("mem",), out_dir=out):
+            with profiling._Span("parse"):
+                pass
+        assert tracemalloc.is_tracing()          # the inner profile did not stop it
+        with profiling._Span("write"):
+            pass
+    assert not tracemalloc.is_tracing()
+    inner = (tmp_path / "inner.txt").read_text()
+    outer = (tmp_path / "outer.txt").read_text()
+    assert "parse" in inner and "load" not in inner and "write" not in inner
+    assert all(n in outer for n in ("load", "parse", "write"))
+    assert profiling._active == []
+
+def test_cpu_profile_only_in_the_outermost(tmp_path):
+    out = str(tmp_path)
+    with profiling.profile("outer", modes=("cpu",), out_dir=out):
+        with profiling.profile("inner", modes=("cpu",), out_dir=out):
+            sum(range(1000))
+    assert (tmp_path / "outer.pstats").exists() and not (tmp_path / "inner.pstats").exists()
+
+def test_disabled_profile_is_a_noop(tmp_path):
+    with profiling.profile("off", modes=(), out_dir=str(tmp_path)):
+        pass
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from njbuds import resolve
+
+def frame(rows):
+    return pd.DataFrame(rows)
+
+def test_same_store_from_two_sources_merges_with_gaps_filled():
+    gov = frame([{"name": "The Apothecarium", "street": "55 Route 22 East", "city": "Phillipsburg",
+                  "state": "NJ", "zip": "8865", "phone": "", "website": "", "source": "data.nj.gov 8hz7"}])
+    atlist = frame([{"name": "Apothecarium Dispensary", "street": "55 Rt 22 E", "city": "Phillipsburg",
+                     "state": "NJ", "zip": "08865", "phone": "(908) 555-0199",
+                     "website": "https://apothecarium.com", "source": "https://my.atlist.com/map/x"}])
+    canon, members, _ = resolve.resolve([(gov, "recreational"), (atlist, "medicinal")])
+    assert len(members) == 2 and len(canon) == 1
+    row = canon.iloc[0]
+    assert row["name"] == "The Apothecarium"          # data.nj.gov outranks Atlist
+    assert row["phone"] == "(908) 555-0199"           # gap filled from the other member
+    assert row["zip"] == "08865"
+    assert row["category"] == "medicinal;recreational"
+    assert row["cluster_size"] == 2
+
+def test_different_stores_in_same_city_stay_apart():
+    df = frame([
+        {"name": "Rise", "street": "1 Main St", "city": "Paterson", "zip": "07501", "source": "a"},
+        {"name": "Curaleaf", "street": "400 Broadway", "city": "Paterson", "zip": "07501", "source": "a"},
+    ])
+    canon, _, compared = resolve.resolve([(df, "")])
+    assert len(canon) == 2
+    assert compared == 1   # they share a zip block and a city block: still one pair
@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+import pytest
+
+from njbuds.search import SearchIndex
+from njbuds.snapshot import latest_snapshot, search_index_path, write_snapshot
+
+DOCS = [
+    {"id": "a", "name": "Rise Paterson", "city": "Paterson", "street": "1 Main St", "zip": "07501"},
+    {"id": "b", "name": "Rise Bloomfield", "city": "Bloomfield", "street": "2 Broad St", "zip": "07003"},
+    {"id": "c", "name": "Zen Leaf Elizabeth", "city": "Elizabeth", "street": "3 North Ave", "zip": "07201"},
+]
+
+def ids(results):
+    return [d["id"] for d, _ in results]
+
+def test_search_tolerates_typos_and_ranks_full_matches_first():
+    idx = SearchIndex.build(DOCS)
+    assert ids(idx.search("rise patersn"))[0] == "a"
+    assert ids(idx.search("elizbeth")) == ["c"]
+    assert idx.search("") == []
+
+def test_autocomplete_trie_and_multi_token():
+    idx = SearchIndex.build(DOCS)
+    assert {d["id"] for d in idx.autocomplete("ris")} == {"a", "b"}
+    assert [d["id"] for d in idx.autocomplete("rise bloom")][0] == "b"
+    assert idx.autocomplete("qqq") == []
+
+def test_save_load_round_trip_and_version_check(tmp_path):
+    path = str(tmp_path / "idx.pkl")
+    SearchIndex.build(DOCS).save(path)
+    assert ids(SearchIndex.load(path).search("zen")) == ["c"]
+    idx = SearchIndex.load(path)
+    idx.version = -1
+    idx.save(path)
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
+
+def test_write_snapshot_publishes_latest_with_index(tmp_path):
+    df = pd.DataFrame([{"name": "Rise Paterson", "street": "1 Main St", "city": "Paterson", "zip": "7501", "lat": "40.91681234567", "lon": ""}])
+    first = write_snapshot(df, str(tmp_path), stamp="20260101T000000Z")
+    second = write_snapshot(df, str(tmp_path), stamp="20260102T000000Z")
+    assert latest_snapshot(str(tmp_path)) == second != first
+    rec = json.loads(open(second, encoding="utf-8").readline())
+    assert rec["zip"] == "07501" and rec["lat"] == 40.916812 and rec["lon"] is None and rec["id"]
+    assert ids(SearchIndex.load(search_index_path(second)).search("paterson")) == [rec["id"]]
@@ -0,0 +1,47 @@
+import json, time
+
+import pandas as pd
+import pytest
+
+from njbuds.service import MAX_MILES, Service
+from njbuds.snapshot import write_snapshot
+
+@pytest.fixture
+def svc(tmp_path):
+    df = pd.DataFrame([
+        {"name": "Rise Paterson", "street": "1 Main St", "city": "Paterson", "zip": "07501", "lat": 40.9168, "lon": -74.1718},
+        {"name": "Zen Leaf Elizabeth", "street": "2 Broad St", "city": "Elizabeth", "zip": "07201", "lat": 40.6640, "lon": -74.2107},
+        {"name": "Curaleaf Bellmawr", "street": "3 Black Horse Pike", "city": "Bellmawr", "zip": "08031", "lat": 39.8676, "lon": -75.0946},
+    ])
+    write_snapshot(df, str(tmp_path), stamp="20260101T000000Z")
+    s = Service(str(tmp_path))
+    assert s.load_latest()
+    yield s
+    s.snap.close()
+
+def names(body):
+    return [r["dispensary"]["name"] for r in json.loads(body.raw)]
+
+def test_nearest_orders_by_distance(svc):
+    status, body = svc.route("/nearest?lat=40.73&lon=-74.17&k=2")
+    assert status == 200 and names(body) == ["Zen Leaf Elizabeth", "Rise Paterson"]
+    status, body = svc.route("/nearest?lat=40.73&lon=-74.17&k=5&miles=15")
+    assert status == 200 and names(body) == ["Zen Leaf Elizabeth", "Rise Paterson"]
+
+@pytest.mark.parametrize("query", [
+    f"lat=40.7&lon=-74.2&miles={MAX_MILES + 1}", "lat=40.7&lon=-74.2&miles=-1",
+    "lat=inf&lon=-74.2", "lat=40.7&lon=nan", "lat=40.7&lon=-74.2&miles=inf", "lat=40.7&lon=-74.2&k=0",
+])
+def test_nearest_rejects_bad_input(svc, query):
+    assert svc.route("/nearest?" + query) == (400, None)
+
+def test_nearest_cache_shares_rounded_point(svc):
+    a = svc.route("/nearest?lat=40.73000001&lon=-74.17&k=3")[1]
+    b = svc.route("/nearest?lat=40.73&lon=-74.17&k=3")[1]
+    assert a is b
+
+def test_nearest_far_from_every_store_is_fast_and_empty(svc):
+    t0 = time.perf_counter()
+    status, body = svc.route("/nearest?lat=-89&lon=179&k=5")
+    assert status == 200 and names(body) == []
+    assert time.perf_counter() - t0 < 1.0
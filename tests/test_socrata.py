@@ -0,0 +1,64 @@
+import csv, json
+
+from njbuds import socrata
+from tests.conftest import Resp
+
+def split(text, n):
+    return [text[i:i + n] for i in range(0, len(text), n)]
+
+def test_iter_json_array_across_chunk_boundaries():
+    recs = [{"name": "Rise, Paterson", "n": i, "nested": {"a": [1, 2]}} for i in range(5)]
+    text = json.dumps(recs)
+    for n in (1, 7, len(text)):
+        assert list(socrata.iter_json_array(split(text, n))) == recs
+    assert list(socrata.iter_json_array(["[]"])) == []
+
+def test_csv_lines_keep_quoted_newlines():
+    text = 'name,street\r\n"Rise","1 Main St\nSuite 2"\r\nZen,2 Broad\r\n'
+    rows = list(csv.DictReader(socrata._lines(split(text, 5))))
+    assert rows == [{"name": "Rise", "street": "1 Main St\nSuite 2"}, {"name": "Zen", "street": "2 Broad"}]
+
+def test_csv_lines_split_only_on_newline():
+    text = 'a,b\nz\x85w,2\nx\u2028y\x0cq,3\r\n'
+    rows = list(csv.DictReader(socrata._lines(split(text, 3))))
+    assert rows == [{"a": "z\x85w", "b": "2"}, {"a": "x\u2028y\x0cq", "b": "3"}]
+
+def test_get_backs_off_on_429(monkeypatch):
+    slept = []
+    monkeypatch.setattr(socrata.time, "sleep", slept.append)
+    responses = [Resp(status=429, headers={"Retry-After": "3"}), Resp(status=503), Resp()]
+    class Session:
+        def get(self, url, **kw):
+            return responses.pop(0)
+    r = socrata._get(Session(), "https://data.nj.gov/resource/x.json", {}, socrata.RateLimiter(0))
+    assert r.status_code == 200 and slept == [3.0, 2.0]
+
+def test_pull_is_incremental_and_merges_by_id(tmp_path, monkeypatch):
+    calls = []
+    def fake_fetch(domain, dataset, where=None, **kw):
+        calls.append(where)
+        if where is None:
+            return iter([{":id": "a", ":updated_at": "2026-01-01", "name": "Rise"},
+                         {":id": "b", ":updated_at": "2026-01-02", "name": "Zen"}])
+        return iter([{":id": "a", ":updated_at": "2026-02-01", "name": "Rise Paterson"}])
+    monkeypatch.setattr(socrata, "fetch", fake_fetch)
+    store = str(tmp_path)
+    recs, changed = socrata.pull("d", "x", store_dir=store)
+    assert changed == 2 and len(recs) == 2
+    recs, changed = socrata.pull("d", "x", store_dir=store)
+    assert calls[1] == ":updated_at > '2026-01-02'" and changed == 1
+    assert sorted(r["name"] for r in recs) == ["Rise Paterson", "Zen"]
+    assert socrata.load_store("d", "x", store)[1] == "2026-02-01"
+    socrata.pull("d", "x", full=True, store_dir=store)
+    assert calls[2] is None
+
+def test_json_and_csv_pulls_keep_separate_stores(tmp_path, monkeypatch):
+    def fake_fetch(domain, dataset, where=None, fmt="csv", **kw):
+        n = 1 if fmt == "json" else "1"
+        return iter([{":id": "a", ":updated_at": "2026-01-01", "n": n}])
+    monkeypatch.setattr(socrata, "fetch", fake_fetch)
+    store = str(tmp_path)
+    socrata.pull("d", "x", store_dir=store, fmt="json")
+    recs, changed = socrata.pull("d", "x", store_dir=store, fmt="csv")
+    assert changed == 1 and recs == [{":id": "a", ":updated_at": "2026-01-01", "n": "1"}]
+    assert socrata.load_store("d", "x", store, "json")[0]["a"]["n"] == 1
@@ -0,0 +1,65 @@
+import json, threading, time
+
+import pytest
+
+from njbuds.sources import build, load_config
+from njbuds.sources.base import Source
+from njbuds.sources.runner import collect
+from njbuds.sources.socrata import SocrataSource, normalize_record
+
+class Fake(Source):
+    kind = "fake"
+    def __init__(self, state, rows=(), fail=False, browser=False, **opts):
+        super().__init__(state, **opts)
+        self._rows, self.fail, self.uses_browser = list(rows), fail, browser
+    def rows(self):
+        if self.fail:
+            raise RuntimeError("portal down")
+        yield from self._rows
+
+def test_config_builds_adapters_and_rejects_unknown_kinds(tmp_path):
+    path = tmp_path / "states.json"
+    path.write_text(json.dumps({"_comment": "ignored", "nj": [{"kind": "socrata", "domain": "data.nj.gov", "dataset": "x"}],
+                                "NY": [{"kind": "atlist", "map_url": "https://my.atlist.com/map/1"}]}))
+    cfg = load_config(str(path))
+    assert list(cfg) == ["NJ", "NY"]
+    [src] = build(cfg, states={"NJ"})
+    assert isinstance(src, SocrataSource) and repr(src) == "NJ:data.nj.gov x"
+    assert [s.kind for s in build(cfg, kinds={"atlist"})] == ["atlist"]
+    with pytest.raises(ValueError):
+        build({"XX": [{"kind": "carrier_pigeon"}]})
+
+def test_fetch_fills_fields_defaults_and_drops_nameless():
+    src = Fake("nj", [{"name": " Rise ", "street": "1 Main St", "zip": "7501"}, {"name": "", "city": "Dover"},
+                      {"name": "Addressless"}], label="fake")
+    assert list(src.fetch()) == [{"name": "Rise", "street": "1 Main St", "city": "", "state": "NJ", "zip": "07501",
+                                  "website": "", "phone": "", "source": "fake"}]
+
+def test_normalize_record_aliases_and_location():
+    rec = {"Business_Name": "Zen Leaf", "location": {"address": "2 Broad St", "city": "Elizabeth", "zip": "07201"}}
+    out = normalize_record(rec, "portal", "NJ")
+    assert (out["name"], out["street"], out["city"], out["zip"], out["state"]) == ("Zen Leaf", "2 Broad St", "Elizabeth", "07201", "NJ")
+    assert normalize_record({"licensee": "Ascend"}, "p", columns={"name": "Licensee"})["name"] == "Ascend"
+
+def test_collect_dedupes_in_config_order_and_survives_a_failure():
+    row = {"name": "Rise", "street": "1 Main St", "city": "Paterson"}
+    first = Fake("NJ", [dict(row, source="first")])
+    second = Fake("NJ", [dict(row, source="second"), {"name": "Zen", "street": "2 Broad", "city": "Elizabeth"}])
+    rows, report = collect([first, Fake("NJ", fail=True), second, Fake("NY", [row])])
+    assert [(r["state"], r["name"], r["source"]) for r in rows] == [
+        ("NJ", "Rise", "first"), ("NJ", "Zen", "fake"), ("NY", "Rise", "fake")]
+    assert sum(isinstance(n, str) and n.startswith("failed") for _, n in report) == 1
+
+def test_collect_caps_browser_sources():
+    running, peak, lock = [0], [0], threading.Lock()
+    class Browser(Fake):
+        def rows(self):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return iter(())
+    collect([Browser("NJ", browser=True) for _ in range(4)], workers=4, browsers=1)
+    assert peak[0] == 1
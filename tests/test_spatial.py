@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from njbuds.spatial import SpatialIndex, haversine_mi
+
+def frame(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"lat": rng.uniform(38.9, 41.4, n), "lon": rng.uniform(-75.6, -73.9, n),
+                         "category": rng.choice(["medicinal", "recreational", "medicinal;recreational"], n)})
+
+def brute(df, lat, lon):
+    return haversine_mi(lat, lon, df["lat"].values, df["lon"].values)
+
+def test_within_matches_brute_force():
+    df = frame()
+    idx = SpatialIndex(df)
+    for lat, lon, miles in [(40.73, -74.17, 5), (39.95, -74.9, 20), (40.2, -74.5, 0.5)]:
+        got, dist = idx.within(lat, lon, miles)
+        d = brute(df, lat, lon)
+        assert set(got) == set(np.flatnonzero(d <= miles))
+        assert list(dist) == sorted(dist)
+
+def test_within_category_filter():
+    df = frame()
+    got, _ = SpatialIndex(df).within(40.5, -74.5, 30, category="recreational")
+    d = brute(df, 40.5, -74.5)
+    want = np.flatnonzero((d <= 30) & df["category"].str.contains("recreational").values)
+    assert set(got) == set(want)
+
+def test_nearest_matches_brute_force():
+    df = frame()
+    idx = SpatialIndex(df)
+    for lat, lon in [(40.73, -74.17), (38.0, -76.0), (41.4, -73.9)]:
+        got, dist = idx.nearest(lat, lon, k=5)
+        assert np.allclose(dist, np.sort(brute(df, lat, lon))[:5])
+
+def test_nearest_matches_brute_force_far_from_the_points():
+    df = frame()
+    idx = SpatialIndex(df)
+    rng = np.random.default_rng(3)
+    points = [(70.0, -74.5), (-60.0, -74.5), (55.0, -120.0), (41.0, 10.0)]
+    points += list(zip(rng.uniform(-80, 80, 40), rng.uniform(-170, 170, 40)))
+    for lat, lon in points:
+        _, dist = idx.nearest(lat, lon, k=5)
+        assert np.allclose(dist, np.sort(brute(df, lat, lon))[:5]), (lat, lon)
+
+def test_huge_radius_returns_everything_quickly():
+    df = frame()
+    got, _ = SpatialIndex(df).within(40.5, -74.5, 6000)
+    assert len(got) == len(df)
+
+def test_nearest_far_query_only_visits_populated_rings(monkeypatch):
+    idx = SpatialIndex(frame())
+    calls = []
+    gather = idx._gather
+    monkeypatch.setattr(idx, "_gather", lambda *a: calls.append(a) or gather(*a))
+    (i_lo, i_hi), (j_lo, j_hi) = idx._ci_range, idx._cj_range
+    rings = max(i_hi - i_lo, j_hi - j_lo) + 1
+    got, _ = idx.nearest(-89.0, 179.0, k=5)
+    assert len(got) == 5 and len(calls) <= 4 * rings
+    calls.clear()
+    assert len(idx.nearest(-89.0, 179.0, k=5, max_miles=100)[0]) == 0
+    assert len(calls) <= 4 * rings
@@ -0,0 +1,47 @@
+import csv, io, sqlite3
+
+from njbuds import storage
+from njbuds.utils import FIELDS
+
+ROWS = [
+    {"name": "Rise", "street": "1 Main St", "city": "Paterson", "state": "NJ", "zip": "7501",
+     "website": "", "phone": "(973) 555-0100", "source": "a"},
+    {"name": "Zen Leaf", "street": "2 Elm Ave", "city": "Neptune", "state": "NJ", "zip": "07753",
+     "website": "https://zenleaf.com", "phone": "", "source": "a"},
+]
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    return str(path)
+
+def test_iter_records_last_row_wins_and_zip_restored(tmp_path):
+    dup = dict(ROWS[0], phone="(973) 555-0199")
+    recs = list(storage.iter_records(write_csv(tmp_path / "in.csv", ROWS + [dup])))
+    assert len(recs) == 2
+    rise = next(r for r in recs if r[1] == "Rise")
+    assert rise[FIELDS.index("phone") + 1] == "(973) 555-0199"
+    assert rise[FIELDS.index("zip") + 1] == "07501"
+
+def test_sqlite_upsert_is_idempotent(tmp_path):
+    src, db = write_csv(tmp_path / "in.csv", ROWS), str(tmp_path / "t.sqlite")
+    first = storage.load(src, db)
+    again = storage.load(src, db)
+    assert (first["inserted"], first["updated"]) == (2, 0)
+    assert (again["inserted"], again["updated"]) == (0, 0)
+
+    changed = [dict(ROWS[0], website="https://risecannabis.com"), ROWS[1]]
+    third = storage.load(write_csv(tmp_path / "in2.csv", changed), db)
+    assert (third["inserted"], third["updated"]) == (0, 1)
+    con = sqlite3.connect(db)
+    assert con.execute("SELECT COUNT(*) FROM dispensaries").fetchone()[0] == 2
+    assert con.execute("SELECT website FROM dispensaries WHERE name='Rise'").fetchone()[0] == "https://risecannabis.com"
+
+def test_copy_stream_renders_every_record_as_csv():
+    recs = [("k1", "a", "", "b"), ("k2", "x,y", "q\"z", "")]
+    stream = storage._CopyStream(recs)
+    text = io.BufferedReader(stream, buffer_size=8).read().decode("utf-8")
+    assert list(csv.reader(io.StringIO(text))) == [list(r) for r in recs]
+    assert stream.count == 2
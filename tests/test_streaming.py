@@ -0,0 +1,65 @@
+import csv, threading
+
+from njbuds import metrics
+from njbuds.streaming import CsvSink, Stage, pipeline
+
+def test_stages_transform_fan_out_and_drop():
+    stages = [Stage("double", lambda r: [r, dict(r, n=-r["n"])], workers=2),
+              Stage("keep_positive", lambda r: r if r["n"] > 0 else None, workers=3)]
+    out = list(pipeline(({"n": i} for i in range(1, 21)), stages, buffer=4))
+    assert sorted(r["n"] for r in out) == list(range(1, 21))
+
+def test_stage_error_passes_row_through_and_is_counted():
+    before = metrics.report()["errors"].get("stream_boom_ZeroDivisionError", 0)
+    out = list(pipeline(({"n": i} for i in range(5)), [Stage("boom", lambda r: {"n": 10 // r["n"]})]))
+    assert sorted(r["n"] for r in out) == [0, 2, 3, 5, 10]       # n=0 passed through unchanged
+    assert metrics.report()["errors"]["stream_boom_ZeroDivisionError"] == before + 1
+
+def test_source_failure_ends_stream_cleanly():
+    def source():
+        yield {"n": 1}
+        raise RuntimeError("scraper died")
+    assert list(pipeline(source(), [Stage("id", lambda r: r)])) == [{"n": 1}]
+
+def test_early_stop_closes_stages_and_bounds_the_source():
+    produced, closed = [], threading.Event()
+    def source():
+        for i in range(10_000):
+            produced.append(i)
+            yield {"n": i}
+    it = pipeline(source(), [Stage("id", lambda r: r, close=closed.set)], buffer=2)
+    assert next(it) == {"n": 0}
+    it.close()
+    assert closed.wait(5)
+    assert len(produced) < 50          # backpressure: the source never ran ahead
+
+def test_csv_sink_writes_rows_as_they_arrive(tmp_path):
+    path = str(tmp_path / "out" / "rows.csv")
+    with CsvSink(path, ["name", "city"], flush_every=1) as sink:
+        sink.write({"name": "Rise", "city": "Paterson", "extra": "x"})
+        assert open(path, encoding="utf-8").read().count("\n") == 2
+        sink.write({"name": "Zen"})
+    assert list(csv.DictReader(open(path, encoding="utf-8"))) == [
+        {"name": "Rise", "city": "Paterson"}, {"name": "Zen", "city": ""}]
+    assert sink.count == 2 and sink.first_row_after is not None
+
+def test_stream_pipeline_formats_confidence_and_matches_chain_repeats(monkeypatch):
+    import stream_pipeline as sp
+    class Driver:
+        def quit(self):
+            pass
+    monkeypatch.setattr(sp.search, "bootstrap_driver", lambda headless: Driver())
+    monkeypatch.setattr(sp.search, "ddg_query", lambda drv, q: None)
+    monkeypatch.setattr(sp.search, "ddg_top_links", lambda drv, max_links: ["https://rise.example/"])
+    monkeypatch.setattr(sp, "verify", lambda row, links, skip: (links[0], 5 / 6, []))
+    monkeypatch.setattr(sp, "SEARCH_PAUSE", 0)
+    row = sp.website_stage(True).fn({"name": "Rise", "city": "Paterson"})
+    assert row["website_confidence"] == "0.83"
+
+    calls = []
+    monkeypatch.setattr(sp, "_seen_domains", set())
+    monkeypatch.setattr(sp.enrich, "worker", lambda r: (calls.append(("site", r["city"])) or r, False, False, "site"))
+    monkeypatch.setattr(sp.enrich, "chain_worker", lambda rs: [(calls.append(("chain", rs[0]["city"])) or rs[0],)])
+    for city, site in [("Paterson", "https://rise.example/a"), ("Bloomfield", "rise.example/b"), ("Dover", "")]:
+        sp.enrich_row({"city": city, "website": site})
+    assert calls == [("site", "Paterson"), ("chain", "Bloomfield"), ("site", "Dover")]
@@ -0,0 +1,19 @@
+from njbuds import structured
+from tests.conftest import LD
+
+def test_structured_extract_reads_jsonld():
+    sd = structured.extract(LD)
+    assert sd["phone"] == "(973) 555-0123" and sd["zip"] == "07501" and sd["city"] == "Paterson"
+    assert sd["hours"].startswith("Mo") and sd["lat"]
+    assert structured.extract("<p>plain page</p>") == {}
+
+def test_structured_microdata():
+    html = '<div itemscope><span itemprop="telephone">(201) 555-0199</span><span itemprop="postalCode">8865</span></div>'
+    assert structured.extract(html)["phone"] == "(201) 555-0199"
+    assert structured.extract(html)["zip"] == "08865"
+
+def test_structured_microdata_multi_valued_itemprop():
+    html = ('<p itemprop="faxNumber telephone">(201) 555-0199</p>'
+            "<span itemprop='addressLocality'>Phillipsburg</span><span itemprop=postalCode>8865</span>")
+    sd = structured.extract(html)
+    assert (sd["phone"], sd["city"], sd["zip"]) == ("(201) 555-0199", "Phillipsburg", "08865")
@@ -0,0 +1,62 @@
+import os, signal, time
+
+import pytest
+
+from njbuds import taskqueue
+from njbuds.taskqueue import TaskQueue
+
+@pytest.fixture
+def q(tmp_path):
+    q = TaskQueue(str(tmp_path / "q.sqlite"), max_attempts=2)
+    yield q
+    q.close()
+
+def test_put_is_idempotent_per_key(q):
+    assert q.put("t", [("a", 1), ("b", 2)]) == 2
+    assert q.put("t", [("a", 99), ("c", 3)]) == 1
+    assert q.outstanding("t") == 3
+
+def test_expired_lease_is_taken_over(q):
+    q.put("t", [("a", {"x": 1})])
+    [(tid, key, payload, attempt)] = q.lease("t", "w1", seconds=0.05)
+    assert (key, payload, attempt) == ("a", {"x": 1}, 1)
+    assert q.lease("t", "w2") == []               # still leased to w1
+    time.sleep(0.1)
+    [(tid2, _, _, attempt)] = q.lease("t", "w2")
+    assert tid2 == tid and attempt == 2
+    q.complete(tid, "w1", "stale")                 # the old owner no longer holds it
+    q.complete(tid, "w2", "ok")
+    assert list(q.results("t")) == [("a", {"x": 1}, "ok")]
+
+def test_failures_retry_then_stick(q):
+    q.put("t", [("a", 1)])
+    for _ in range(2):
+        [(tid, *_)] = q.lease("t", "w")
+        q.fail(tid, "w", "boom")
+    assert q.lease("t", "w") == [] and q.failures("t") == [("a", 2, "boom")]
+    assert q.retry_failed("t") == 1 and q.outstanding("t") == 1
+
+def test_expire_requeues_old_results(q):
+    q.put("t", [("a", 1), ("b", 2)])
+    for tid, *_ in q.lease("t", "w", n=2):
+        q.complete(tid, "w", "done")
+    assert q.expire("t", 3600) == 0 and q.outstanding("t") == 0
+    assert q.expire("t", 0) == 2 and q.outstanding("t") == 2 and list(q.results("t")) == []
+
+def double(x):
+    return 2 * x
+
+def test_run_workers_in_process(q):
+    q.put("t", [(str(i), i) for i in range(5)])
+    assert taskqueue.run_workers(q.path, "t", double, procs=1, concurrency=3) == (5, 0)
+    assert sorted(r for _, _, r in q.results("t")) == [0, 2, 4, 6, 8]
+
+def interrupt(x):
+    os.kill(os.getpid(), signal.SIGINT)   # Ctrl-C while the task is running
+    time.sleep(2)
+
+def test_interrupt_propagates_and_releases_leases(q):
+    q.put("t", [("a", 1)])
+    with pytest.raises(KeyboardInterrupt):
+        taskqueue.work(q.path, "t", interrupt, concurrency=1)
+    assert q.counts("t") == {"t": {"pending": 1}}
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from njbuds.utils import (canonical_urls, hosts, normalize_phones, normalize_zips, norm_street, norm_zip,
+                          origins, parse_addresses, phone_digits_batch)
+
+def test_normalize_phones_formats_valid_nanp_only():
+    out, valid = normalize_phones(["973.555.0123", "+1 (201) 555-0199", "911", "(123) 555-0100", None])
+    assert list(out) == ["(973) 555-0123", "(201) 555-0199", "911", "(123) 555-0100", ""]
+    assert list(valid) == [True, True, False, False, False]
+    digits, _ = phone_digits_batch(pd.Series(["1-973-555-0123", "973-911-0123"]))
+    assert list(digits) == ["9735550123", ""]
+
+def test_urls_hosts_and_origins():
+    vals = ["WWW.Rise.com/locations/paterson/?utm=x#top", "http://zen.example/", "mailto:a@b.com", "nan"]
+    urls, valid = canonical_urls(vals)
+    assert list(urls) == ["https://www.rise.com/locations/paterson", "http://zen.example/", "", ""]
+    assert list(valid) == [True, True, False, False]
+    assert list(origins(vals)[0][:2]) == ["https://www.rise.com", "http://zen.example"]
+    assert list(hosts(vals, strip_www=True)[0][:2]) == ["rise.com", "zen.example"]
+
+def test_parse_addresses_and_zips():
+    parts, matched = parse_addresses(["100 Main St, Paterson, NJ 07501", "no address here", "5 Elm, Dover, DE 19901"])
+    assert list(matched) == [True, False, False]
+    assert parts.loc[0, ["street", "city", "state", "zip"]].tolist() == ["100 Main St", "Paterson", "NJ", "07501"]
+    assert list(parse_addresses(["5 Elm, Dover, DE 19901"], states=("NJ", "DE"))[1]) == [True]
+    zips, ok = normalize_zips([7501, "08865-1234", "7304.0", "N/A"])
+    assert list(zips) == ["07501", "08865", "07304", "N/A"] and list(ok) == [True, True, True, False]
+    assert [norm_zip(z) for z in (7501, "08865-1234", "7304.0")] == list(zips[:3])
+
+def test_norm_street():
+    assert norm_street("123 North Main Street, Suite 4") == "123 n main st"
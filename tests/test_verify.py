@@ -0,0 +1,40 @@
+from njbuds.extractors import Page
+from njbuds.verify import MIN_CONFIDENCE, name_tokens, score, verify
+
+ROW = {"name": "Garden State Dispensary", "street": "26 Park Avenue", "city": "Paterson", "phone": "973-555-0123"}
+
+PAGES = {
+    "https://gardenstatedispensary.example/": "<h1>Garden State Dispensary</h1><p>26 Park Ave, Paterson NJ</p>"
+                                              "<p>(973) 555-0123</p>",
+    "https://weedmaps.example/nj/garden-state": "<h1>Garden State Dispensary reviews</h1><p>Paterson</p>",
+    "https://news.example/story": "<p>Dispensaries open across New Jersey</p>",
+}
+
+def fetch(url):
+    return Page(url, PAGES[url]) if url in PAGES else None
+
+def test_name_tokens_drop_generic_words_unless_nothing_is_left():
+    assert name_tokens("Garden State Dispensary") == ["garden", "state"]
+    assert name_tokens("The Dispensary") == ["the", "dispensary"]   # all generic: keep them all
+
+def test_score_weights_only_available_evidence():
+    conf, signals = score(ROW, fetch("https://gardenstatedispensary.example/"))
+    assert conf == 1.0 and set(signals) == {"name", "host", "street", "city", "phone"}
+    conf, signals = score({"name": "Garden State"}, fetch("https://news.example/story"))
+    assert conf == 0.0 and set(signals) == {"name", "host"}
+
+def test_verify_picks_the_store_site_over_directories():
+    links = ["https://weedmaps.example/nj/garden-state", "https://news.example/story",
+             "https://gardenstatedispensary.example/", "https://dead.example/"]
+    best, conf, scored = verify(ROW, links, fetch=fetch)
+    assert best == "https://gardenstatedispensary.example/" and conf == 1.0
+    assert len(scored) == 3                       # the unreachable candidate is left out
+    assert dict((u, c) for u, c, _ in scored)["https://news.example/story"] < MIN_CONFIDENCE
+
+def test_verify_skip_top_k_and_ties():
+    links = ["https://weedmaps.example/nj/garden-state"] * 2 + ["https://gardenstatedispensary.example/"]
+    assert verify(ROW, links, skip=lambda u: "weedmaps" in u, fetch=fetch)[0] == "https://gardenstatedispensary.example/"
+    assert verify(ROW, links, k=1, fetch=fetch)[0] == "https://weedmaps.example/nj/garden-state"
+    assert verify(ROW, ["https://dead.example/"], fetch=fetch) == ("", 0.0, [])
+    twin = {"https://a.example/": PAGES["https://news.example/story"], "https://b.example/": PAGES["https://news.example/story"]}
+    assert verify(ROW, list(twin), fetch=lambda u: Page(u, twin[u]))[0] == "https://a.example/"